@@ -1,7 +1,12 @@
 # admin.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from models import db, User, Exercise, CompilationHistory
-from exercise_manager import create_exercise, get_all_exercises, get_exercise_by_id
+from models import db, User, Exercise, CompilationHistory, load_blob
+from exercise_manager import create_exercise, update_exercise, delete_exercise as remove_exercise, get_all_exercises, get_exercise_by_id, exercise_cache_version
+from http_cache import conditional_response
+from db_config import pool_stats
+from auth import password_hasher, login_latency
+from metrics import metrics
+from regrade import regrader
 import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -50,8 +55,12 @@ def users():
 @admin_bp.route('/exercises')
 def exercises():
     """Exercise management"""
-    exercises = get_all_exercises()
-    return render_template('admin/exercises.html', exercises=exercises)
+    version, updated_at = exercise_cache_version()
+    return conditional_response(
+        etag=f"admin-exercises-{version}",
+        last_modified=updated_at,
+        render=lambda: render_template('admin/exercises.html', exercises=get_all_exercises())
+    )
 
 @admin_bp.route('/exercises/new', methods=['GET', 'POST'])
 def new_exercise():
@@ -94,33 +103,76 @@ def edit_exercise(exercise_id):
         return redirect(url_for('admin.exercises'))
     
     if request.method == 'POST':
-        exercise.title = request.form.get('title')
-        exercise.description = request.form.get('description')
-        exercise.difficulty = request.form.get('difficulty')
-        exercise.category = request.form.get('category')
-        exercise.initial_code = request.form.get('initial_code')
-        exercise.solution_code = request.form.get('solution_code')
-        
         test_cases_json = request.form.get('test_cases')
         try:
             test_cases = json.loads(test_cases_json)
-            exercise.test_cases = json.dumps(test_cases)
             
-            db.session.commit()
+            exercise = update_exercise(
+                exercise_id,
+                title=request.form.get('title'),
+                description=request.form.get('description'),
+                difficulty=request.form.get('difficulty'),
+                category=request.form.get('category'),
+                initial_code=request.form.get('initial_code'),
+                solution_code=request.form.get('solution_code'),
+                test_cases=test_cases
+            )
+            
             flash(f'Exercise "{exercise.title}" updated successfully', 'success')
+            if request.form.get('regrade'):
+                regrader.start(exercise_id, test_cases)
+                flash('Re-judging existing submissions against the new test cases', 'info')
+                return redirect(url_for('admin.edit_exercise', exercise_id=exercise_id))
             return redirect(url_for('admin.exercises'))
         except Exception as e:
+            db.session.rollback()
             flash(f'Error updating exercise: {str(e)}', 'error')
     
     # Convert test_cases JSON string to Python object for the template
     test_cases = json.loads(exercise.test_cases)
     
+    regrade_job = regrader.latest_for(exercise_id)
     return render_template(
         'admin/edit_exercise.html',
         exercise=exercise,
-        test_cases=json.dumps(test_cases, indent=2)
+        test_cases=json.dumps(test_cases, indent=2),
+        regrade_job=regrade_job.to_dict() if regrade_job else None
     )
 
+@admin_bp.route('/exercises/<int:exercise_id>/regrade', methods=['POST'])
+def regrade_exercise(exercise_id):
+    """Start re-judging every submission of an exercise against its current test cases"""
+    exercise = get_exercise_by_id(exercise_id)
+    if not exercise:
+        return jsonify({"error": "Exercise not found"}), 404
+    
+    job = regrader.start(exercise_id, exercise.test_case_list)
+    return jsonify(job.to_dict()), 202
+
+@admin_bp.route('/exercises/<int:exercise_id>/similarity')
+def exercise_similarity(exercise_id):
+    """Most similar pairs of submissions by different users, for plagiarism review"""
+    exercise = get_exercise_by_id(exercise_id)
+    if not exercise:
+        flash('Exercise not found', 'error')
+        return redirect(url_for('admin.exercises'))
+    
+    from similarity import similar_pairs  # Rarely used, so workers only load it when asked
+    pairs = similar_pairs(exercise_id, initial_code=exercise.initial_code)
+    if request.args.get('format') == 'json':
+        return jsonify(pairs)
+    
+    sources = {digest: load_blob(digest) for pair in pairs for digest in (pair['source_a'], pair['source_b'])}
+    return render_template('admin/similarity.html', exercise=exercise, pairs=pairs, sources=sources)
+
+@admin_bp.route('/regrade/<job_id>')
+def regrade_status(job_id):
+    """Progress of a re-judge job as JSON"""
+    job = regrader.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
 @admin_bp.route('/exercises/<int:exercise_id>/delete', methods=['POST'])
 def delete_exercise(exercise_id):
     """Delete an exercise"""
@@ -130,8 +182,7 @@ def delete_exercise(exercise_id):
         return redirect(url_for('admin.exercises'))
     
     title = exercise.title
-    db.session.delete(exercise)
-    db.session.commit()
+    remove_exercise(exercise_id)
     
     flash(f'Exercise "{title}" deleted successfully', 'success')
     return redirect(url_for('admin.exercises'))
@@ -157,5 +208,22 @@ def stats():
         total_users=total_users,
         exercises_by_difficulty=exercises_by_difficulty,
         successful_compilations=successful_compilations,
-        failed_compilations=failed_compilations
-    )
\ No newline at end of file
+        failed_compilations=failed_compilations,
+        db_pool=pool_stats(db.engine),
+        stage_latency=metrics.summary()
+    )
+
+@admin_bp.route('/stats/auth')
+def auth_stats():
+    """Login latency and password hashing pool timings as JSON"""
+    return jsonify(dict(password_hasher.stats(), login=login_latency.summary()))
+
+@admin_bp.route('/stats/db_pool')
+def db_pool_stats():
+    """Database connection pool utilization as JSON"""
+    return jsonify(pool_stats(db.engine))
+
+@admin_bp.route('/stats/stages')
+def stage_stats():
+    """Per-stage latency percentiles as JSON"""
+    return jsonify(metrics.summary())
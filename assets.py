@@ -0,0 +1,265 @@
+# assets.py
+"""
+Static asset build: minified, content-hashed and pre-compressed copies of
+the files in static/, served with far-future cache headers.
+
+Usage:
+    python assets.py          # Build static/dist/ and its manifest (run after changing static files)
+"""
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+from flask import Blueprint, request, url_for, send_from_directory, abort
+
+try:
+    import brotli  # Optional, smaller than gzip for text
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Files under static/ that templates reference through asset_url()
+ASSET_SOURCES = [
+    'style.css', 'script.js', 'editor.css', 'editor.js', 'exercise.js', 'exercises.js',
+    'admin-exercises.js', 'admin-exercise-form.js', 'admin-stats.js', 'admin-users.js',
+]
+
+# Built files never change under their name, so browsers may keep them for a year without revalidating
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Pre-compressed variants, most preferred first: (Accept-Encoding token, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+assets_bp = Blueprint('assets', __name__)
+
+_manifest = None
+
+def _skip_string(source, i):
+    """Index just past the string or template literal starting at source[i]"""
+    quote = source[i]
+    i += 1
+    while i < len(source) and source[i] != quote:
+        if source[i] == '\\':
+            i += 1
+        elif quote == '`' and source.startswith('${', i):
+            i = _skip_code(source, i + 2)
+            continue
+        i += 1
+    return i + 1
+
+def _skip_code(source, i):
+    """Index just past the closing brace of a template literal's ${...} expression"""
+    depth = 0
+    while i < len(source):
+        char = source[i]
+        if char in '\'"`':
+            i = _skip_string(source, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0:
+                return i + 1
+            depth -= 1
+        i += 1
+    return i
+
+# After these, "/" starts a regular expression rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new', 'delete', 'void', 'throw',
+                   'yield', 'await'}
+_WORD = re.compile(r'[\w$]+')
+
+def minify_js(source):
+    """
+    Strip comments and collapse whitespace in JavaScript
+
+    Strings, template literals and regular expressions are copied verbatim.
+    Line breaks are kept (one per run of blank lines) so automatic semicolon
+    insertion works as before; other whitespace shrinks to a single space
+    where tokens would otherwise merge, and disappears elsewhere.
+    """
+    out = []
+    pending = ''  # Whitespace seen since the last token: '', ' ' or '\n'
+    last = ''     # Last token written
+    i, n = 0, len(source)
+
+    def emit(token):
+        nonlocal pending, last
+        if pending and out:
+            previous, following = out[-1][-1], token[0]
+            if pending == '\n':
+                out.append('\n')
+            elif (_WORD.match(previous) and _WORD.match(following)) or (previous in '+-/' and previous == following):
+                out.append(' ')
+        out.append(token)
+        pending = ''
+        last = token
+
+    while i < n:
+        char = source[i]
+        if char.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            pending = '\n' if '\n' in source[i:j] or pending == '\n' else ' '
+            i = j
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j < 0 else j
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            j = n if j < 0 else j + 2
+            if '\n' in source[i:j]:
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i = j
+        elif char in '\'"`':
+            j = _skip_string(source, i)
+            emit(source[i:j])
+            i = j
+        elif char == '/' and (not last or last[-1] in _REGEX_PRECEDERS or last in _REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and (in_class or source[j] != '/') and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and source[j].isalnum():
+                j += 1  # Flags
+            emit(source[i:j])
+            i = j
+        else:
+            match = _WORD.match(source, i)
+            j = match.end() if match else i + 1
+            emit(source[i:j])
+            i = j
+    return ''.join(out) + '\n'
+
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)''', re.DOTALL)
+
+def minify_css(source):
+    """
+    Strip comments and collapse whitespace in CSS
+
+    Whitespace is dropped around braces, semicolons and commas, and after
+    colons, but never before a colon (it separates "a :hover" from "a:hover").
+    """
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        return '' if match.group(2) else ' '
+
+    css = _CSS_TOKEN.sub(replace, source)
+    parts = re.split(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''', css)
+    for index in range(0, len(parts), 2):  # Outside strings
+        part = re.sub(r' ?([{};,>]) ?', r'\1', parts[index])
+        parts[index] = re.sub(r': ', ':', part).replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def build_assets(sources=ASSET_SOURCES):
+    """
+    Minify, fingerprint and pre-compress static files into static/dist/
+
+    Each file is written as name.<hash>.ext together with .gz (and, when the
+    brotli package is installed, .br) variants, and listed in manifest.json.
+    Outputs of earlier builds that are no longer listed are removed.
+
+    Returns:
+        The manifest: {source name: built file name}
+    """
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name in sources:
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            source = f.read()
+        stem, extension = os.path.splitext(name)
+        data = MINIFIERS.get(extension, lambda text: text)(source).encode('utf-8')
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        manifest[name] = built
+
+        path = os.path.join(DIST_DIR, built)
+        _write(path, data)
+        _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(path + '.br', brotli.compress(data, quality=11))
+        logging.info(f"{name}: {len(source.encode('utf-8'))} -> {len(data)} bytes -> {built}")
+
+    _write(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    current = set(manifest.values())
+    for filename in os.listdir(DIST_DIR):
+        built = filename
+        for _, suffix in ENCODINGS:
+            built = built.removesuffix(suffix)
+        if filename != os.path.basename(MANIFEST_PATH) and built not in current:
+            os.remove(os.path.join(DIST_DIR, filename))
+
+    global _manifest
+    _manifest = manifest
+    return manifest
+
+def _write(path, data):
+    # Write then rename, so a running server never serves a half-written file
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def load_manifest():
+    """The manifest of the last build, or {} if assets were never built"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH, encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+@assets_bp.app_context_processor
+def _asset_helpers():
+    return {'asset_url': asset_url}
+
+def asset_url(name):
+    """URL of a static file: its built, fingerprinted copy if assets were built, else the file itself"""
+    built = load_manifest().get(name)
+    if built is None:
+        return url_for('static', filename=name)
+    return url_for('assets.asset', filename=built)
+
+@assets_bp.route('/assets/<filename>')
+def asset(filename):
+    """Serve a built asset, pre-compressed when the client accepts it"""
+    if filename not in load_manifest().values():
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding, suffix = next(
+        ((encoding, suffix) for encoding, suffix in ENCODINGS
+         if request.accept_encodings[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix))),
+        (None, '')
+    )
+    response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return response
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    manifest = build_assets()
+    print(f"Built {len(manifest)} assets into {DIST_DIR}")
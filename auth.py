@@ -0,0 +1,144 @@
+# auth.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask_bcrypt import Bcrypt
+from models import app
+from metrics import LatencyStats
+from concurrency import offload
+
+# Seconds clients are asked to wait (Retry-After) when logins are rejected as busy
+AUTH_RETRY_AFTER = 2
+
+class AuthBusyError(Exception):
+    """Raised when too many password hashes are already queued, or one waited longer than the timeout"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded worker pool. bcrypt releases the GIL while hashing,
+    so several logins are checked in parallel and request threads only wait for
+    their own result. When max_pending jobs are queued, new ones are rejected
+    with AuthBusyError instead of piling up. Under a cooperative server the
+    pool's threads are green, so each hash is offloaded to a real OS thread.
+    """
+    def __init__(self, bcrypt, max_workers=4, max_pending=64, timeout=10):
+        self.bcrypt = bcrypt
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.metrics = {
+            'queue_wait': LatencyStats(),
+            'hash': LatencyStats(),
+            'check': LatencyStats(),
+        }
+
+    @classmethod
+    def from_env(cls, bcrypt):
+        """Create a hasher configured from AUTH_* environment variables"""
+        return cls(
+            bcrypt,
+            max_workers=int(os.getenv("AUTH_WORKERS", "4")),
+            max_pending=int(os.getenv("AUTH_MAX_PENDING", "64")),
+            timeout=float(os.getenv("AUTH_TIMEOUT", "10")),
+        )
+
+    def generate_password_hash(self, password):
+        """Hash a password on the worker pool, returns the hash as a str"""
+        return self._run('hash', lambda: self.bcrypt.generate_password_hash(password).decode('utf-8'))
+
+    def check_password_hash(self, password_hash, password):
+        """Check a password against a bcrypt hash on the worker pool"""
+        return self._run('check', lambda: self.bcrypt.check_password_hash(password_hash, password))
+
+    def _run(self, operation, fn):
+        if not self._slots.acquire(blocking=False):
+            logging.warning(f"Password hashing pool saturated, rejected {operation}")
+            raise AuthBusyError("Too many concurrent logins, please try again")
+
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            self.metrics['queue_wait'].record(started - queued_at)
+            try:
+                return offload(fn)
+            finally:
+                self.metrics[operation].record(time.perf_counter() - started)
+                self._slots.release()
+
+        try:
+            future = self.executor.submit(job)
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The job keeps its slot until it finishes, so a stuck pool still sheds new work
+            logging.warning(f"Password {operation} waited more than {self.timeout}s, rejected")
+            raise AuthBusyError("Too many concurrent logins, please try again") from None
+
+    def stats(self):
+        return {name: stats.summary() for name, stats in self.metrics.items()}
+
+class LoginRateLimiter:
+    """Sliding-window limit on failed login attempts, keyed by username and by client IP"""
+    def __init__(self, max_per_user=5, max_per_ip=50, window=60):
+        self.limits = {'user': max_per_user, 'ip': max_per_ip}
+        self.window = window
+        self._failures = {}  # (kind, value) -> deque of failure timestamps
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Create a limiter configured from LOGIN_* environment variables"""
+        return cls(
+            max_per_user=int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5")),
+            max_per_ip=int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "50")),
+            window=float(os.getenv("LOGIN_FAILURE_WINDOW", "60")),
+        )
+
+    def is_limited(self, username, ip):
+        """Return True if either the username or the IP has too many recent failures"""
+        now = time.monotonic()
+        with self._lock:
+            return any(
+                len(self._recent((kind, value), now)) >= self.limits[kind]
+                for kind, value in [('user', username), ('ip', ip)]
+            )
+
+    def record_failure(self, username, ip):
+        now = time.monotonic()
+        with self._lock:
+            for key in [('user', username), ('ip', ip)]:
+                self._failures.setdefault(key, deque()).append(now)
+            if len(self._failures) > 10000:
+                self._prune(now)
+
+    def reset(self, username):
+        """Forget failures for a username after a successful login"""
+        with self._lock:
+            self._failures.pop(('user', username), None)
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if not failures:
+            return ()
+        while failures and now - failures[0] > self.window:
+            failures.popleft()
+        return failures
+
+    def _prune(self, now):
+        for key in list(self._failures):
+            if not self._recent(key, now):
+                del self._failures[key]
+
+# Work factor: each +1 doubles hashing cost; existing hashes keep their own factor
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+bcrypt = Bcrypt(app)
+password_hasher = PasswordHasher.from_env(bcrypt)
+login_limiter = LoginRateLimiter.from_env()
+login_latency = LatencyStats()
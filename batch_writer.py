@@ -0,0 +1,247 @@
+# batch_writer.py
+import os
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from models import db, app, CompilationHistory, ChatMessage, store_blob
+from metrics import metrics
+from diagnostics import pack_diagnostics
+from search import index_chat_messages
+
+# CompilationHistory text fields stored in the blob table and the hash column they map to
+BLOB_FIELDS = {
+    'code': 'code_hash',
+    'compilation_output': 'compilation_output_hash',
+    'execution_output': 'execution_output_hash',
+    'diagnostics': 'diagnostics_hash',
+}
+
+ROW_FIELDS = ['user_id', 'project_id', 'document_id', 'exercise_id', 'status', 'compiled_at',
+              'wall_time_ms', 'user_time_ms', 'sys_time_ms', 'peak_rss_kb']
+
+_STOP = object()
+
+class BatchWriter:
+    """
+    Writes queued records from a background thread in batched transactions,
+    so the request path never waits for a database round-trip. Subclasses
+    implement _write(batch); records are handed over in submission order.
+
+    When the queue is full, the 'drop' policy discards the new record immediately,
+    while the 'block' policy applies backpressure by waiting up to block_timeout
+    seconds for space before dropping it.
+    """
+    def __init__(self, max_queue=10000, batch_size=200, flush_interval=0.5, policy='drop', block_timeout=0.05):
+        if policy not in ['drop', 'block']:
+            raise ValueError("Policy must be one of: 'drop', 'block'")
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the background writer thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, **fields):
+        """
+        Queue a record for writing
+
+        Args:
+            **fields: Record fields, passed to _write unchanged
+
+        Returns:
+            True if the record was queued, False if it was dropped
+        """
+        self.start()
+
+        try:
+            if self.policy == 'block':
+                self.queue.put(fields, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(fields)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f"{type(self).__name__} queue full, dropped record ({self.dropped} dropped so far)")
+            return False
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        if self._thread and self._thread.is_alive():
+            self.queue.join()
+
+    def stop(self, timeout=10):
+        """Write any queued records and stop the writer thread"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            stopping = item is _STOP
+            batch = [] if stopping else [item]
+
+            # Drain whatever is already waiting, up to one batch
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._write(batch)
+
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self.queue.task_done()
+
+            if stopping:
+                return
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+class HistoryWriter(BatchWriter):
+    """
+    Writes CompilationHistory rows, one multi-row INSERT per batch
+
+    A "diagnostics" field is the list from diagnostics.parse_diagnostics;
+    it is packed here, on the writer thread, rather than on the request path.
+    """
+    @classmethod
+    def from_env(cls):
+        """Create a writer configured from HISTORY_* environment variables"""
+        return cls(
+            max_queue=int(os.getenv("HISTORY_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "200")),
+            flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5")),
+            policy=os.getenv("HISTORY_QUEUE_POLICY", "drop"),
+        )
+
+    def submit(self, **fields):
+        fields.setdefault('compiled_at', datetime.utcnow())
+        return super().submit(**fields)
+
+    def _write(self, batch):
+        with app.app_context():
+            try:
+                hashes = {}  # Identical sources in a batch are compressed once
+                rows = []
+                for fields in batch:
+                    if 'diagnostics' in fields:
+                        fields['diagnostics'] = pack_diagnostics(fields['diagnostics'])
+                    row = {name: fields.get(name) for name in ROW_FIELDS}
+                    for field, column in BLOB_FIELDS.items():
+                        value = fields.get(field)
+                        if value is not None and value not in hashes:
+                            hashes[value] = store_blob(value)
+                        row[column] = hashes.get(value) if value is not None else None
+                    rows.append(row)
+
+                # executemany, i.e. one multi-row INSERT per batch
+                with metrics.span("db.history_write"):
+                    db.session.execute(CompilationHistory.__table__.insert(), rows)
+                    db.session.commit()
+                self.written += len(rows)
+            except Exception as e:
+                db.session.rollback()
+                self.failed += len(batch)
+                logging.error(f"Failed to write {len(batch)} compilation history records: {e}", exc_info=True)
+            finally:
+                db.session.remove()
+
+class ChatWriter(BatchWriter):
+    """
+    Persists ChatMessage rows in small transactions, indexing them for search
+    in the same transaction. on_written(messages) is
+    called after each commit with the saved rows as dicts, in submission order,
+    so broadcasts carry the database id and never overtake each other.
+    """
+    def __init__(self, on_written=None, **kwargs):
+        kwargs.setdefault('policy', 'block')
+        kwargs.setdefault('block_timeout', 1.0)
+        super().__init__(**kwargs)
+        self.on_written = on_written
+
+    @classmethod
+    def from_env(cls, on_written=None):
+        """Create a writer configured from CHAT_* environment variables"""
+        return cls(
+            on_written=on_written,
+            max_queue=int(os.getenv("CHAT_QUEUE_SIZE", "5000")),
+            batch_size=int(os.getenv("CHAT_BATCH_SIZE", "20")),
+            flush_interval=float(os.getenv("CHAT_FLUSH_INTERVAL", "0.5")),
+        )
+
+    def submit(self, **fields):
+        fields.setdefault('sent_at', datetime.utcnow())
+        return super().submit(**fields)
+
+    def _write(self, batch):
+        with app.app_context():
+            try:
+                messages = [
+                    ChatMessage(
+                        user_id=fields['user_id'],
+                        project_id=fields['project_id'],
+                        message=fields['message'],
+                        sent_at=fields['sent_at']
+                    )
+                    for fields in batch
+                ]
+                with metrics.span("db.chat_write"):
+                    db.session.add_all(messages)
+                    db.session.flush()
+                    index_chat_messages(messages)
+                    db.session.commit()
+                self.written += len(messages)
+                saved = [dict(fields, id=message.id) for fields, message in zip(batch, messages)]
+            except Exception as e:
+                db.session.rollback()
+                self.failed += len(batch)
+                logging.error(f"Failed to write {len(batch)} chat messages: {e}", exc_info=True)
+                return
+            finally:
+                db.session.remove()
+
+        if self.on_written:
+            try:
+                self.on_written(saved)
+            except Exception as e:
+                logging.error(f"Chat broadcast failed: {e}", exc_info=True)
+
+history_writer = HistoryWriter.from_env()
@@ -0,0 +1,294 @@
+# benchmark.py
+"""
+Benchmark suite for the compile / run / judge pipeline.
+
+Drives execute_code_impl, analyze_memory and execute_test_cases in process
+with a corpus of C programs (the sample exercise solutions plus heavier
+programs) at several concurrency levels, and records throughput, latency
+percentiles and the per-stage breakdown from the metrics registry as JSON.
+
+Usage:
+    python benchmark.py --output baseline.json
+    python benchmark.py --concurrency 1 4 --iterations 20 --workloads execute judge
+    python benchmark.py --output new.json --compare baseline.json   # Fails on regressions
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest import percentiles, git_commit, compare as compare_reports
+
+WORKLOADS = ['execute', 'judge', 'memory']
+
+# Heavier programs than the sample exercises: CPU-bound, output-heavy,
+# allocation-heavy and slow to compile
+HEAVY_PROGRAMS = [
+    {
+        'name': 'sieve',
+        'code': r"""#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+int main() {
+    int n;
+    scanf("%d", &n);
+    char *composite = calloc(n + 1, 1);
+    int count = 0;
+    for (int i = 2; i <= n; i++) {
+        if (!composite[i]) {
+            count++;
+            for (long j = (long)i * i; j <= n; j += i) composite[j] = 1;
+        }
+    }
+    printf("%d", count);
+    free(composite);
+    return 0;
+}""",
+        'test_cases': [{'input': '2000000', 'expected_output': '148933'}],
+    },
+    {
+        'name': 'output_heavy',
+        'code': r"""#include <stdio.h>
+
+int main() {
+    long sum = 0;
+    for (int i = 0; i < 20000; i++) {
+        printf("line %d\n", i);
+        sum += i;
+    }
+    printf("%ld", sum);
+    return 0;
+}""",
+        'test_cases': [],
+    },
+    {
+        'name': 'allocations',
+        'code': r"""#include <stdio.h>
+#include <stdlib.h>
+
+struct node { int value; struct node *next; };
+
+int main() {
+    struct node *head = NULL;
+    for (int i = 0; i < 200000; i++) {
+        struct node *n = malloc(sizeof *n);
+        n->value = i;
+        n->next = head;
+        head = n;
+    }
+    long sum = 0;
+    while (head) {
+        struct node *next = head->next;
+        sum += head->value;
+        free(head);
+        head = next;
+    }
+    printf("%ld", sum);
+    return 0;
+}""",
+        'test_cases': [{'input': '', 'expected_output': '19999900000'}],
+    },
+    {
+        'name': 'large_compile',
+        'code': "#include <stdio.h>\n#include <stdlib.h>\n#include <string.h>\n#include <math.h>\n\n" + "\n".join(
+            f"static double f{i}(double x) {{ return sqrt(x * {i} + 1.0) + sin(x) * cos(x / {i + 1}); }}"
+            for i in range(300)
+        ) + "\n\nint main() {\n    double total = 0;\n" + "\n".join(
+            f"    total += f{i}({i}.5);" for i in range(300)
+        ) + '\n    printf("%d", total > 0);\n    return 0;\n}',
+        'test_cases': [{'input': '', 'expected_output': '1'}],
+    },
+]
+
+# Program output kept per stream. output_heavy writes about 200 KB, more than the server's default
+# OUTPUT_LIMIT_BYTES; a higher limit keeps it timing a complete run, comparable with earlier baselines.
+BENCHMARK_OUTPUT_LIMIT = 1024 * 1024
+
+# Report values compared by --compare for every (workload, concurrency): (key, True if higher is worse)
+COMPARED_METRICS = [
+    (('latency_ms', 'p50'), True),
+    (('latency_ms', 'p95'), True),
+    (('throughput_per_second',), False),
+]
+
+def load_corpus():
+    """Sample exercise solutions plus the heavy programs, as dicts with name, code and test_cases"""
+    from exercise_manager import create_sample_exercises, get_all_exercises
+
+    create_sample_exercises()
+    corpus = [
+        {
+            'name': exercise.title,
+            'code': exercise.solution_code,
+            'test_cases': exercise.test_case_list,
+        }
+        for exercise in get_all_exercises()
+    ]
+    return corpus + HEAVY_PROGRAMS
+
+def make_call(workload, program):
+    """Build a zero-argument callable that runs one program through a workload and returns success"""
+    import server
+    from flask import session
+
+    def execute():
+        first_input = program['test_cases'][0]['input'] if program['test_cases'] else ""
+        with server.app.test_request_context():
+            result = server.execute_code_impl(program['code'], user_input=first_input or "\n")
+        return result.get('success', False)
+
+    def judge():
+        with server.app.test_request_context():
+            result = server.execute_test_cases(program['code'], program['test_cases'])
+        return result.get('success', False)
+
+    def memory():
+        with server.app.test_request_context(method='POST', json={'code': program['code']}):
+            session['user_id'] = 0
+            result = server.analyze_memory()
+        return result.get_json().get('success', False)
+
+    return {'execute': execute, 'judge': judge, 'memory': memory}[workload]
+
+def run_workload(workload, corpus, concurrency, iterations):
+    """
+    Run every corpus program `iterations` times through a workload
+
+    Returns:
+        Result dictionary for the report
+    """
+    from metrics import metrics
+
+    programs = [program for program in corpus if workload != 'judge' or program['test_cases']]
+    calls = [(program['name'], make_call(workload, program)) for program in programs for _ in range(iterations)]
+
+    def timed_call(item):
+        name, call = item
+        started = time.perf_counter()
+        try:
+            ok = call()
+        except Exception:
+            ok = False
+        return name, ok, time.perf_counter() - started
+
+    metrics.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed_call, calls))
+    elapsed = time.perf_counter() - started
+
+    per_program = {}
+    for name, ok, seconds in outcomes:
+        per_program.setdefault(name, []).append(seconds)
+
+    return {
+        'workload': workload,
+        'concurrency': concurrency,
+        'calls': len(outcomes),
+        'failures': sum(1 for _, ok, _ in outcomes if not ok),
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_per_second': round(len(outcomes) / elapsed, 2) if elapsed else None,
+        'latency_ms': percentiles([seconds for _, _, seconds in outcomes]),
+        'programs': {name: percentiles(samples) for name, samples in sorted(per_program.items())},
+        'stages': {stage: summary for stage, summary in metrics.summary().items() if not stage.startswith('http.')},
+    }
+
+def compare(report, baseline, tolerance):
+    """
+    Compare matching (workload, concurrency) results against a baseline
+
+    Returns:
+        List of regression descriptions (empty if none exceed the tolerance)
+    """
+    previous_results = {(r['workload'], r['concurrency']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        previous = previous_results.get((result['workload'], result['concurrency']))
+        if previous:
+            label = f"{result['workload']}@{result['concurrency']} "
+            regressions.extend(compare_reports(result, previous, tolerance, COMPARED_METRICS, label))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compile / run / judge pipeline")
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4, 8], help="Concurrency levels to run")
+    parser.add_argument('--iterations', type=int, default=5, help="Runs of each corpus program per workload and level")
+    parser.add_argument('--output', help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument('--compare', help="Baseline report; exit with status 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression for --compare")
+    args = parser.parse_args()
+
+    # A throwaway database, so benchmarks never touch real data
+    work_dir = tempfile.mkdtemp(prefix="vcce-benchmark-")
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}"
+    os.environ['OUTPUT_LIMIT_BYTES'] = str(BENCHMARK_OUTPUT_LIMIT)
+
+    from models import db, app
+
+    workloads = list(args.workloads)
+    if 'memory' in workloads and not shutil.which('valgrind'):
+        print("valgrind not found, skipping the memory workload", file=sys.stderr)
+        workloads.remove('memory')
+
+    results = []
+    try:
+        with app.app_context():
+            db.create_all()
+            corpus = load_corpus()
+            for workload in workloads:
+                for concurrency in args.concurrency:
+                    print(f"Running {workload} at concurrency {concurrency}...", file=sys.stderr)
+                    results.append(run_workload(workload, corpus, concurrency, args.iterations))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'config': {
+            'workloads': workloads,
+            'concurrency': args.concurrency,
+            'iterations': args.iterations,
+            'output_limit_bytes': BENCHMARK_OUTPUT_LIMIT,
+            'programs': [program['name'] for program in corpus],
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'gcc': _gcc_version(),
+            'commit': git_commit(),
+        },
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions: " + "; ".join(regressions))
+            sys.exit(1)
+
+def _gcc_version():
+    import subprocess
+    try:
+        return subprocess.run(['gcc', '-dumpfullversion'], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+if __name__ == '__main__':
+    main()
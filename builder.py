@@ -0,0 +1,246 @@
+# builder.py
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from diagnostics import DIAGNOSTICS_FORMAT_FLAGS, parse_diagnostics, format_diagnostics, pack_diagnostics, unpack_diagnostics
+
+# Object files are content-addressed, so identical translation units are shared
+# between builds (and projects) and survive across requests
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "vcce-build-cache"))
+BUILD_CACHE_MAX_OBJECTS = int(os.getenv("BUILD_CACHE_MAX_OBJECTS", "5000"))
+
+COMPILE_FLAGS = [
+    "-std=c11",
+    "-Wall",
+    "-I/usr/include",
+    "-I/usr/local/include",
+]
+LINK_FLAGS = ["-lm"]
+COMPILE_TIMEOUT = 5
+
+FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+\.[ch]$')
+
+# (project_id, source name) -> project files the unit included at its last compile
+_dependencies = {}
+_dependencies_lock = threading.Lock()
+
+def is_valid_filename(name):
+    """Return True if name is a plain .c or .h file name (no paths)"""
+    return bool(name) and bool(FILENAME_PATTERN.match(name))
+
+def build_project(project_id, files, work_dir):
+    """
+    Compile and link a multi-file C project, recompiling only the translation
+    units whose source or included project files (headers, or a .c file
+    included directly) changed since they were last compiled.
+
+    Args:
+        project_id: Project ID (keys the include dependency records)
+        files: Dictionary mapping file name to content (.c and .h files)
+        work_dir: Empty directory to build in
+
+    Returns:
+        dict with "success" and "stage"; on success also "executable",
+        "compiled" and "reused" (lists of source names); on failure "output"
+        and the "file" that failed. Every result carries "diagnostics" (see
+        diagnostics.parse_diagnostics), including the warnings of reused units
+    """
+    sources = {name: content for name, content in files.items() if name.endswith('.c')}
+
+    if not sources:
+        return {
+            "success": False,
+            "stage": "compilation",
+            "output": "The project has no .c files to compile",
+            "diagnostics": []
+        }
+
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+
+    # Every file must be on disk for includes to resolve
+    for name, content in files.items():
+        with open(os.path.join(work_dir, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    objects = []
+    compiled = []
+    reused = []
+    diagnostics = []
+
+    for name in sorted(sources):
+        with _dependencies_lock:
+            deps = _dependencies.get((project_id, name), [])
+        object_path = _object_path(name, sources[name], deps, files)
+        work_object = os.path.join(work_dir, name[:-2] + ".o")
+
+        if _checkout_object(object_path, work_object):
+            objects.append(work_object)
+            reused.append(name)
+            diagnostics.extend(_load_diagnostics(object_path))
+            continue
+
+        dep_file = os.path.join(work_dir, name[:-2] + ".d")
+        result = subprocess.run(
+            ["gcc", "-c", name, "-o", work_object, "-MMD", "-MF", dep_file] + COMPILE_FLAGS + DIAGNOSTICS_FORMAT_FLAGS,
+            capture_output=True,
+            text=True,
+            timeout=COMPILE_TIMEOUT,
+            cwd=work_dir
+        )
+        unit_diagnostics = parse_diagnostics(result.stderr)
+        diagnostics.extend(unit_diagnostics)
+        if result.returncode != 0:
+            return {
+                "success": False,
+                "stage": "compilation",
+                "file": name,
+                "output": format_diagnostics(diagnostics),
+                "diagnostics": diagnostics
+            }
+
+        # Every project file the unit includes, whatever its extension; system headers are not listed by -MMD
+        deps = [dep for dep in _parse_dep_file(dep_file) if dep in files and dep != name]
+        with _dependencies_lock:
+            _dependencies[(project_id, name)] = deps
+
+        object_path = _object_path(name, sources[name], deps, files)
+        _save_diagnostics(object_path, unit_diagnostics)
+        _store_object(work_object, object_path)
+        objects.append(work_object)
+        compiled.append(name)
+
+    exec_path = os.path.join(work_dir, "executable")
+    link_result = subprocess.run(
+        ["gcc"] + objects + ["-o", exec_path] + LINK_FLAGS,
+        capture_output=True,
+        text=True,
+        timeout=COMPILE_TIMEOUT
+    )
+    if link_result.returncode != 0:
+        diagnostics.extend(parse_diagnostics(link_result.stderr))
+        return {
+            "success": False,
+            "stage": "linking",
+            "output": format_diagnostics(diagnostics),
+            "diagnostics": diagnostics
+        }
+
+    if compiled:
+        _prune_cache()
+
+    return {
+        "success": True,
+        "stage": "compilation",
+        "executable": exec_path,
+        "compiled": compiled,
+        "reused": reused,
+        "diagnostics": diagnostics
+    }
+
+def forget_project(project_id):
+    """Drop dependency records for a deleted project"""
+    with _dependencies_lock:
+        for key in [key for key in _dependencies if key[0] == project_id]:
+            del _dependencies[key]
+
+def _object_path(name, source, deps, files):
+    """Cache path for a unit's object, keyed by its source and the current content of the project files it includes"""
+    digest = hashlib.sha256()
+    for part in [" ".join(COMPILE_FLAGS), name, source]:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    for dep in sorted(deps):
+        digest.update(dep.encode('utf-8'))
+        digest.update(b'\0')
+        # A removed file changes the key too, forcing a recompile that reports the error
+        digest.update(files.get(dep, '\0missing').encode('utf-8'))
+        digest.update(b'\0')
+    return os.path.join(BUILD_CACHE_DIR, digest.hexdigest() + ".o")
+
+def _checkout_object(object_path, work_object):
+    """
+    Hard-link a cached object into the build directory (copied across filesystems)
+
+    The build links its own name for the object, so _prune_cache removing the
+    cached name in the meantime cannot pull it out from under the linker.
+
+    Returns:
+        False if the object is not in the cache
+    """
+    try:
+        os.link(object_path, work_object)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            shutil.copyfile(object_path, work_object)
+        except FileNotFoundError:
+            return False
+    try:
+        os.utime(object_path)  # Keeps recently used objects out of pruning
+    except OSError:
+        pass
+    return True
+
+def _store_object(work_object, object_path):
+    """Publish a freshly compiled object to the cache, leaving the build's own copy in place"""
+    temp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}"
+    try:
+        os.link(work_object, temp_path)
+    except OSError:
+        shutil.copyfile(work_object, temp_path)
+    os.replace(temp_path, object_path)
+
+def _diagnostics_path(object_path):
+    return object_path[:-2] + ".json"
+
+def _save_diagnostics(object_path, diagnostics):
+    """Keep a unit's warnings next to its cached object, so reusing the object still reports them"""
+    packed = pack_diagnostics(diagnostics)
+    if packed is None:
+        return
+    temp_path = f"{_diagnostics_path(object_path)}.{os.getpid()}.{threading.get_ident()}"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(packed)
+    os.replace(temp_path, _diagnostics_path(object_path))
+
+def _load_diagnostics(object_path):
+    try:
+        with open(_diagnostics_path(object_path), 'r', encoding='utf-8') as f:
+            return unpack_diagnostics(f.read())
+    except (OSError, ValueError):
+        return []
+
+def _parse_dep_file(path):
+    """Parse a gcc -MMD dependency file into a list of prerequisite file names"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return []
+
+    _, _, prerequisites = content.replace('\\\n', ' ').partition(':')
+    return [os.path.normpath(dep) for dep in prerequisites.split()]
+
+def _prune_cache():
+    """Delete the least recently used objects once the cache exceeds its size limit"""
+    try:
+        entries = [entry for entry in os.scandir(BUILD_CACHE_DIR) if entry.name.endswith('.o')]
+    except OSError:
+        return
+
+    excess = len(entries) - BUILD_CACHE_MAX_OBJECTS
+    if excess <= 0:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:excess]:
+        for path in [entry.path, _diagnostics_path(entry.path)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
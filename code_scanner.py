@@ -0,0 +1,121 @@
+# code_scanner.py
+import re
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+# Library calls that could be used maliciously, with the reason they are blocked
+DANGEROUS_CALLS = {
+    'system': 'executes shell commands',
+    'popen': 'creates processes',
+    'fopen': 'file operations could write to the filesystem',
+    'fwrite': 'file write operation',
+    'fprintf': 'file write operation',
+    'execl': 'exec family of functions',
+    'execle': 'exec family of functions',
+    'execlp': 'exec family of functions',
+    'execv': 'exec family of functions',
+    'execve': 'exec family of functions',
+    'execvp': 'exec family of functions',
+    'execvpe': 'exec family of functions',
+    'fork': 'process creation',
+    'unlink': 'file deletion',
+    'remove': 'file deletion',
+    'rename': 'file renaming',
+    'mkdir': 'directory creation',
+    'rmdir': 'directory removal',
+}
+
+# Calls that read from stdin, i.e. the program probably needs input
+INPUT_CALLS = frozenset(['scanf', 'gets', 'fgets', 'getchar', 'getc', 'read', 'fscanf'])
+
+# gcc -std=c11 honours trigraphs, so they must be decoded before scanning
+TRIGRAPHS = {
+    '??=': '#', '??(': '[', '??/': '\\', '??)': ']', "??'": '^',
+    '??<': '{', '??!': '|', '??>': '}', '??-': '~',
+}
+
+# One alternation, scanned once: comments and literals are consumed whole so
+# names inside them never count as calls
+TOKEN_PATTERN = re.compile(r"""
+      (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<literal>"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?)
+    | (?P<call>\b[A-Za-z_]\w*)(?=\s*\()
+    | [A-Za-z_]\w*
+""", re.DOTALL | re.VERBOSE)
+
+ScanResult = namedtuple('ScanResult', ['dangerous_call', 'line', 'calls'])
+ScanResult.__doc__ = """Outcome of scanning one source: first blocked call and its line (or None), and all called names"""
+
+SCAN_CACHE_SIZE = 1024
+_scan_cache = OrderedDict()
+_scan_cache_lock = threading.Lock()
+
+def scan_code(code):
+    """
+    Scan C source for blocked library calls and collect every called name.
+    Verdicts are cached by source hash, so repeated checks of the same
+    submission (run, memory analysis, test cases) cost a dictionary lookup.
+
+    Args:
+        code: C source code
+
+    Returns:
+        ScanResult
+    """
+    digest = hashlib.sha256(code.encode('utf-8')).digest()
+    with _scan_cache_lock:
+        if digest in _scan_cache:
+            _scan_cache.move_to_end(digest)
+            return _scan_cache[digest]
+
+    result = _scan(code)
+
+    with _scan_cache_lock:
+        _scan_cache[digest] = result
+        if len(_scan_cache) > SCAN_CACHE_SIZE:
+            _scan_cache.popitem(last=False)
+    return result
+
+def _scan(code):
+    source, splices = _normalize(code)
+
+    calls = set()
+    dangerous_call = None
+    line = None
+
+    for match in TOKEN_PATTERN.finditer(source):
+        name = match.group('call')
+        if not name:
+            continue
+        calls.add(name)
+        if dangerous_call is None and name in DANGEROUS_CALLS:
+            dangerous_call = name
+            position = match.start('call')
+            # Line in the original text: newlines before the call, plus spliced-out ones
+            line = source.count('\n', 0, position) + bisect.bisect_right(splices, position) + 1
+
+    return ScanResult(dangerous_call, line, frozenset(calls))
+
+def _normalize(code):
+    """
+    Apply the translation phases that precede tokenization in the compiler
+    (trigraphs and backslash-newline splicing), so e.g. `sys\\<newline>tem(`
+    is seen as one name.
+
+    Returns:
+        Tuple of (normalized source, sorted offsets in it where a line was spliced)
+    """
+    code = code.replace('\r\n', '\n')
+    if '??' in code:
+        for trigraph, replacement in TRIGRAPHS.items():
+            code = code.replace(trigraph, replacement)
+
+    parts = code.split('\\\n')
+    splices = []
+    offset = 0
+    for part in parts[:-1]:
+        offset += len(part)
+        splices.append(offset)
+    return ''.join(parts), splices
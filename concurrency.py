@@ -0,0 +1,58 @@
+# concurrency.py
+"""
+Server concurrency model: OS threads (the default, for development) or a
+cooperative eventlet/gevent worker for production.
+
+With a cooperative worker every connection is a green thread, so anything
+that blocks the OS thread blocks every user at once. patch_standard_library()
+makes sockets, pipes, subprocesses, locks and sleeps yield to the event loop
+instead; CPU-bound calls into C extensions go through offload().
+"""
+import os
+
+# threading, eventlet or gevent
+ASYNC_MODE = os.getenv("ASYNC_MODE", "threading")
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+if ASYNC_MODE not in ASYNC_MODES:
+    raise ValueError(f"ASYNC_MODE must be one of {', '.join(ASYNC_MODES)}, not {ASYNC_MODE!r}")
+
+def cooperative():
+    """True if requests run on green threads rather than OS threads"""
+    return ASYNC_MODE != 'threading'
+
+def patch_standard_library():
+    """
+    Make blocking standard library calls cooperative (no-op in threading mode)
+
+    Must run before anything else imports socket, threading, subprocess or
+    time, i.e. first thing in the entry point. Safe to call again, e.g. when
+    gunicorn's eventlet or gevent worker has already patched.
+    """
+    if ASYNC_MODE == 'eventlet':
+        import eventlet
+        if not eventlet.patcher.is_monkey_patched('socket'):
+            eventlet.monkey_patch()
+    elif ASYNC_MODE == 'gevent':
+        from gevent import monkey
+        if not monkey.is_module_patched('socket'):
+            monkey.patch_all()
+
+def offload(fn, *args, **kwargs):
+    """
+    Call fn on a real OS thread and wait for it without blocking other green threads
+
+    For C extensions that hold the CPU without yielding (bcrypt, for one).
+    In threading mode fn is simply called, the caller already is an OS thread.
+
+    Returns:
+        fn's return value (its exceptions are re-raised)
+    """
+    if ASYNC_MODE == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
+    if ASYNC_MODE == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+    return fn(*args, **kwargs)
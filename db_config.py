@@ -0,0 +1,117 @@
+# db_config.py
+import os
+import time
+import sqlite3
+import threading
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Connection wait statistics, shared by every TimedQueuePool (they survive pool.recreate())
+_wait_lock = threading.Lock()
+_wait_stats = {
+    'checkouts': 0,
+    'timeouts': 0,
+    'wait_seconds_total': 0.0,
+    'wait_seconds_max': 0.0,
+}
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection"""
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _wait_lock:
+                _wait_stats['checkouts'] += 1
+                _wait_stats['timeouts'] += int(timed_out)
+                _wait_stats['wait_seconds_total'] += waited
+                _wait_stats['wait_seconds_max'] = max(_wait_stats['wait_seconds_max'], waited)
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ['1', 'true', 'yes', 'on']
+
+def engine_options(database_uri):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured database
+
+    Args:
+        database_uri: SQLAlchemy database URI
+
+    Returns:
+        Dictionary of engine options
+    """
+    if database_uri.startswith('sqlite'):
+        # In-memory databases exist per connection, keep Flask-SQLAlchemy's defaults
+        if database_uri in ['sqlite://', 'sqlite:///:memory:']:
+            return {}
+
+        # SQLite allows one writer at a time; a small pool plus a busy timeout makes
+        # concurrent writers wait for the lock instead of failing with "database is locked"
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': int(os.getenv("DB_POOL_SIZE", "5")),
+            'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            'pool_timeout': float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            'connect_args': {
+                'timeout': sqlite_busy_timeout(),
+                'check_same_thread': False,  # Pooled connections move between threads
+            },
+        }
+
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv("DB_POOL_SIZE", "10")),
+        'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        'pool_timeout': float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        'pool_pre_ping': _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+
+def sqlite_busy_timeout():
+    """Seconds a SQLite connection waits for a lock before raising"""
+    return float(os.getenv("SQLITE_BUSY_TIMEOUT", "15"))
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers proceed during writes; NORMAL sync is safe with WAL and much faster"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(sqlite_busy_timeout() * 1000)}")
+    cursor.close()
+
+def pool_stats(engine):
+    """
+    Get connection pool utilization
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Dictionary with pool size, checked-out and overflow connections and checkout wait times
+    """
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+
+    with _wait_lock:
+        stats.update(_wait_stats)
+    stats['wait_seconds_avg'] = stats['wait_seconds_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+    return stats
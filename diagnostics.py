@@ -0,0 +1,307 @@
+# diagnostics.py
+import os
+import json
+import signal
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from doc_sync import revision_of
+from metrics import metrics
+
+# Seconds without edits before a project's document is checked
+DIAGNOSTICS_DELAY = float(os.getenv("DIAGNOSTICS_DELAY", "0.6"))
+
+# Wall-clock limit for one syntax check
+DIAGNOSTICS_TIMEOUT = float(os.getenv("DIAGNOSTICS_TIMEOUT", "5"))
+
+# Syntax checks allowed to run at once across all projects
+DIAGNOSTICS_MAX_CONCURRENT = int(os.getenv("DIAGNOSTICS_MAX_CONCURRENT", "4"))
+
+# Checked sources whose diagnostics are kept, so undo / redo is instant
+DIAGNOSTICS_CACHE_SIZE = int(os.getenv("DIAGNOSTICS_CACHE_SIZE", "256"))
+
+# gcc prints its diagnostics as one JSON array per compilation (GCC 9+)
+DIAGNOSTICS_FORMAT_FLAGS = ["-fdiagnostics-format=json"]
+
+SYNTAX_CHECK_COMMAND = [
+    "gcc",
+    "-fsyntax-only",
+    "-std=c11",
+    "-Wall",
+    "-fmax-errors=50",
+    "-x", "c",
+    "-",  # Source on stdin
+] + DIAGNOSTICS_FORMAT_FLAGS
+
+# The file name gcc reports for a source read from stdin
+STDIN_FILE = "<stdin>"
+
+def parse_diagnostics(stderr):
+    """
+    Parse the stderr of a gcc run with DIAGNOSTICS_FORMAT_FLAGS
+
+    Notes attached to a diagnostic follow it in the list. Lines that are not
+    gcc JSON (linker errors, for example) become diagnostics without a
+    location, so nothing the compiler driver printed is lost.
+
+    Returns:
+        List of {"file", "line", "column", "severity", "message"} (1-based
+        line and column, None when unknown), plus "fixits" when gcc suggests
+        edits: a list of {"line", "column", "end_line", "end_column", "text"}
+        replacing the range up to (but excluding) the end position with text
+    """
+    diagnostics = []
+    for line in stderr.splitlines():
+        if line.startswith('['):
+            try:
+                entries = json.loads(line)
+            except ValueError:
+                entries = None
+            if isinstance(entries, list):
+                for entry in entries:
+                    _flatten(entry, diagnostics)
+                continue
+        if line.strip():
+            diagnostics.append({'file': None, 'line': None, 'column': None, 'severity': 'error', 'message': line})
+    return diagnostics
+
+def _flatten(entry, diagnostics):
+    caret = next((location['caret'] for location in entry.get('locations', []) if 'caret' in location), {})
+    severity = entry.get('kind', 'error')
+    diagnostic = {
+        'file': caret.get('file'),
+        'line': caret.get('line'),
+        'column': caret.get('column'),
+        'severity': 'error' if severity == 'fatal error' else severity,
+        'message': entry.get('message', ''),
+    }
+    fixits = [
+        {
+            'line': fixit['start']['line'],
+            'column': fixit['start']['column'],
+            'end_line': fixit['next']['line'],
+            'end_column': fixit['next']['column'],
+            'text': fixit.get('string', ''),
+        }
+        for fixit in entry.get('fixits', [])
+        if 'start' in fixit and 'next' in fixit
+    ]
+    if fixits:
+        diagnostic['fixits'] = fixits
+    diagnostics.append(diagnostic)
+    for child in entry.get('children', []):
+        _flatten(child, diagnostics)
+
+def format_diagnostics(diagnostics):
+    """Render diagnostics as "file:line:column: severity: message" lines, for plain-text output"""
+    lines = []
+    for diagnostic in diagnostics:
+        if diagnostic['line'] is None:
+            lines.append(diagnostic['message'])
+        else:
+            lines.append(f"{diagnostic['file']}:{diagnostic['line']}:{diagnostic['column']}: "
+                         f"{diagnostic['severity']}: {diagnostic['message']}")
+    return "\n".join(lines)
+
+def pack_diagnostics(diagnostics):
+    """
+    Serialize diagnostics compactly for storage, as JSON arrays instead of objects
+
+    Returns:
+        JSON text, or None for an empty list
+    """
+    if not diagnostics:
+        return None
+    rows = []
+    for diagnostic in diagnostics:
+        row = [diagnostic['file'], diagnostic['line'], diagnostic['column'], diagnostic['severity'], diagnostic['message']]
+        if diagnostic.get('fixits'):
+            row.append([[fixit['line'], fixit['column'], fixit['end_line'], fixit['end_column'], fixit['text']]
+                        for fixit in diagnostic['fixits']])
+        rows.append(row)
+    return json.dumps(rows, separators=(',', ':'), ensure_ascii=False)
+
+def unpack_diagnostics(packed):
+    """Inverse of pack_diagnostics"""
+    diagnostics = []
+    for row in json.loads(packed) if packed else []:
+        diagnostic = dict(zip(('file', 'line', 'column', 'severity', 'message'), row))
+        if len(row) > 5:
+            diagnostic['fixits'] = [dict(zip(('line', 'column', 'end_line', 'end_column', 'text'), fixit))
+                                    for fixit in row[5]]
+        diagnostics.append(diagnostic)
+    return diagnostics
+
+class _ProjectState:
+    __slots__ = ('generation', 'timer', 'process')
+
+    def __init__(self):
+        self.generation = 0
+        self.timer = None
+        self.process = None
+
+class DiagnosticsScheduler:
+    """
+    Runs gcc -fsyntax-only on each project's shared document once edits settle
+
+    Checks are debounced per project, so a burst of edits from any number
+    of collaborators produces one check, and an edit arriving while a check
+    runs kills that check because its result would already be stale. Each
+    result is published with the revision it was computed for.
+    """
+    def __init__(self, get_source, publish, delay=DIAGNOSTICS_DELAY, timeout=DIAGNOSTICS_TIMEOUT,
+                 max_concurrent=DIAGNOSTICS_MAX_CONCURRENT, cache_size=DIAGNOSTICS_CACHE_SIZE):
+        """
+        Args:
+            get_source: Callable(project_id) returning the document text, or None
+            publish: Callable(project_id, payload) sending {"rev", "diagnostics"} to the project's clients
+        """
+        self.get_source = get_source
+        self.publish = publish
+        self.delay = delay
+        self.timeout = timeout
+        self.cache_size = cache_size
+
+        self.projects = {}  # Project ID -> _ProjectState
+        self.latest = {}    # Project ID -> last published payload
+        self.cache = OrderedDict()  # Revision -> diagnostics
+        self.counts = {'scheduled': 0, 'checks': 0, 'cancelled': 0, 'cache_hits': 0, 'timeouts': 0, 'published': 0}
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._work_dir = None
+        self._lock = threading.Lock()
+
+    def schedule(self, project_id):
+        """(Re)start the quiet period for a project, cancelling any check in flight"""
+        key = str(project_id)
+        with self._lock:
+            state = self.projects.setdefault(key, _ProjectState())
+            state.generation += 1
+            self.counts['scheduled'] += 1
+            if state.timer:
+                state.timer.cancel()
+            self._cancel_process(state)
+
+            state.timer = threading.Timer(self.delay, self._check, args=(key, state.generation))
+            state.timer.daemon = True
+            state.timer.start()
+
+    def latest_for(self, project_id, revision):
+        """The last published payload for a project, if it matches revision"""
+        payload = self.latest.get(str(project_id))
+        return payload if payload and payload['rev'] == revision else None
+
+    def forget(self, project_id):
+        key = str(project_id)
+        with self._lock:
+            state = self.projects.pop(key, None)
+            if state:
+                state.generation += 1
+                if state.timer:
+                    state.timer.cancel()
+                self._cancel_process(state)
+            self.latest.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, pending=sum(1 for state in self.projects.values() if state.timer or state.process))
+
+    def _check(self, key, generation):
+        with self._lock:
+            state = self.projects.get(key)
+            if state is None or state.generation != generation:
+                return
+            state.timer = None
+
+        source = self.get_source(key)
+        if source is None:
+            return
+        revision = revision_of(source)
+
+        with self._lock:
+            diagnostics = self.cache.get(revision)
+            if diagnostics is not None:
+                self.cache.move_to_end(revision)
+                self.counts['cache_hits'] += 1
+
+        if diagnostics is None:
+            with self._slots:
+                diagnostics = self._run_gcc(key, generation, source)
+            if diagnostics is None:
+                return  # Superseded or failed
+            with self._lock:
+                self.cache[revision] = diagnostics
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        with self._lock:
+            if state.generation != generation:
+                self.counts['cancelled'] += 1
+                return
+            self.counts['published'] += 1
+        payload = {'rev': revision, 'diagnostics': diagnostics}
+        self.latest[key] = payload
+        self.publish(key, payload)
+
+    def _run_gcc(self, key, generation, source):
+        with self._lock:
+            state = self.projects.get(key)
+            if state is None or state.generation != generation:
+                self.counts['cancelled'] += 1
+                return None
+            try:
+                process = subprocess.Popen(
+                    SYNTAX_CHECK_COMMAND,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    cwd=self._empty_dir(),  # Keeps #include "..." from reaching server files
+                    start_new_session=True  # So cancelling also kills cc1
+                )
+            except OSError as e:
+                logging.error(f"Could not start the syntax check: {e}")
+                return None
+            state.process = process
+            self.counts['checks'] += 1
+
+        try:
+            with metrics.span("diagnostics.check"):
+                _, stderr = process.communicate(source, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(process)
+            process.communicate()
+            with self._lock:
+                self.counts['timeouts'] += 1
+            return None
+        except (OSError, ValueError):
+            return None  # Killed by schedule() while we were writing its input
+        finally:
+            with self._lock:
+                if state.process is process:
+                    state.process = None
+
+        if process.returncode < 0:  # Killed by schedule()
+            with self._lock:
+                self.counts['cancelled'] += 1
+            return None
+        # Diagnostics inside included headers have no line in the document
+        return [diagnostic for diagnostic in parse_diagnostics(stderr) if diagnostic['file'] == STDIN_FILE]
+
+    def _cancel_process(self, state):
+        if state.process and state.process.poll() is None:
+            _kill_group(state.process)
+        state.process = None
+
+    def _empty_dir(self):
+        if self._work_dir is None:
+            self._work_dir = tempfile.mkdtemp(prefix="vcce-diagnostics-")
+        return self._work_dir
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
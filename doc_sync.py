@@ -0,0 +1,249 @@
+# doc_sync.py
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Serialized payloads at least this large (bytes) are sent as binary frames
+DOC_BINARY_THRESHOLD = int(os.getenv("DOC_BINARY_THRESHOLD", "1024"))
+
+# zlib level for binary frames sent to clients that accept deflate
+DOC_COMPRESSION_LEVEL = int(os.getenv("DOC_COMPRESSION_LEVEL", "6"))
+
+# Recent revisions kept per project, to send reconnecting clients a patch
+DOC_REVISION_HISTORY = int(os.getenv("DOC_REVISION_HISTORY", "16"))
+
+# Binary frame encodings a client can list in its "accept" value
+ENCODINGS = frozenset({'json', 'deflate'})
+
+def revision_of(text):
+    """Revision hash of a document's text"""
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+def make_patch(old, new):
+    """
+    Find the single splice that turns old into new
+
+    Returns:
+        Tuple of (start, end, text): replace old[start:end] with text
+    """
+    limit = min(len(old), len(new))
+    prefix = _common_length(old, new, limit, lambda s, n: s[:n])
+    limit -= prefix
+    suffix = _common_length(old, new, limit, lambda s, n: s[len(s) - n:])
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+def apply_patch(text, patch):
+    """Apply a document_patch payload to text"""
+    return text[:patch['start']] + patch['text'] + text[patch['end']:]
+
+def _common_length(a, b, limit, cut):
+    # Binary search over slice comparisons, which run at memcmp speed
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if cut(a, middle) == cut(b, middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def parse_accept(value):
+    """Binary encodings listed in a client's comma-separated "accept" value"""
+    if isinstance(value, str):
+        value = value.split(',')
+    return frozenset(name.strip() for name in value or () if isinstance(name, str)) & ENCODINGS
+
+def encode_payload(payload, accept):
+    """
+    Serialize a payload for the wire
+
+    Small payloads, and any payload for clients that accept no binary
+    encoding, are returned as they are and go out as JSON text frames.
+    Larger ones become {"encoding", "data"} with the JSON as UTF-8 bytes,
+    which Socket.IO sends as a binary attachment, zlib-compressed if the
+    client accepts deflate and that makes it smaller.
+
+    Args:
+        payload: JSON-serializable dictionary
+        accept: Set of encodings the client accepts (see parse_accept)
+
+    Returns:
+        Tuple of (payload to emit, approximate bytes on the wire)
+    """
+    text = json.dumps(payload, separators=(',', ':'))
+    if len(text) < DOC_BINARY_THRESHOLD or not accept:
+        return payload, len(text)
+
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8', 'surrogatepass')
+    encoding = 'json'
+    if 'deflate' in accept:
+        compressed = zlib.compress(data, DOC_COMPRESSION_LEVEL)
+        if len(compressed) < len(data):
+            data, encoding = compressed, 'deflate'
+    return {'encoding': encoding, 'data': data}, len(data)
+
+def decode_payload(payload):
+    """Inverse of encode_payload, for Python clients"""
+    if not isinstance(payload, dict) or 'encoding' not in payload:
+        return payload
+    data = payload['data']
+    if payload['encoding'] == 'deflate':
+        data = zlib.decompress(data)
+    return json.loads(data.decode('utf-8', 'surrogatepass'))
+
+class RevisionLog:
+    """The most recent revisions of each project's document, oldest first"""
+    def __init__(self, size=DOC_REVISION_HISTORY):
+        self.size = size
+        self.projects = {}
+        self._lock = threading.Lock()
+
+    def revision(self, project_id, text):
+        """Revision hash of a project's current text, recording it if it is new"""
+        with self._lock:
+            history = self.projects.setdefault(str(project_id), OrderedDict())
+            if history:
+                latest_revision, latest_text = next(reversed(history.items()))
+                if latest_text is text or latest_text == text:
+                    return latest_revision
+
+            revision = revision_of(text)
+            history[revision] = text
+            history.move_to_end(revision)
+            while len(history) > self.size:
+                history.popitem(last=False)
+            return revision
+
+    def text_at(self, project_id, revision):
+        """Text of a recent revision, or None if it is unknown or too old"""
+        with self._lock:
+            return self.projects.get(str(project_id), {}).get(revision)
+
+    def forget(self, project_id):
+        with self._lock:
+            self.projects.pop(str(project_id), None)
+
+class DocumentSync:
+    """
+    Builds the messages that keep clients' copies of a document current
+
+    Clients hold the revision hash of the text they last received. Edits go
+    out as document_patch events ({"base", "rev", "start", "end", "text"}).
+    A client that (re)joins or asks for a sync with its revision gets
+    document_synced ({"rev"}) if that is current, a patch if it is a known
+    recent revision, and a full document snapshot ({"text", "rev"})
+    otherwise. Counters compare the bytes sent against what full JSON
+    snapshots would have cost.
+    """
+    COUNTERS = {'document': 'snapshots', 'document_patch': 'patches', 'document_synced': 'up_to_date'}
+
+    def __init__(self, log=None, cache_size=32):
+        self.log = log or RevisionLog()
+        self.counts = {'snapshots': 0, 'patches': 0, 'up_to_date': 0, 'binary_frames': 0, 'compressed_frames': 0}
+        self.snapshot_bytes = 0  # What the same messages as full JSON snapshots would have cost
+        self.sent_bytes = 0
+        self.cache_size = cache_size
+        self._encoded = OrderedDict()         # (event, base, rev, accept) -> (binary payload, size)
+        self._snapshot_sizes = OrderedDict()  # rev -> size of its full JSON snapshot
+        self._lock = threading.Lock()
+
+    def snapshot(self, project_id, text):
+        return {'text': text, 'rev': self.log.revision(project_id, text)}
+
+    def edit_patch(self, project_id, old_text, new_text):
+        """Patch payload taking clients from old_text to new_text"""
+        start, end, text = make_patch(old_text, new_text)
+        return {
+            'base': self.log.revision(project_id, old_text),
+            'rev': self.log.revision(project_id, new_text),
+            'start': start,
+            'end': end,
+            'text': text,
+        }
+
+    def catch_up(self, project_id, text, client_revision=None):
+        """
+        The message that brings a client at client_revision up to date
+
+        Returns:
+            Tuple of (event, payload): ("document_synced", {"rev"}) if the
+            client already has text, ("document_patch", patch) from a known
+            recent revision, or ("document", snapshot)
+        """
+        revision = self.log.revision(project_id, text)
+        if client_revision == revision:
+            return 'document_synced', {'rev': revision}
+
+        old_text = self.log.text_at(project_id, client_revision) if client_revision else None
+        if old_text is None:
+            return 'document', {'text': text, 'rev': revision}
+
+        start, end, patch_text = make_patch(old_text, text)
+        return 'document_patch', {'base': client_revision, 'rev': revision, 'start': start, 'end': end, 'text': patch_text}
+
+    def encode(self, event, payload, text, accept, recipients=1):
+        """
+        encode_payload() plus bookkeeping for sending payload to recipients
+
+        Binary encodings are cached by revision, so a burst of clients
+        reconnecting to the same document serializes and compresses it once.
+
+        Args:
+            event: "document", "document_patch" or "document_synced"
+            payload: The payload from catch_up() or edit_patch()
+            text: The full document text after this message
+            accept: Encodings the recipients accept
+            recipients: Number of clients this encoding is sent to
+
+        Returns:
+            The payload to emit
+        """
+        key = (event, payload.get('base'), payload['rev'], accept)
+        with self._lock:
+            cached = self._encoded.get(key)
+            if cached:
+                self._encoded.move_to_end(key)
+        if cached:
+            encoded, size = cached
+        else:
+            encoded, size = encode_payload(payload, accept)
+            if encoded is not payload:
+                with self._lock:
+                    self._encoded[key] = (encoded, size)
+                    while len(self._encoded) > self.cache_size:
+                        self._encoded.popitem(last=False)
+
+        snapshot_size = self._snapshot_size(payload['rev'], text)
+        with self._lock:
+            self.counts[self.COUNTERS[event]] += recipients
+            if encoded is not payload:
+                self.counts['binary_frames'] += recipients
+                if encoded['encoding'] == 'deflate':
+                    self.counts['compressed_frames'] += recipients
+            self.snapshot_bytes += snapshot_size * recipients
+            self.sent_bytes += size * recipients
+        return encoded
+
+    def _snapshot_size(self, revision, text):
+        # What the server used to send for every change and sync
+        with self._lock:
+            size = self._snapshot_sizes.get(revision)
+        if size is None:
+            size = len(json.dumps({'text': text}))
+            with self._lock:
+                self._snapshot_sizes[revision] = size
+                while len(self._snapshot_sizes) > self.cache_size * 8:
+                    self._snapshot_sizes.popitem(last=False)
+        return size
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts, snapshot_bytes=self.snapshot_bytes, sent_bytes=self.sent_bytes)
+        stats['saved_bytes'] = stats['snapshot_bytes'] - stats['sent_bytes']
+        stats['saved_ratio'] = round(stats['saved_bytes'] / stats['snapshot_bytes'], 4) if stats['snapshot_bytes'] else 0.0
+        return stats
+
+doc_sync = DocumentSync()
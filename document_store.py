@@ -0,0 +1,223 @@
+# document_store.py
+import os
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+# Memory budget for resident document text, in megabytes
+DOC_MEMORY_BUDGET_MB = float(os.getenv("DOC_MEMORY_BUDGET_MB", "64"))
+
+# Seconds a document with no connected clients stays in memory after its last use
+DOC_IDLE_TIMEOUT = float(os.getenv("DOC_IDLE_TIMEOUT", "600"))
+
+# Minimum seconds between idle sweeps (sweeps run inline on access)
+DOC_SWEEP_INTERVAL = float(os.getenv("DOC_SWEEP_INTERVAL", "60"))
+
+class _Entry:
+    __slots__ = ('text', 'size', 'dirty', 'last_used')
+
+    def __init__(self, text, dirty):
+        self.text = text
+        self.size = sys.getsizeof(text)
+        self.dirty = dirty
+        self.last_used = time.monotonic()
+
+class DocumentStore:
+    """
+    Live document text of the projects being edited, kept in least recently
+    used order and bounded by a memory budget and an idle timeout
+
+    Documents whose project has no connected clients are evicted once they
+    have been idle for idle_timeout seconds, or least recently used first
+    while resident text exceeds the budget. Edited (dirty) text is written
+    back with save() before a document is dropped. Documents that clients
+    are connected to are never evicted, so the budget is a target rather
+    than a hard limit.
+
+    Supports the dictionary operations the Socket.IO handlers use: in, [],
+    []=, get, pop and len. Project IDs are normalized to strings, so "1"
+    from a query string and 1 from an event refer to the same document.
+    """
+    def __init__(self, load, save, open_projects, memory_budget=DOC_MEMORY_BUDGET_MB * 1024 * 1024,
+                 idle_timeout=DOC_IDLE_TIMEOUT, sweep_interval=DOC_SWEEP_INTERVAL, on_evict=None):
+        """
+        Args:
+            load: Callable(project_id) returning the stored text, or None if the project does not exist
+            save: Callable(project_id, text) writing edited text back to the database
+            open_projects: Callable returning the set of project IDs (as strings) with connected clients
+            memory_budget: Target for resident text, in bytes
+            idle_timeout: Seconds before an unused document without clients is evicted
+            sweep_interval: Minimum seconds between idle sweeps
+            on_evict: Optional callable(project_id) run after a document is dropped
+        """
+        self.load_text = load
+        self.save_text = save
+        self.open_projects = open_projects
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+
+        self.documents = OrderedDict()  # Project ID -> _Entry, least recently used first
+        self.bytes = 0
+        self.loads = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+
+    def __contains__(self, project_id):
+        return str(project_id) in self.documents
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __getitem__(self, project_id):
+        key = str(project_id)
+        with self._lock:
+            entry = self.documents[key]
+            entry.last_used = time.monotonic()
+            self.documents.move_to_end(key)
+            return entry.text
+
+    def get(self, project_id, default=None):
+        try:
+            return self[project_id]
+        except KeyError:
+            return default
+
+    def __setitem__(self, project_id, text):
+        """Store edited text; it is written back before the document is evicted"""
+        self._put(str(project_id), text, dirty=True)
+        self.maintain()
+
+    def pop(self, project_id, default=None):
+        """Drop a document without writing it back (e.g. its project was deleted)"""
+        key = str(project_id)
+        with self._lock:
+            entry = self.documents.pop(key, None)
+            if entry is None:
+                return default
+            self.bytes -= entry.size
+        if self.on_evict:
+            self.on_evict(key)
+        return entry.text
+
+    def load(self, project_id):
+        """
+        Get a document, loading it if it is not resident
+
+        Returns:
+            The text, or None if the project does not exist
+        """
+        key = str(project_id)
+        with self._lock:
+            if key in self.documents:
+                return self[key]
+
+        text = self.load_text(project_id)
+        if text is None:
+            return None
+        with self._lock:
+            if key in self.documents:  # Loaded (or edited) by another thread meanwhile
+                return self[key]
+            self._put(key, text, dirty=False)
+            self.loads += 1
+        self.maintain()
+        return text
+
+    def mark_saved(self, project_id, text):
+        """Record that text has been written to the database by the caller"""
+        with self._lock:
+            entry = self.documents.get(str(project_id))
+            if entry is not None and entry.text is text:
+                entry.dirty = False
+
+    def flush(self, project_id=None):
+        """Write back dirty text, for one project or all of them"""
+        with self._lock:
+            keys = [str(project_id)] if project_id is not None else list(self.documents)
+            pending = [(key, self.documents[key].text) for key in keys
+                       if key in self.documents and self.documents[key].dirty]
+        for key, text in pending:
+            self._save(key, text)
+
+    def maintain(self):
+        """Evict idle documents (at most every sweep_interval) and enforce the memory budget"""
+        now = time.monotonic()
+        sweep = now - self._last_sweep >= self.sweep_interval
+        if not sweep and self.bytes <= self.memory_budget:
+            return
+        if sweep:
+            self._last_sweep = now
+
+        with self._lock:
+            open_projects = {str(project_id) for project_id in self.open_projects()}
+            candidates = [(key, entry) for key, entry in self.documents.items() if key not in open_projects]
+            victims = []
+            excess = self.bytes - self.memory_budget
+            for key, entry in candidates:  # Least recently used first
+                if excess > 0 or (sweep and now - entry.last_used >= self.idle_timeout):
+                    victims.append((key, entry.text, entry.dirty))
+                    excess -= entry.size
+
+        for key, text, dirty in victims:
+            self._evict(key, text, dirty)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'resident_documents': len(self.documents),
+                'resident_bytes': self.bytes,
+                'dirty_documents': sum(1 for entry in self.documents.values() if entry.dirty),
+                'memory_budget_bytes': int(self.memory_budget),
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'flushes': self.flushes,
+                'flush_failures': self.flush_failures,
+            }
+
+    def _put(self, key, text, dirty):
+        with self._lock:
+            entry = self.documents.get(key)
+            if entry is not None:
+                self.bytes -= entry.size
+            entry = _Entry(text, dirty)
+            self.documents[key] = entry
+            self.documents.move_to_end(key)
+            self.bytes += entry.size
+
+    def _evict(self, key, text, dirty):
+        # Write back outside the lock, then drop the entry only if nobody
+        # edited it or reconnected to the project in the meantime
+        if dirty and not self._save(key, text):
+            return
+        with self._lock:
+            entry = self.documents.get(key)
+            if entry is None or entry.text is not text:
+                return
+            if key in {str(project_id) for project_id in self.open_projects()}:
+                return
+            del self.documents[key]
+            self.bytes -= entry.size
+            self.evictions += 1
+        if self.on_evict:
+            self.on_evict(key)
+
+    def _save(self, key, text):
+        try:
+            self.save_text(key, text)
+        except Exception as e:
+            with self._lock:
+                self.flush_failures += 1
+            logging.error(f"Failed to write back document for project {key}: {e}")
+            return False
+        with self._lock:
+            self.flushes += 1
+            entry = self.documents.get(key)
+            if entry is not None and entry.text is text:
+                entry.dirty = False
+        return True
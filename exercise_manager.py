@@ -1,7 +1,84 @@
 # exercise_manager.py
+import os
 import json
+import time
+import threading
 from datetime import datetime
 from models import db, Exercise, ExerciseProgress, User
+from search import index_exercise, remove_from_search
+
+# Exercises change only when an admin edits them, so reads are served from an
+# in-process cache. Every write bumps the version; the TTL bounds staleness when
+# several worker processes each hold their own copy.
+EXERCISE_CACHE_TTL = float(os.getenv("EXERCISE_CACHE_TTL", "60"))
+
+_cache_lock = threading.Lock()
+_exercise_cache = {
+    'version': 0,
+    'loaded_version': None,
+    'loaded_at': 0.0,
+    'updated_at': datetime.utcnow(),
+    'exercises': [],
+    'by_id': {},
+}
+
+class CachedExercise:
+    """Read-only, session-independent copy of an Exercise row"""
+    FIELDS = ('id', 'title', 'description', 'difficulty', 'category',
+              'initial_code', 'solution_code', 'test_cases')
+    __slots__ = FIELDS + ('test_case_list',)
+
+    def __init__(self, exercise):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(exercise, field))
+        # Parsed once per cache load instead of on every submission
+        self.test_case_list = json.loads(exercise.test_cases)
+
+    def __repr__(self):
+        return f"CachedExercise('{self.title}', difficulty: {self.difficulty})"
+
+def invalidate_exercise_cache():
+    """Discard cached exercises after any write to the Exercise table"""
+    with _cache_lock:
+        _exercise_cache['version'] += 1
+        _exercise_cache['updated_at'] = datetime.utcnow()
+
+def exercise_cache_version():
+    """
+    Get the cache version and the time of the last exercise change
+
+    Returns:
+        Tuple of (version, updated_at)
+    """
+    _load_exercises()
+    return _exercise_cache['version'], _exercise_cache['updated_at']
+
+def _load_exercises():
+    with _cache_lock:
+        fresh = (
+            _exercise_cache['loaded_version'] == _exercise_cache['version'] and
+            time.monotonic() - _exercise_cache['loaded_at'] < EXERCISE_CACHE_TTL
+        )
+        if fresh:
+            return _exercise_cache['exercises'], _exercise_cache['by_id']
+
+        exercises = [CachedExercise(exercise) for exercise in Exercise.query.order_by(Exercise.id).all()]
+
+        # A TTL reload that finds different rows means another worker process
+        # changed them; bump the version so ETags derived from it change too
+        previously_loaded = _exercise_cache['loaded_version'] == _exercise_cache['version']
+        if previously_loaded and _snapshot(exercises) != _snapshot(_exercise_cache['exercises']):
+            _exercise_cache['version'] += 1
+            _exercise_cache['updated_at'] = datetime.utcnow()
+
+        _exercise_cache['exercises'] = exercises
+        _exercise_cache['by_id'] = {exercise.id: exercise for exercise in exercises}
+        _exercise_cache['loaded_version'] = _exercise_cache['version']
+        _exercise_cache['loaded_at'] = time.monotonic()
+        return exercises, _exercise_cache['by_id']
+
+def _snapshot(exercises):
+    return [tuple(getattr(exercise, field) for field in CachedExercise.FIELDS) for exercise in exercises]
 
 def create_exercise(title, description, difficulty, category, initial_code, solution_code, test_cases):
     """
@@ -37,30 +114,85 @@ def create_exercise(title, description, difficulty, category, initial_code, solu
     )
     
     db.session.add(exercise)
+    db.session.flush()
+    index_exercise(exercise)
     db.session.commit()
+    invalidate_exercise_cache()
     
     return exercise
 
+def update_exercise(exercise_id, title, description, difficulty, category, initial_code, solution_code, test_cases):
+    """
+    Update an existing exercise
+    
+    Args:
+        exercise_id: Exercise ID
+        (remaining arguments as for create_exercise)
+    
+    Returns:
+        The updated Exercise object, or None if not found
+    """
+    exercise = Exercise.query.get(exercise_id)
+    if not exercise:
+        return None
+    
+    exercise.title = title
+    exercise.description = description
+    exercise.difficulty = difficulty
+    exercise.category = category
+    exercise.initial_code = initial_code
+    exercise.solution_code = solution_code
+    exercise.test_cases = json.dumps(test_cases)
+    
+    index_exercise(exercise)
+    db.session.commit()
+    invalidate_exercise_cache()
+    
+    return exercise
+
+def delete_exercise(exercise_id):
+    """
+    Delete an exercise
+    
+    Args:
+        exercise_id: Exercise ID
+    
+    Returns:
+        True if the exercise was deleted, False if not found
+    """
+    exercise = Exercise.query.get(exercise_id)
+    if not exercise:
+        return False
+    
+    remove_from_search('exercise', exercise_id)
+    db.session.delete(exercise)
+    db.session.commit()
+    invalidate_exercise_cache()
+    
+    return True
+
 def get_all_exercises():
     """
-    Get all exercises
+    Get all exercises (cached)
     
     Returns:
-        List of Exercise objects
+        List of CachedExercise objects, ordered by ID
     """
-    return Exercise.query.all()
+    exercises, _ = _load_exercises()
+    return exercises
 
 def get_exercise_by_id(exercise_id):
     """
-    Get exercise by ID
+    Get exercise by ID (cached)
     
     Args:
         exercise_id: Exercise ID
     
     Returns:
-        Exercise object or None if not found
+        CachedExercise object or None if not found
     """
-    return Exercise.query.get(exercise_id)
+    _, by_id = _load_exercises()
+    return by_id.get(exercise_id)
 
 def get_exercises_by_difficulty(difficulty):
     """
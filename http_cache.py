@@ -0,0 +1,89 @@
+# http_cache.py
+import os
+import gzip
+from datetime import timezone
+from flask import request, make_response
+from metrics import metrics
+
+# Responses smaller than this are sent uncompressed; gzip would save little and cost a round of CPU
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# gzip level for compressed responses (1 = fastest, 9 = smallest)
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'image/svg+xml'}
+
+# Appended to a strong ETag when the body is gzip-encoded, since the bytes differ from the identity encoding
+GZIP_ETAG_SUFFIX = "-gzip"
+
+def conditional_response(etag, last_modified=None, render=None, cache_control='private, no-cache'):
+    """
+    Build a response validated by ETag / Last-Modified
+
+    If the client's cached copy is still current, a 304 is returned without
+    calling render(), so revalidation skips the queries and templating.
+
+    Args:
+        etag: Strong validator for the current representation
+        last_modified: Optional naive UTC datetime of the last change
+        render: Callable producing the response body (or a response)
+        cache_control: Cache-Control header; the default makes browsers revalidate every time
+
+    Returns:
+        Flask response
+    """
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232, section 6)
+    if request.if_none_match:
+        not_modified = (request.if_none_match.contains(etag)
+                        or request.if_none_match.contains(etag + GZIP_ETAG_SUFFIX))
+    elif request.if_modified_since and last_modified is not None:
+        not_modified = last_modified <= request.if_modified_since
+    else:
+        not_modified = False
+
+    response = make_response('', 304) if not_modified else make_response(render())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def compress_response(response):
+    """
+    after_request hook: gzip text and JSON bodies of at least COMPRESS_MIN_SIZE
+    bytes for clients that accept it
+
+    Streamed, file and already-encoded responses pass through untouched. A
+    strong ETag gets GZIP_ETAG_SUFFIX, so the encoded bytes have their own
+    validator; conditional_response() accepts either form.
+    """
+    if response.status_code == 304:
+        # Answer with the validator the client holds, i.e. the gzip variant's if that is what it cached
+        etag, weak = response.get_etag()
+        if etag and not weak and request.if_none_match.contains(etag + GZIP_ETAG_SUFFIX):
+            response.set_etag(etag + GZIP_ETAG_SUFFIX)
+        return response
+
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not request.accept_encodings['gzip']
+            or not (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_TYPES)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    with metrics.span("http.compress"):
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + GZIP_ETAG_SUFFIX)
+    return response
@@ -0,0 +1,668 @@
+# loadtest.py
+"""
+Load generator for the collaborative editing path.
+
+Starts the server on a free local port with a throwaway SQLite database,
+seeds N projects with M typists each, and drives connect / join_project /
+edit / cursor_move over Socket.IO with human-like typing traces. Reports edit
+round-trip latency percentiles, document delivery, message and byte rates and
+server CPU as JSON.
+
+Usage:
+    python loadtest.py --projects 5 --typists 4 --duration 30 --output report.json
+    python loadtest.py --output new.json --compare report.json   # Fails on regressions
+    python loadtest.py --slow-run 5 --max-stall 1.0   # Exits with status 1 if edits stall while a 5 s program runs
+    ASYNC_MODE=eventlet python loadtest.py   # Load-test the production server
+
+Requires the Socket.IO client: pip install "python-socketio[client]"
+"""
+import sys
+
+if '--serve' in sys.argv:
+    # The server process; a cooperative server must patch before anything below imports threading
+    from concurrency import patch_standard_library
+    patch_standard_library()
+
+import os
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+
+from doc_sync import apply_patch, decode_payload
+
+LOADTEST_PASSWORD = "loadtest"
+
+# Binary document encodings the simulated clients accept, like the editor
+ACCEPT_ENCODINGS = "deflate,json"
+
+# Typed by the simulated users, one character at a time
+TYPING_CORPUS = """#include <stdio.h>
+
+int fibonacci(int n) {
+    if (n < 2) {
+        return n;
+    }
+    return fibonacci(n - 1) + fibonacci(n - 2);
+}
+
+int main(void) {
+    int count;
+    scanf("%d", &count);
+    for (int i = 0; i < count; i++) {
+        printf("%d\\n", fibonacci(i));
+    }
+    return 0;
+}
+"""
+
+# Run by --slow-run: sleeps without using CPU, so only the server's handling of it can slow editing down
+SLOW_PROGRAM = """#include <unistd.h>
+
+int main(void) {
+    sleep(%d);
+    return 0;
+}
+"""
+
+# Report values compared by --compare: (path, True if higher is worse)
+COMPARED_METRICS = [
+    (('edits', 'rtt_ms', 'p50'), True),
+    (('edits', 'rtt_ms', 'p95'), True),
+    (('edits', 'rtt_ms', 'p99'), True),
+    (('server', 'cpu_percent'), True),
+    (('messages', 'received_per_second'), False),
+    (('delivery', 'ratio'), False),
+]
+
+def serve(port, projects, typists):
+    """Run the server in this process with seeded load-test users and projects"""
+    import logging
+    from models import db, app, User, Project
+    from auth import password_hasher
+    from server import socketio
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    with app.app_context():
+        db.create_all()
+        password = password_hasher.generate_password_hash(LOADTEST_PASSWORD)
+        for p in range(projects):
+            members = []
+            for m in range(typists):
+                username = f"lt_{p}_{m}"
+                user = User(username=username, email=f"{username}@loadtest.invalid", password=password)
+                db.session.add(user)
+                members.append(user)
+            db.session.flush()
+            project = Project(name=f"Load test {p}", content="", owner_id=members[0].id)
+            project.collaborators.extend(members[1:])
+            db.session.add(project)
+        db.session.commit()
+
+    socketio.run(app, host="127.0.0.1", port=port, debug=False, use_reloader=False)
+
+class Typist:
+    """One simulated user typing into a shared project"""
+    def __init__(self, url, username, project_id, rng, args, stats):
+        self.url = url
+        self.username = username
+        self.project_id = project_id
+        self.rng = rng
+        self.args = args
+        self.stats = stats
+        self.document = ""
+        self.revision = None
+        self.pending_edits = 0
+        self.sync_needed = False
+        self.cursor = 0
+        self.corpus_position = rng.randrange(len(TYPING_CORPUS))
+        self._document_lock = threading.Lock()
+
+    def connect(self):
+        import requests
+        import socketio
+
+        if not hasattr(self, 'http'):
+            self.http = requests.Session()
+            response = self.http.post(f"{self.url}/login", data={'username': self.username, 'password': LOADTEST_PASSWORD}, allow_redirects=False)
+            if response.status_code != 302:
+                raise RuntimeError(f"Login failed for {self.username}: HTTP {response.status_code}")
+        http = self.http
+
+        self.sio = socketio.Client(reconnection=False, http_session=http)
+        self.sio.on('document', self._on_document)
+        self.sio.on('document_patch', self._on_patch)
+        self.sio.on('document_synced', self._on_synced)
+        for event in ('cursor_update', 'user_connected', 'user_joined', 'all_users', 'user_disconnected', 'edit_error'):
+            self.sio.on(event, lambda data, event=event: self.stats.received(event, data))
+
+        cookie = "; ".join(f"{c.name}={c.value}" for c in http.cookies)
+        self.sio.connect(
+            f"{self.url}?project_id={self.project_id}&accept={ACCEPT_ENCODINGS}",
+            headers={'Cookie': cookie},
+            transports=[self.args.transport]
+        )
+        with self._document_lock:
+            if self.pending_edits:
+                # Edits were in flight when the connection dropped
+                self.pending_edits = 0
+                self.revision = None
+            revision = self.revision
+        self.emit('join_project', {'project_id': self.project_id, 'rev': revision, 'accept': ACCEPT_ENCODINGS})
+
+    def reconnect(self):
+        """Drop the connection and come back, as after a network blip"""
+        self.close()
+        self.connect()
+
+    def emit(self, event, data, callback=None):
+        self.stats.sent(event, data)
+        self.sio.emit(event, data, callback=callback)
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.keystroke()
+            time.sleep(self.next_delay())
+
+    def keystroke(self):
+        with self._document_lock:
+            self.cursor = min(self.cursor, len(self.document))
+            backspace = self.cursor > 0 and self.rng.random() < self.args.backspace_ratio
+            if backspace:
+                self.cursor -= 1
+                operation = {'type': 'delete', 'position': self.cursor, 'text': self.document[self.cursor]}
+                self.document = self.document[:self.cursor] + self.document[self.cursor + 1:]
+            else:
+                char = TYPING_CORPUS[self.corpus_position % len(TYPING_CORPUS)]
+                self.corpus_position += 1
+                operation = {'type': 'insert', 'position': self.cursor, 'text': char}
+                self.document = self.document[:self.cursor] + char + self.document[self.cursor:]
+                self.cursor += 1
+            before_cursor = self.document[:self.cursor]
+            line = before_cursor.count('\n')
+            ch = len(before_cursor) - (before_cursor.rfind('\n') + 1)
+            self.pending_edits += 1
+
+        operation['project_id'] = self.project_id
+        sent_at = time.perf_counter()
+        self.stats.edit_sent(sent_at)
+        self.emit('edit', operation, callback=lambda ack=None: self._on_ack(ack, sent_at))
+        self.emit('cursor_move', {'project_id': self.project_id, 'position': {'line': line, 'ch': ch}})
+
+    def next_delay(self):
+        """Log-normal inter-key interval around the configured speed, with occasional thinking pauses"""
+        if self.rng.random() < self.args.pause_ratio:
+            return self.rng.uniform(1.0, 3.0)
+        mean = 1.0 / self.args.chars_per_second
+        return min(2.0, self.rng.lognormvariate(0, 0.5) * mean / 1.13)  # e^(0.5^2/2) ~ 1.13 keeps the mean
+
+    def _on_ack(self, ack, sent_at):
+        """Follow the server's revision the way the editor does"""
+        self.stats.edit_acked(time.perf_counter() - sent_at, sent_at)
+        with self._document_lock:
+            self.pending_edits = max(0, self.pending_edits - 1)
+            if ack and ack.get('base') == self.revision:
+                self.revision = ack['rev']
+            else:
+                self.revision = None
+                self.sync_needed = True
+        self._sync_if_needed()
+
+    def _on_document(self, data):
+        self.stats.received('document', data)
+        data = decode_payload(data)
+        with self._document_lock:
+            self.document = data.get('text', '')
+            self.revision = data.get('rev')
+            # Others typing ahead of us shift our cursor; keep it at a plausible spot
+            self.cursor = min(self.cursor, len(self.document))
+
+    def _on_patch(self, data):
+        self.stats.received('document_patch', data)
+        patch = decode_payload(data)
+        with self._document_lock:
+            if patch['base'] == self.revision and not self.pending_edits:
+                self.document = apply_patch(self.document, patch)
+                self.revision = patch['rev']
+                self.cursor = min(self.cursor, len(self.document))
+            else:
+                self.sync_needed = True
+        self._sync_if_needed()
+
+    def _on_synced(self, data):
+        self.stats.received('document_synced', data)
+        with self._document_lock:
+            self.revision = data.get('rev')
+
+    def _sync_if_needed(self):
+        with self._document_lock:
+            if not self.sync_needed or self.pending_edits:
+                return
+            self.sync_needed = False
+            revision = self.revision
+        self.emit('request_sync', {'rev': revision})
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+class LoadStats:
+    """Thread-safe counters shared by all typists"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.measuring = False
+        self.rtts = []
+        self.edits_sent_at = []  # perf_counter() at each measured edit
+        self.acked_sent_at = []  # ... and at each acknowledged one, in the order of rtts
+        self.counts = {'sent': {}, 'received': {}}
+        self.bytes = {'sent': 0, 'received': 0}
+
+    def sent(self, event, data):
+        self._count('sent', event, data)
+
+    def edit_sent(self, sent_at):
+        with self.lock:
+            if self.measuring:
+                self.edits_sent_at.append(sent_at)
+
+    def received(self, event, data):
+        self._count('received', event, data)
+
+    def edit_acked(self, seconds, sent_at):
+        with self.lock:
+            if self.measuring:
+                self.rtts.append(seconds)
+                self.acked_sent_at.append(sent_at)
+
+    def _count(self, direction, event, data):
+        size = wire_size(event, data)
+        with self.lock:
+            if self.measuring:
+                self.counts[direction][event] = self.counts[direction].get(event, 0) + 1
+                self.bytes[direction] += size
+
+def wire_size(event, data):
+    """Approximate Socket.IO payload size of an event, counting binary attachments as raw bytes"""
+    attachments = []
+
+    def placeholder(value):
+        if isinstance(value, (bytes, bytearray)):
+            attachments.append(len(value))
+            return {'_placeholder': True, 'num': len(attachments) - 1}
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    return len(json.dumps([event, data], separators=(',', ':'), default=placeholder)) + sum(attachments)
+
+def reconnect_storm(typists, args, errors):
+    """Reconnect every typist at once and report what it cost to bring them up to date"""
+    stats = LoadStats()
+    stats.measuring = True
+    for typist in typists:
+        typist.stats = stats
+
+    def reconnect(typist):
+        try:
+            typist.reconnect()
+        except Exception as e:
+            errors.append(f"{typist.username} (reconnect): {e}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=reconnect, args=(typist,), daemon=True) for typist in typists]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    connect_seconds = time.perf_counter() - started
+    time.sleep(args.drain)
+    stats.measuring = False
+
+    received = stats.counts['received']
+    return {
+        'clients': len(typists),
+        'connect_seconds': round(connect_seconds, 3),
+        'documents': received.get('document', 0),
+        'patches': received.get('document_patch', 0),
+        'up_to_date': received.get('document_synced', 0),
+        'received_bytes': stats.bytes['received'],
+    }
+
+def slow_run(typist, seconds, delay, result):
+    """After delay seconds, run a program that takes `seconds` as the typist, in the typist's project"""
+    time.sleep(delay)
+    started = time.perf_counter()
+    response = typist.http.post(f"{typist.url}/execute_code", json={
+        'code': SLOW_PROGRAM % seconds,
+        'project_id': int(typist.project_id),
+    })
+    result.update(started=started, finished=time.perf_counter(), status=response.status_code)
+    if response.ok:
+        result['stage'] = response.json().get('stage')
+
+def slow_run_report(run, stats, max_stall):
+    """
+    Round trips of the edits sent while the slow program ran, from any project
+
+    Only send-to-ack times count, so typists pausing to think does not look
+    like a stall, and an edit the server sits on until the program ends
+    does.
+
+    Returns:
+        Report dict; "stalled" is True if an edit sent during the run took
+        longer than max_stall seconds to be acknowledged, or never was. It is
+        also True, with an "error", if the check could not be made: the program
+        did not reach execution, or no edit was sent while it ran
+    """
+    if 'finished' not in run:
+        return {'error': "The program did not finish", 'stalled': True}
+    started, finished = run['started'], run['finished']
+    sent = sum(1 for sent_at in stats.edits_sent_at if started <= sent_at <= finished)
+    rtts = [rtt for rtt, sent_at in zip(stats.rtts, stats.acked_sent_at) if started <= sent_at <= finished]
+    error = None
+    if run['status'] != 200 or run.get('stage') != 'execution':
+        error = "The program did not run"
+    elif not sent:
+        error = "No edits were sent while the program ran"
+    return {
+        'error': error,
+        'request_seconds': round(finished - started, 3),
+        'status': run['status'],
+        'stage': run.get('stage'),
+        'edits_sent': sent,
+        'edits_acked': len(rtts),
+        'rtt_ms': percentiles(rtts),
+        'stalled': error is not None or len(rtts) < sent or any(rtt > max_stall for rtt in rtts),
+    }
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+
+    def at(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+
+    return {
+        'mean': round(sum(samples) / len(samples) * 1000, 2),
+        'p50': at(0.50),
+        'p90': at(0.90),
+        'p95': at(0.95),
+        'p99': at(0.99),
+        'max': round(samples[-1] * 1000, 2),
+    }
+
+def process_cpu_seconds(pid):
+    """User + system CPU seconds of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+def process_peak_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(args, work_dir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(work_dir, 'loadtest.db')}",
+        SECRET_KEY=os.urandom(16).hex(),
+        BCRYPT_LOG_ROUNDS="4",
+        EXERCISE_CACHE_TTL="3600",
+    )
+    command = [sys.executable, os.path.abspath(__file__), '--serve', str(port),
+               '--projects', str(args.projects), '--typists', str(args.typists)]
+    log = open(os.path.join(work_dir, 'server.log'), 'w')
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup, see {log.name}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return server, url
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start within 60 seconds")
+
+def run_load(args):
+    try:
+        import requests  # noqa: F401
+        import socketio  # noqa: F401
+    except ImportError:
+        sys.exit('The load test needs the Socket.IO client: pip install "python-socketio[client]"')
+
+    work_dir = tempfile.mkdtemp(prefix="vcce-loadtest-")
+    server, url = start_server(args, work_dir)
+    stats = LoadStats()
+    typists = []
+    errors = []
+
+    try:
+        rng = random.Random(args.seed)
+        for p in range(args.projects):
+            for m in range(args.typists):
+                typists.append(Typist(url, f"lt_{p}_{m}", str(p + 1), random.Random(rng.random()), args, stats))
+
+        connect_started = time.perf_counter()
+        for typist in typists:
+            typist.connect()
+        connect_seconds = time.perf_counter() - connect_started
+        time.sleep(args.warmup)
+
+        cpu_before = process_cpu_seconds(server.pid)
+        stats.measuring = True
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+
+        def typist_thread(typist):
+            try:
+                typist.run(deadline)
+            except Exception as e:
+                errors.append(f"{typist.username}: {e}")
+
+        threads = [threading.Thread(target=typist_thread, args=(typist,), daemon=True) for typist in typists]
+        run = {}
+        if args.slow_run:
+            # Mid-way through the typing, so edits keep coming before, during and after it
+            delay = max(0.0, (args.duration - args.slow_run) / 2)
+            threads.append(threading.Thread(target=slow_run, args=(typists[0], args.slow_run, delay, run), daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        typing_seconds = time.perf_counter() - started
+
+        time.sleep(args.drain)  # Let in-flight acks and broadcasts arrive
+        stats.measuring = False
+        elapsed = time.perf_counter() - started
+        cpu_after = process_cpu_seconds(server.pid)
+        peak_rss_kb = process_peak_rss_kb(server.pid)
+
+        reconnect = reconnect_storm(typists, args, errors) if args.reconnect else None
+    finally:
+        for typist in typists:
+            if hasattr(typist, 'sio'):
+                typist.close()
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    edits_sent = stats.counts['sent'].get('edit', 0)
+    documents = stats.counts['received'].get('document', 0) + stats.counts['received'].get('document_patch', 0)
+    expected_documents = edits_sent * (args.typists - 1)
+    messages_sent = sum(stats.counts['sent'].values())
+    messages_received = sum(stats.counts['received'].values())
+    cpu_seconds = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+
+    return {
+        'config': {
+            'async_mode': os.getenv("ASYNC_MODE", "threading"),
+            'projects': args.projects,
+            'typists_per_project': args.typists,
+            'duration_seconds': args.duration,
+            'chars_per_second': args.chars_per_second,
+            'transport': args.transport,
+            'seed': args.seed,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'commit': git_commit(),
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'typing_seconds': round(typing_seconds, 3),
+        'connect_seconds': round(connect_seconds, 3),
+        'edits': {
+            'sent': edits_sent,
+            'acked': len(stats.rtts),
+            'rtt_ms': percentiles(stats.rtts),
+        },
+        'delivery': {
+            'expected_documents': expected_documents,
+            'received_documents': documents,
+            'ratio': round(documents / expected_documents, 4) if expected_documents else None,
+        },
+        'messages': {
+            'sent': messages_sent,
+            'received': messages_received,
+            'sent_per_second': round(messages_sent / typing_seconds, 2),
+            'received_per_second': round(messages_received / typing_seconds, 2),
+            'by_event': stats.counts,
+        },
+        'bytes': {
+            'sent': stats.bytes['sent'],
+            'received': stats.bytes['received'],
+            'sent_per_second': round(stats.bytes['sent'] / typing_seconds, 2),
+            'received_per_second': round(stats.bytes['received'] / typing_seconds, 2),
+        },
+        'server': {
+            'cpu_seconds': round(cpu_seconds, 3) if cpu_seconds is not None else None,
+            'cpu_percent': round(cpu_seconds / elapsed * 100, 1) if cpu_seconds is not None else None,
+            'peak_rss_kb': peak_rss_kb,
+        },
+        'reconnect': reconnect,
+        'slow_run': slow_run_report(run, stats, args.max_stall) if args.slow_run else None,
+        'errors': errors,
+    }
+
+def compare(report, baseline, tolerance, compared=COMPARED_METRICS, label=''):
+    """
+    Compare a report against a baseline (also used by benchmark.py)
+
+    Args:
+        report: Current report, or part of one
+        baseline: The matching part of the baseline report
+        tolerance: Allowed relative regression
+        compared: (path, True if higher is worse) of the values to compare
+        label: Prefix for the printed and returned metric names
+
+    Returns:
+        List of regression descriptions (empty if none exceed the tolerance)
+    """
+    regressions = []
+    for path, higher_is_worse in compared:
+        current, previous = _lookup(report, path), _lookup(baseline, path)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        name = label + '.'.join(path)
+        print(f"{name:40} {previous:>12} -> {current:<12} ({change:+.1%})")
+        if (change if higher_is_worse else -change) > tolerance:
+            regressions.append(f"{name} changed {change:+.1%}")
+    return regressions
+
+def _lookup(report, path):
+    for key in path:
+        if not isinstance(report, dict) or key not in report:
+            return None
+        report = report[key]
+    return report
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the collaborative editing path")
+    parser.add_argument('--projects', type=int, default=5, help="Projects edited concurrently")
+    parser.add_argument('--typists', type=int, default=4, help="Typists per project")
+    parser.add_argument('--duration', type=float, default=30, help="Measured seconds of typing")
+    parser.add_argument('--warmup', type=float, default=2, help="Seconds to wait after connecting before measuring")
+    parser.add_argument('--drain', type=float, default=2, help="Seconds to wait for in-flight messages after typing stops")
+    parser.add_argument('--chars-per-second', type=float, default=5, help="Mean typing speed per typist")
+    parser.add_argument('--backspace-ratio', type=float, default=0.05, help="Fraction of keystrokes that are backspaces")
+    parser.add_argument('--pause-ratio', type=float, default=0.02, help="Fraction of keystrokes followed by a 1-3s pause")
+    parser.add_argument('--transport', choices=['websocket', 'polling'], default='websocket')
+    parser.add_argument('--reconnect', action='store_true', help="Finally reconnect every typist at once and report the resync cost")
+    parser.add_argument('--slow-run', type=int, metavar='SECONDS', help="Also run a program taking this long mid-way; exit with status 1 if edits stall meanwhile")
+    parser.add_argument('--max-stall', type=float, default=1.0, help="Longest edit round trip allowed during --slow-run, in seconds")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for the typing traces")
+    parser.add_argument('--output', help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument('--compare', help="Baseline report; exit with status 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression for --compare")
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.projects, args.typists)
+        return
+    if args.slow_run and args.slow_run >= args.duration:
+        parser.error("--slow-run must be shorter than --duration")
+
+    report = run_load(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+    if report['slow_run'] and report['slow_run']['stalled']:
+        print(f"Edits stalled while the slow program ran: {report['slow_run']}")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions: " + "; ".join(regressions))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+# manage.py
+"""
+One-time setup and maintenance commands, kept out of the server's startup path.
+
+Usage:
+    python manage.py init       # Create the schema, apply migrations, add sample exercises, build the sandbox launcher
+    python manage.py migrate    # Apply pending migrations (same as python migrations.py)
+    python manage.py seed       # Add the sample exercises to an empty exercise table
+    python manage.py startup --runs 5 --output startup.json   # Measure startup against the budget; fails when over it
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Milliseconds a fresh process may spend importing the application (server.create_app())
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+# Milliseconds the first request to each probed path may take in a fresh process
+STARTUP_FIRST_REQUEST_BUDGET_MS = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", "250"))
+
+# Served by a new worker before anything is cached: a template render and a database round trip
+STARTUP_PATHS = ['/login', '/metrics']
+
+# Runs in a fresh interpreter, so nothing is imported or warmed up yet
+STARTUP_PROBE = """
+import sys, json, time
+started = time.perf_counter()
+import server
+app = server.create_app()
+imported = time.perf_counter()
+client = app.test_client()
+first_request_ms = {}
+for path in sys.argv[1:]:
+    request_started = time.perf_counter()
+    client.get(path)
+    first_request_ms[path] = (time.perf_counter() - request_started) * 1000
+print(json.dumps({'import_ms': (imported - started) * 1000, 'first_request_ms': first_request_ms}))
+"""
+
+def init_database():
+    """
+    Prepare a database and this host for serving; safe to re-run
+
+    Creates missing tables, applies the migrations, adds the sample exercises
+    if there are none and builds the sandbox launcher, so that no worker pays
+    for any of it on startup or on its first request.
+    """
+    from models import db, app
+    from migrations import MIGRATIONS
+    from exercise_manager import create_sample_exercises
+    from sandbox import launcher_path
+
+    with app.app_context():
+        db.create_all()
+        for migration in MIGRATIONS:
+            migration()
+        create_sample_exercises()
+    launcher_path()
+
+def seed():
+    from models import app
+    from exercise_manager import create_sample_exercises
+
+    with app.app_context():
+        create_sample_exercises()
+
+def measure_startup(runs=3, paths=STARTUP_PATHS):
+    """
+    Start the application in fresh interpreters and time it
+
+    Returns:
+        Report dict with the median and worst import time, first-request
+        latency per path, wall time to a served request including interpreter
+        startup, the slowest direct imports of server.py and whether every
+        run stayed within the budget
+    """
+    samples = []
+    imports = {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_PROBE] + list(paths),
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['process_ms'] = process_ms
+        samples.append(sample)
+        for module, cumulative_ms in _direct_imports(result.stderr, 'server'):
+            imports.setdefault(module, []).append(cumulative_ms)
+
+    def summary(values):
+        return {'median': round(statistics.median(values), 1), 'max': round(max(values), 1)}
+
+    first_request = {path: summary([sample['first_request_ms'][path] for sample in samples]) for path in paths}
+    import_ms = summary([sample['import_ms'] for sample in samples])
+    return {
+        'runs': runs,
+        'import_ms': import_ms,
+        'first_request_ms': first_request,
+        'process_ms': summary([sample['process_ms'] for sample in samples]),
+        'slowest_imports_ms': dict(sorted(
+            ((module, round(statistics.median(values), 1)) for module, values in imports.items()),
+            key=lambda item: item[1], reverse=True
+        )[:10]),
+        'budget': {'import_ms': STARTUP_IMPORT_BUDGET_MS, 'first_request_ms': STARTUP_FIRST_REQUEST_BUDGET_MS},
+        'within_budget': import_ms['max'] <= STARTUP_IMPORT_BUDGET_MS and all(
+            latency['max'] <= STARTUP_FIRST_REQUEST_BUDGET_MS for latency in first_request.values()
+        ),
+    }
+
+def _direct_imports(importtime_log, parent):
+    """(module, cumulative ms) of the modules `parent` imported first, from python -X importtime output"""
+    found = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        module = name.strip()
+        if depth == 1:
+            found.append((module, int(cumulative) / 1000))
+        elif depth == 0 and module == parent:
+            return found  # Children are logged before their parent
+        elif depth == 0:
+            found = []
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('init', help="Create, migrate and seed the database and build the sandbox launcher")
+    commands.add_parser('migrate', help="Apply pending migrations")
+    commands.add_parser('seed', help="Add the sample exercises to an empty exercise table")
+    startup = commands.add_parser('startup', help="Measure startup time against the budget")
+    startup.add_argument('--runs', type=int, default=3, help="Fresh processes to start")
+    startup.add_argument('--path', action='append', dest='paths', help="Path to request first (repeatable)")
+    startup.add_argument('--output', help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        init_database()
+        print("Database initialized")
+    elif args.command == 'migrate':
+        from models import app
+        from migrations import MIGRATIONS
+        with app.app_context():
+            for migration in MIGRATIONS:
+                migration()
+        print("Migrations applied successfully!")
+    elif args.command == 'seed':
+        seed()
+    else:
+        report = measure_startup(args.runs, args.paths or STARTUP_PATHS)
+        text = json.dumps(report, indent=2)
+        print(text)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + "\n")
+        if not report['within_budget']:
+            print("Startup is over budget", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
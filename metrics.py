@@ -0,0 +1,173 @@
+# metrics.py
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+METRICS_PREFIX = "vcce"
+
+# Histogram bucket upper bounds in seconds, from cheap checks up to the 5s run limit
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Recent samples kept per stage for percentiles
+STAGE_WINDOW = int(os.getenv("METRICS_STAGE_WINDOW", "1000"))
+
+class LatencyStats:
+    """Keeps a window of recent latency samples for percentile reporting"""
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self.samples)
+            count, total = self.count, self.total
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+        return {
+            'count': count,
+            'avg_ms': round(total / count * 1000, 2) if count else 0.0,
+            'p50_ms': round(percentile(0.50) * 1000, 2),
+            'p95_ms': round(percentile(0.95) * 1000, 2),
+            'p99_ms': round(percentile(0.99) * 1000, 2),
+        }
+
+class Histogram(LatencyStats):
+    """LatencyStats that also counts every sample into fixed cumulative buckets"""
+    def __init__(self, buckets=STAGE_BUCKETS, window=1000):
+        super().__init__(window)
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def snapshot(self):
+        """
+        Get the histogram state
+
+        Returns:
+            Tuple of (list of (upper bound, cumulative count), sum, count)
+        """
+        with self._lock:
+            counts, total, count = list(self.bucket_counts), self.total, self.count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+class MetricsRegistry:
+    """Per-stage latency histograms plus gauges read from other components at scrape time"""
+    def __init__(self):
+        self.stages = {}
+        self.gauges = []  # (name, help, callable returning a dict of values)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram(window=STAGE_WINDOW))
+        histogram.record(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        """Time the enclosed block as one sample of stage (recorded even if it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        """Decorator form of span()"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_gauges(self, name, help_text, collect):
+        """
+        Export the numeric values of collect() as vcce_<name>_<key> gauges
+
+        Args:
+            name: Metric name prefix, e.g. 'history_writer'
+            help_text: Description for the HELP line
+            collect: Callable returning a dictionary of values; non-numeric ones are skipped
+        """
+        self.gauges.append((name, help_text, collect))
+
+    def reset(self):
+        """Forget all stage samples (gauges stay registered)"""
+        with self._lock:
+            self.stages = {}
+
+    def summary(self):
+        """Percentile summary per stage, sorted by stage name"""
+        with self._lock:
+            stages = sorted(self.stages.items())
+        return {stage: histogram.summary() for stage, histogram in stages}
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format (version 0.0.4)"""
+        name = f"{METRICS_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each request processing stage",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+        for stage, histogram in stages:
+            label = _escape_label(stage)
+            buckets, total, count = histogram.snapshot()
+            for bound, cumulative in buckets:
+                lines.append(f'{name}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{label}"}} {total}')
+            lines.append(f'{name}_count{{stage="{label}"}} {count}')
+
+        for gauge_name, help_text, collect in self.gauges:
+            try:
+                values = collect()
+            except Exception:
+                continue  # A failing collector must not break the whole scrape
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{METRICS_PREFIX}_{gauge_name}_{key}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+metrics = MetricsRegistry()
@@ -0,0 +1,212 @@
+# migrations.py
+"""
+Schema migrations for existing databases.
+
+Usage:
+    python migrations.py          # Apply all pending migrations
+    python migrations.py gc       # Delete blobs no longer referenced by any row, and their similarity index entries
+    python migrations.py reindex  # Rebuild the full-text search index
+"""
+import sys
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+from models import db, app, store_blob, SimilaritySource, SimilarityFingerprint
+from similarity import forget_orphans
+from search import ensure_search_index, rebuild_search_index, search_index_size
+
+logging.basicConfig(level=logging.INFO)
+
+# (table, legacy text column, blob hash column)
+BLOB_COLUMNS = [
+    ('project', 'content', 'content_hash'),
+    ('exercise_progress', 'user_code', 'user_code_hash'),
+    ('compilation_history', 'code', 'code_hash'),
+    ('compilation_history', 'compilation_output', 'compilation_output_hash'),
+    ('compilation_history', 'execution_output', 'execution_output_hash'),
+]
+
+# Blob hash columns added after the blob store, which have no legacy text column: (table, column)
+NEW_BLOB_COLUMNS = [
+    ('compilation_history', 'diagnostics_hash'),
+]
+
+# Rows converted per transaction, keeps memory flat on large tables
+BATCH_SIZE = 500
+
+def migrate_blob_store():
+    """
+    Move inline source/output text columns into the deduplicated blob table.
+
+    Rows are converted in id order and in batches, so an interrupted run can
+    simply be restarted. The legacy columns are dropped once converted.
+    """
+    db.create_all()  # Creates the blob table if missing
+    inspector = inspect(db.engine)
+    migrated = False
+
+    for table, old_column, new_column in BLOB_COLUMNS:
+        columns = {c['name'] for c in inspector.get_columns(table)}
+        if old_column not in columns:
+            continue
+
+        logging.info(f"Migrating {table}.{old_column} -> {table}.{new_column}")
+        if new_column not in columns:
+            db.session.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN {new_column} VARCHAR(64) REFERENCES blob(hash)"
+            ))
+            db.session.commit()
+
+        converted = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(text(
+                f"SELECT id, {old_column} FROM {table} "
+                f"WHERE id > :last_id AND {new_column} IS NULL ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+            if not rows:
+                break
+
+            for row_id, value in rows:
+                db.session.execute(
+                    text(f"UPDATE {table} SET {new_column} = :digest WHERE id = :id"),
+                    {'digest': store_blob(value), 'id': row_id}
+                )
+            db.session.commit()
+
+            converted += len(rows)
+            last_id = rows[-1][0]
+
+        db.session.execute(text(f"ALTER TABLE {table} DROP COLUMN {old_column}"))
+        db.session.commit()
+        logging.info(f"Converted {converted} rows in {table}")
+        migrated = True
+
+    # ADD COLUMN leaves the hash columns nullable; apply the model's NOT NULLs
+    for table, _, column in BLOB_COLUMNS:
+        if not db.metadata.tables[table].c[column].nullable:
+            _require_not_null(table, column)
+
+    if migrated:
+        _reclaim_space()
+
+def _require_not_null(table, column):
+    """
+    Make table.column NOT NULL if it is not already
+
+    SQLite cannot alter a column in place, so there the table is rebuilt from
+    the model's definition and the existing rows copied across.
+    """
+    existing = {c['name']: c for c in inspect(db.engine).get_columns(table)}
+    if not existing[column]['nullable']:
+        return
+
+    logging.info(f"Making {table}.{column} NOT NULL")
+    if db.engine.dialect.name != 'sqlite':
+        db.session.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+        db.session.commit()
+        return
+
+    model_table = db.metadata.tables[table]
+    create = str(CreateTable(model_table).compile(db.engine))
+    create = create.replace(f"CREATE TABLE {table} ", f"CREATE TABLE {table}_rebuilt ", 1)
+    shared = ", ".join(c.name for c in model_table.columns if c.name in existing)
+
+    db.session.execute(text(create))
+    db.session.execute(text(f"INSERT INTO {table}_rebuilt ({shared}) SELECT {shared} FROM {table}"))
+    db.session.execute(text(f"DROP TABLE {table}"))
+    db.session.execute(text(f"ALTER TABLE {table}_rebuilt RENAME TO {table}"))
+    for index in model_table.indexes:
+        index.create(db.session.connection())
+    db.session.commit()
+
+def migrate_chat_index():
+    """Add the (project_id, id) index used by chat history pagination"""
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_message_project_id_id ON chat_message (project_id, id)"
+    ))
+    db.session.commit()
+
+# (column, SQL type) of the execution profile recorded with each run
+PROFILE_COLUMNS = [
+    ('wall_time_ms', 'FLOAT'),
+    ('user_time_ms', 'FLOAT'),
+    ('sys_time_ms', 'FLOAT'),
+    ('peak_rss_kb', 'INTEGER'),
+]
+
+def migrate_history_profile():
+    """Add the execution profile columns to compilation_history"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('compilation_history')}
+    for column, column_type in PROFILE_COLUMNS:
+        if column not in columns:
+            logging.info(f"Adding compilation_history.{column}")
+            db.session.execute(text(f"ALTER TABLE compilation_history ADD COLUMN {column} {column_type}"))
+    db.session.commit()
+
+def migrate_history_diagnostics():
+    """Add the blob column holding each compilation's packed diagnostics"""
+    for table, column in NEW_BLOB_COLUMNS:
+        if column not in {c['name'] for c in inspect(db.engine).get_columns(table)}:
+            logging.info(f"Adding {table}.{column}")
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} VARCHAR(64) REFERENCES blob(hash)"))
+    db.session.commit()
+
+def migrate_similarity_index():
+    """Create the tables (and indexes) of the code similarity index"""
+    for table in [SimilaritySource.__table__, SimilarityFingerprint.__table__]:
+        table.create(db.engine, checkfirst=True)
+
+def migrate_search_index():
+    """Create the full-text search index, and fill it if it is empty"""
+    ensure_search_index()
+    if search_index_size() == 0:
+        rebuild_search_index()
+
+# Applied in order by `python migrations.py`; each one must be safe to re-run
+MIGRATIONS = [
+    migrate_blob_store,
+    migrate_chat_index,
+    migrate_history_profile,
+    migrate_history_diagnostics,
+    migrate_similarity_index,
+    migrate_search_index,
+]
+
+def collect_orphan_blobs():
+    """
+    Delete blobs that are no longer referenced (e.g. superseded project content)
+
+    Returns:
+        Number of deleted blobs
+    """
+    columns = [(table, column) for table, _, column in BLOB_COLUMNS] + NEW_BLOB_COLUMNS
+    referenced = " UNION ".join(
+        f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL"
+        for table, column in columns
+    )
+    result = db.session.execute(text(f"DELETE FROM blob WHERE hash NOT IN ({referenced})"))
+    db.session.commit()
+    logging.info(f"Deleted {result.rowcount} orphaned blobs")
+    return result.rowcount
+
+def _reclaim_space():
+    """Return freed pages to the filesystem (SQLite) or refresh planner statistics (Postgres)"""
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if db.engine.dialect.name == 'sqlite':
+            conn.execute(text("VACUUM"))
+        elif db.engine.dialect.name == 'postgresql':
+            conn.execute(text("VACUUM ANALYZE"))
+
+if __name__ == '__main__':
+    with app.app_context():
+        if len(sys.argv) > 1 and sys.argv[1] == 'gc':
+            collect_orphan_blobs()
+            forget_orphans()
+            _reclaim_space()
+        elif len(sys.argv) > 1 and sys.argv[1] == 'reindex':
+            rebuild_search_index()
+        else:
+            for migration in MIGRATIONS:
+                migration()
+            print("Migrations applied successfully!")
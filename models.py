@@ -1,9 +1,20 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
+from sqlalchemy import event
 import os
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 from datetime import datetime
+from db_config import engine_options
+
+try:
+    import zstandard  # Optional, better ratio and speed than zlib
+except ImportError:
+    zstandard = None
 
 load_dotenv()
 
@@ -11,8 +22,108 @@ app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL", 'sqlite:///site.db')
 app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "INSECURE_DEFAULT_KEY")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 db = SQLAlchemy(app)
 
+# Decompressed blobs are immutable, so they can be cached by hash
+BLOB_CACHE_SIZE = int(os.getenv("BLOB_CACHE_SIZE", "512"))
+_blob_cache = OrderedDict()
+_blob_cache_lock = threading.Lock()
+
+def blob_hash(text):
+    """Return the content address (sha256 hex digest) of a text value"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _compress(raw):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+    return 'zlib', zlib.compress(raw, 9)
+
+def _decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def store_blob(text, connection=None):
+    """
+    Store a text value in the blob table (if not already present)
+
+    Args:
+        text: Text to store, or None
+        connection: Core connection to execute on instead of db.session
+
+    Returns:
+        The blob hash, or None if text is None
+    """
+    if text is None:
+        return None
+
+    digest = blob_hash(text)
+    raw = text.encode('utf-8')
+    codec, data = _compress(raw)
+    values = dict(hash=digest, codec=codec, size=len(raw), data=data)
+    executor = connection if connection is not None else db.session
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        executor.execute(insert(Blob).values(**values).on_conflict_do_nothing())
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        executor.execute(insert(Blob).values(**values).on_conflict_do_nothing())
+    elif connection is not None:
+        blobs = Blob.__table__
+        if connection.execute(blobs.select().where(blobs.c.hash == digest)).first() is None:
+            connection.execute(blobs.insert().values(**values))
+    elif Blob.query.get(digest) is None:
+        db.session.add(Blob(**values))
+
+    return digest
+
+def load_blob(digest):
+    """
+    Load a text value from the blob table
+
+    Args:
+        digest: Blob hash, or None
+
+    Returns:
+        The decompressed text, or None if digest is None or unknown
+    """
+    if digest is None:
+        return None
+
+    with _blob_cache_lock:
+        if digest in _blob_cache:
+            _blob_cache.move_to_end(digest)
+            return _blob_cache[digest]
+
+    blob = Blob.query.get(digest)
+    if not blob:
+        return None
+
+    text = _decompress(blob.codec, blob.data).decode('utf-8')
+    with _blob_cache_lock:
+        _blob_cache[digest] = text
+        if len(_blob_cache) > BLOB_CACHE_SIZE:
+            _blob_cache.popitem(last=False)
+    return text
+
+class BlobText:
+    """Exposes a blob hash column as a plain text attribute (e.g. `project.content`)"""
+    def __init__(self, hash_attr):
+        self.hash_attr = hash_attr
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return load_blob(getattr(obj, self.hash_attr))
+
+    def __set__(self, obj, value):
+        setattr(obj, self.hash_attr, store_blob(value))
+
 # Association table for project collaborators
 project_collaborators = db.Table('project_collaborators',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
@@ -38,10 +149,22 @@ class User(db.Model):
     def __repr__(self):
         return f"User('{self.username}', '{self.email}')"
 
+class Blob(db.Model):
+    """Content-addressed, compressed storage for source code and program output"""
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of the uncompressed text
+    codec = db.Column(db.String(10), nullable=False)  # zlib, zstd
+    size = db.Column(db.Integer, nullable=False)  # Uncompressed size in bytes
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"Blob('{self.hash[:12]}', {self.codec}, size: {self.size})"
+
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=True)
+    content = BlobText('content_hash')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -83,7 +206,8 @@ class ExerciseProgress(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), nullable=False)
     status = db.Column(db.String(20), default='not_started')  # not_started, in_progress, completed
-    user_code = db.Column(db.Text, nullable=True)
+    user_code_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=True)
+    user_code = BlobText('user_code_hash')
     attempts = db.Column(db.Integer, default=0)
     last_attempt = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
@@ -97,16 +221,51 @@ class CompilationHistory(db.Model):
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True)
     document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=True)
     exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), nullable=True)
-    code = db.Column(db.Text, nullable=False)
+    code_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=False)
+    code = BlobText('code_hash')
     compiled_at = db.Column(db.DateTime, default=datetime.utcnow)
-    compilation_output = db.Column(db.Text, nullable=True)
-    execution_output = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), nullable=False)  # success, compilation_error, runtime_error
+    compilation_output_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=True)
+    compilation_output = BlobText('compilation_output_hash')
+    execution_output_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=True)
+    execution_output = BlobText('execution_output_hash')
+    # Compiler diagnostics as packed by diagnostics.pack_diagnostics (NULL when there were none)
+    diagnostics_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), nullable=True)
+    diagnostics = BlobText('diagnostics_hash')
+    status = db.Column(db.String(20), nullable=False)  # success, compilation_error, runtime_error, timeout
+    # Execution profile (NULL when the program was not run)
+    wall_time_ms = db.Column(db.Float, nullable=True)
+    user_time_ms = db.Column(db.Float, nullable=True)
+    sys_time_ms = db.Column(db.Float, nullable=True)
+    peak_rss_kb = db.Column(db.Integer, nullable=True)
     
     def __repr__(self):
         return f"CompilationHistory(user_id: {self.user_id}, status: {self.status})"
 
+class SimilaritySource(db.Model):
+    """A source (by blob hash) whose winnowed fingerprints are in the similarity index"""
+    id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(64), unique=True, nullable=False)
+    fingerprint_count = db.Column(db.Integer, nullable=False)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"SimilaritySource({self.hash[:12]}, fingerprints: {self.fingerprint_count})"
+
+class SimilarityFingerprint(db.Model):
+    """Inverted index entry: a fingerprint and one source containing it"""
+    # Postings are read by fingerprint; the source_id index serves cleanup
+    __table_args__ = (db.Index('ix_similarity_fingerprint_source_id', 'source_id'),)
+
+    fingerprint = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    source_id = db.Column(db.Integer, db.ForeignKey('similarity_source.id'), primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f"SimilarityFingerprint({self.fingerprint}, source: {self.source_id})"
+
 class ChatMessage(db.Model):
+    # Serves cursor pagination: WHERE project_id = ? AND id < ? ORDER BY id DESC
+    __table_args__ = (db.Index('ix_chat_message_project_id_id', 'project_id', 'id'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
@@ -119,6 +278,13 @@ class ChatMessage(db.Model):
     def __repr__(self):
         return f"ChatMessage(user_id: {self.user_id}, project_id: {self.project_id})"
 
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index(target, connection, **kwargs):
+    # db.create_all() also creates the full-text index, so fresh databases can be written to right away.
+    # Imported here since search.py imports this module.
+    from search import ensure_search_index
+    ensure_search_index(connection)
+
 if __name__ == '__main__':
     print("Creating database tables...")
     with app.app_context():
@@ -0,0 +1,210 @@
+# regrade.py
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, func
+from models import db, app, ExerciseProgress, load_blob
+from metrics import metrics
+
+# Submissions judged in parallel by a re-judge job
+REGRADE_WORKERS = int(os.getenv("REGRADE_WORKERS", str(os.cpu_count() or 2)))
+
+# Distinct sources read, judged and written back per batch
+REGRADE_BATCH_SIZE = int(os.getenv("REGRADE_BATCH_SIZE", "64"))
+
+# Finished jobs kept for status queries
+REGRADE_HISTORY = 50
+
+class RegradeJob:
+    """Progress of re-judging every submission of one exercise"""
+    def __init__(self, exercise_id):
+        self.id = uuid.uuid4().hex[:12]
+        self.exercise_id = exercise_id
+        self.state = 'queued'  # queued, running, done, failed
+        self.submissions = 0   # Progress rows with code
+        self.sources = 0       # Distinct sources among them
+        self.judged = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0        # Sources the judge could not run; their rows keep their status
+        self.updated = 0       # Progress rows written
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'exercise_id': self.exercise_id,
+            'state': self.state,
+            'submissions': self.submissions,
+            'sources': self.sources,
+            'judged': self.judged,
+            'passed': self.passed,
+            'failed': self.failed,
+            'errors': self.errors,
+            'updated': self.updated,
+            'progress': round(self.judged / self.sources, 4) if self.sources else (1.0 if self.finished else 0.0),
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+        }
+
+class Regrader:
+    """
+    Re-judges all submissions of an exercise, e.g. after its test cases changed
+
+    Submissions are read in batches of distinct source hashes (keyset
+    paginated), so memory stays flat however many there are, and identical
+    sources submitted by several users are compiled and run once. Each batch
+    is judged on a worker pool and its statuses are written back with one
+    UPDATE per outcome. Jobs run on a background thread; poll get() for
+    progress. One job runs per exercise at a time.
+    """
+    def __init__(self, judge=None, workers=REGRADE_WORKERS, batch_size=REGRADE_BATCH_SIZE):
+        """
+        Args:
+            judge: Callable(code, test_cases) returning a result with "success", run inside
+                a request context (e.g. server.execute_test_cases); set before starting jobs
+            workers: Parallel judge runs per job
+            batch_size: Distinct sources per batch
+        """
+        self.judge = judge
+        self.workers = workers
+        self.batch_size = batch_size
+        self.jobs = {}    # Job ID -> RegradeJob, oldest first
+        self.active = {}  # Exercise ID -> running RegradeJob
+        self._lock = threading.Lock()
+
+    def start(self, exercise_id, test_cases):
+        """
+        Start re-judging an exercise's submissions against test_cases
+
+        Returns:
+            The new RegradeJob, or the exercise's job already in progress
+        """
+        if self.judge is None:
+            raise RuntimeError("Regrader has no judge configured")
+
+        with self._lock:
+            job = self.active.get(exercise_id)
+            if job is not None:
+                return job
+            job = RegradeJob(exercise_id)
+            self.active[exercise_id] = job
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, old in self.jobs.items() if old.finished]
+            for job_id in finished[:max(0, len(finished) - REGRADE_HISTORY)]:
+                del self.jobs[job_id]
+
+        thread = threading.Thread(target=self._run, args=(job, test_cases), name=f"regrade-{exercise_id}", daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def latest_for(self, exercise_id):
+        """The exercise's running job, or else its most recent one"""
+        with self._lock:
+            job = self.active.get(exercise_id)
+            if job is None:
+                job = next((job for job in reversed(list(self.jobs.values())) if job.exercise_id == exercise_id), None)
+            return job
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {
+            'running_jobs': sum(1 for job in jobs if not job.finished),
+            'judged_sources': sum(job.judged for job in jobs),
+            'updated_submissions': sum(job.updated for job in jobs),
+        }
+
+    def _run(self, job, test_cases):
+        progress = ExerciseProgress.__table__
+        # Viewing an exercise creates a not_started row holding the starter code; only submissions are judged
+        submitted = (progress.c.attempts > 0) | (progress.c.status != 'not_started')
+        with_code = (progress.c.exercise_id == job.exercise_id) & progress.c.user_code_hash.isnot(None) & submitted
+        job.state = 'running'
+        try:
+            with app.app_context():
+                job.submissions, job.sources = db.session.execute(
+                    select(func.count(), func.count(progress.c.user_code_hash.distinct())).where(with_code)
+                ).one()
+
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='regrade') as pool:
+                    last_hash = ''
+                    while True:
+                        hashes = db.session.execute(
+                            select(progress.c.user_code_hash).distinct()
+                            .where(with_code & (progress.c.user_code_hash > last_hash))
+                            .order_by(progress.c.user_code_hash)
+                            .limit(self.batch_size)
+                        ).scalars().all()
+                        db.session.rollback()  # Don't hold a read transaction while judging
+                        if not hashes:
+                            break
+                        last_hash = hashes[-1]
+
+                        outcomes = list(pool.map(lambda digest: self._judge(digest, test_cases), hashes))
+                        self._write(job, with_code, hashes, outcomes)
+            job.state = 'done'
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Re-judging exercise {job.exercise_id} failed: {e}", exc_info=True)
+            job.state = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self.active.pop(job.exercise_id, None)
+
+    def _judge(self, digest, test_cases):
+        """Judge one source; True or False, or None if it could not be judged"""
+        try:
+            # A request context without a user, so the judge records no history
+            with app.test_request_context():
+                code = load_blob(digest)
+                with metrics.span("regrade.judge"):
+                    return bool(self.judge(code, test_cases).get('success'))
+        except Exception as e:
+            logging.warning(f"Could not re-judge source {digest[:12]}: {e}")
+            return None
+
+    def _write(self, job, with_code, hashes, outcomes):
+        progress = ExerciseProgress.__table__
+        with_code = with_code & (progress.c.status != 'not_started')  # Never start an exercise for a user
+        passed = [digest for digest, outcome in zip(hashes, outcomes) if outcome is True]
+        failed = [digest for digest, outcome in zip(hashes, outcomes) if outcome is False]
+
+        with metrics.span("db.regrade_write"):
+            updated = 0
+            if passed:
+                updated += db.session.execute(
+                    progress.update()
+                    .where(with_code & progress.c.user_code_hash.in_(passed))
+                    .values(status='completed', completed_at=func.coalesce(progress.c.completed_at, datetime.utcnow()))
+                ).rowcount
+            if failed:
+                updated += db.session.execute(
+                    progress.update()
+                    .where(with_code & progress.c.user_code_hash.in_(failed))
+                    .values(status='in_progress', completed_at=None)
+                ).rowcount
+            db.session.commit()
+
+        job.judged += len(hashes)
+        job.passed += len(passed)
+        job.failed += len(failed)
+        job.errors += len(hashes) - len(passed) - len(failed)
+        job.updated += updated
+
+regrader = Regrader()
@@ -0,0 +1,213 @@
+# sandbox.py
+import os
+import time
+import signal
+import logging
+import hashlib
+import resource
+import threading
+import subprocess
+from builder import BUILD_CACHE_DIR
+from concurrency import offload
+
+LAUNCHER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_launcher.c")
+
+# Bytes of stdout, and of stderr, kept from a run; a program writing more is killed
+OUTPUT_LIMIT_BYTES = int(os.getenv("OUTPUT_LIMIT_BYTES", str(64 * 1024)))
+
+# Appended to a stream cut off at the limit
+OUTPUT_TRUNCATED_MARKER = "\n[Output truncated at {limit} bytes]\n"
+
+_launcher = {'path': None, 'failed': False}
+_launcher_lock = threading.Lock()
+
+# Set resource limits for child processes
+def set_resource_limits():
+    """Set resource limits for child processes"""
+    # Limit memory usage (32MB)
+    resource.setrlimit(resource.RLIMIT_AS, (32 * 1024 * 1024, 32 * 1024 * 1024))
+    # Limit CPU time (2 seconds)
+    resource.setrlimit(resource.RLIMIT_CPU, (2, 2))
+    # Limit file size creation (1MB)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+
+def launcher_path():
+    """
+    Get the profiling launcher, compiling it on first use
+
+    Returns:
+        Path to the launcher executable, or None if it could not be built
+    """
+    with _launcher_lock:
+        if _launcher['path'] or _launcher['failed']:
+            return _launcher['path']
+
+        try:
+            with open(LAUNCHER_SOURCE, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:16]
+            path = os.path.join(BUILD_CACHE_DIR, f"sandbox-launcher-{digest}")
+            if not os.path.exists(path):
+                os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                subprocess.run(
+                    ["gcc", "-O2", "-o", temp_path, LAUNCHER_SOURCE],
+                    check=True,
+                    capture_output=True,
+                    timeout=30
+                )
+                os.replace(temp_path, path)
+            _launcher['path'] = path
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.error(f"Could not build the sandbox launcher, runs will not report CPU time or memory: {e}")
+            _launcher['failed'] = True
+        return _launcher['path']
+
+def run_executable(exec_path, user_input="", timeout=5, output_limit=OUTPUT_LIMIT_BYTES):
+    """
+    Run a compiled program under the sandbox resource limits and profile it
+
+    The program is started through the launcher, which reaps it with wait4()
+    and reports its CPU time and peak memory. RLIMIT_FSIZE does not apply to
+    pipes, so each stream is read up to output_limit bytes only: a program
+    that writes more is killed and the stream ends with
+    OUTPUT_TRUNCATED_MARKER.
+
+    Args:
+        exec_path (str): Path to the executable
+        user_input (str, optional): Input to provide on stdin
+        timeout (int, optional): Wall-clock limit in seconds
+        output_limit (int, optional): Bytes kept of stdout and of stderr
+
+    Returns:
+        tuple: (stdout, stderr, returncode, profile) where profile is a dict with
+        wall_time_ms, user_time_ms, sys_time_ms and peak_rss_kb (the last three
+        are None if the launcher is unavailable) and output_truncated
+
+    Raises:
+        subprocess.TimeoutExpired: If the program runs longer than timeout (it is
+            killed); the exception's profile attribute holds the measurements
+    """
+    # Ensure input ends with a newline
+    if user_input and not user_input.endswith('\n'):
+        user_input += '\n'
+
+    launcher = launcher_path()
+    report_read, report_write = os.pipe()
+    command = [launcher, str(report_write), exec_path] if launcher else [exec_path]
+
+    started = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(report_write,) if launcher else (),
+            preexec_fn=set_resource_limits  # Apply resource limits
+        )
+    finally:
+        os.close(report_write)
+
+    with os.fdopen(report_read, 'r') as report:
+        # A raw pipe, which monkey patching does not make cooperative; the launcher writes it right after forking
+        program_pid = offload(_read_pid, report) if launcher else process.pid
+
+        # Pipes are serviced from threads so this thread can enforce the timeout
+        output = {}
+        truncated = threading.Event()
+
+        def feed_input():
+            try:
+                if user_input:
+                    process.stdin.write(user_input.encode('utf-8'))
+                process.stdin.close()
+            except OSError:
+                pass  # The program exited without reading all of its input
+
+        def read_output(name, stream):
+            # One byte past the limit tells a cut-off stream from one that is exactly at it.
+            # Green pipes may return short reads, so read until EOF or that byte.
+            chunks, size = [], 0
+            while size <= output_limit:
+                chunk = stream.read(output_limit + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            data = b''.join(chunks)
+            # Decoded with universal newlines, as a text mode pipe would
+            text = data[:output_limit].decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+            if len(data) > output_limit:
+                truncated.set()
+                _kill(program_pid)  # Rather than let it block on the full pipe until the timeout
+                text += OUTPUT_TRUNCATED_MARKER.format(limit=output_limit)
+            output[name] = text
+
+        stdout_reader = threading.Thread(target=read_output, args=('stdout', process.stdout), daemon=True)
+        stderr_reader = threading.Thread(target=read_output, args=('stderr', process.stderr), daemon=True)
+        writer = threading.Thread(target=feed_input, daemon=True)
+        for thread in (stdout_reader, stderr_reader, writer):
+            thread.start()
+
+        # stdout reaches EOF when the program exits, so this usually returns right then
+        deadline = started + timeout
+        stdout_reader.join(max(0, deadline - time.perf_counter()))
+        timed_out = False
+        try:
+            process.wait(max(0, deadline - time.perf_counter()))
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            _kill(program_pid)
+            try:
+                process.wait(1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        wall_time = time.perf_counter() - started
+
+        for thread in (stdout_reader, stderr_reader, writer):
+            thread.join(1)
+        stdout, stderr = output.get('stdout', ''), output.get('stderr', '')
+
+        profile = {
+            "wall_time_ms": round(wall_time * 1000, 2),
+            "user_time_ms": None,
+            "sys_time_ms": None,
+            "peak_rss_kb": None,
+            "output_truncated": truncated.is_set()
+        }
+        returncode = process.returncode
+        usage = report.readline().split() if launcher else None
+        if usage and len(usage) == 4:
+            status, user_usec, sys_usec, max_rss_kb = (int(value) for value in usage)
+            returncode = os.waitstatus_to_exitcode(status)
+            profile.update(
+                user_time_ms=round(user_usec / 1000, 2),
+                sys_time_ms=round(sys_usec / 1000, 2),
+                peak_rss_kb=max_rss_kb  # Kilobytes on Linux
+            )
+
+    if timed_out:
+        error = subprocess.TimeoutExpired([exec_path], timeout, output=stdout, stderr=stderr)
+        error.profile = profile
+        raise error
+
+    return stdout, stderr, returncode, profile
+
+def cpu_time_ms(profile):
+    """Total CPU time of a profiled run, or None if it was not measured"""
+    if profile.get("user_time_ms") is None:
+        return None
+    return profile["user_time_ms"] + profile["sys_time_ms"]
+
+def _read_pid(report):
+    line = report.readline()
+    return int(line) if line.strip() else None
+
+def _kill(pid):
+    if pid is None:
+        return
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,57 @@
+/* sandbox_launcher.c
+ *
+ * Runs a program as a child of this small process and reports the program's
+ * own resource usage. Linux carries the memory high-water mark of a process
+ * across exec(), so a program forked directly from the (large) server process
+ * would always report at least the server's size as its peak RSS.
+ *
+ * Usage: sandbox_launcher <report fd> <program> [args...]
+ *
+ * Writes "<pid>\n" to the report fd once the program has started, and
+ * "<wait status> <user usec> <sys usec> <max rss kb>\n" when it exits.
+ */
+#include <errno.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <unistd.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+
+static long usec(struct timeval tv)
+{
+    return (long)tv.tv_sec * 1000000L + (long)tv.tv_usec;
+}
+
+int main(int argc, char **argv)
+{
+    if (argc < 3)
+        return 2;
+
+    int report_fd = atoi(argv[1]);
+    FILE *report = fdopen(report_fd, "w");
+    if (!report)
+        return 2;
+
+    pid_t pid = fork();
+    if (pid < 0)
+        return 2;
+    if (pid == 0) {
+        fclose(report);
+        execv(argv[2], &argv[2]);
+        _exit(127);
+    }
+
+    fprintf(report, "%d\n", (int)pid);
+    fflush(report);
+
+    int status;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR)
+            return 2;
+    }
+
+    fprintf(report, "%d %ld %ld %ld\n", status, usec(usage.ru_utime), usec(usage.ru_stime), usage.ru_maxrss);
+    fclose(report);
+    return 0;
+}
@@ -0,0 +1,279 @@
+# search.py
+import re
+import html
+import logging
+from sqlalchemy import text
+from models import db, Project, Exercise, ChatMessage, User
+from metrics import metrics
+
+# Results per page of /api/search, and the most a client may ask for
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+# Query terms used at most; longer queries are truncated
+SEARCH_MAX_TERMS = 8
+
+# Rows indexed per transaction by rebuild_search_index()
+REINDEX_BATCH_SIZE = 500
+
+# Document kinds, each with the code that keeps its index row IDs unique: row ID = ref_id * 4 + code
+KINDS = {'project': 1, 'exercise': 2, 'chat': 3}
+
+# Snippet highlight markers; they cannot occur in indexed text once escaped, and become <mark> tags
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+# Titles count this many times as much as bodies when ranking
+TITLE_WEIGHT = 10.0
+
+# SQLite: FTS5 table whose rowid is the document ID. "_" is part of a word, so identifiers stay whole.
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, body, kind UNINDEXED, ref_id UNINDEXED, project_id UNINDEXED, "
+    "tokenize = \"unicode61 tokenchars '_'\")",
+]
+
+# PostgreSQL: a generated tsvector with a GIN index. The 'simple' configuration does not stem,
+# which suits source code and keeps prefix queries predictable.
+POSTGRES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS search_index ("
+    "doc_id BIGINT PRIMARY KEY, kind VARCHAR(16) NOT NULL, ref_id INTEGER NOT NULL, project_id INTEGER, "
+    "title TEXT NOT NULL DEFAULT '', body TEXT NOT NULL DEFAULT '', "
+    "document TSVECTOR GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_project_id ON search_index (project_id)",
+]
+
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+def _dialect():
+    return db.engine.dialect.name
+
+def search_supported():
+    """True if the database has a full-text index (SQLite with FTS5, or PostgreSQL)"""
+    return _dialect() in ('sqlite', 'postgresql')
+
+def ensure_search_index(connection=None):
+    """
+    Create the search index if missing (no-op on databases without full-text search)
+
+    db.create_all() calls this through a listener in models.py.
+    """
+    dialect = connection.dialect.name if connection is not None else _dialect()
+    schema = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(dialect, [])
+    if connection is not None:
+        for statement in schema:
+            connection.execute(text(statement))
+        return
+    with db.engine.begin() as connection:
+        for statement in schema:
+            connection.execute(text(statement))
+
+def _doc_id(kind, ref_id):
+    return int(ref_id) * 4 + KINDS[kind]
+
+def _upsert(executor, kind, ref_id, project_id, title, body):
+    params = {
+        'doc_id': _doc_id(kind, ref_id), 'kind': kind, 'ref_id': int(ref_id),
+        'project_id': int(project_id) if project_id is not None else None, 'title': title or '', 'body': body or '',
+    }
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        # FTS5 has no upsert; replace the row by rowid
+        executor.execute(text("DELETE FROM search_index WHERE rowid = :doc_id"), params)
+        executor.execute(text(
+            "INSERT INTO search_index (rowid, title, body, kind, ref_id, project_id) "
+            "VALUES (:doc_id, :title, :body, :kind, :ref_id, :project_id)"
+        ), params)
+    elif dialect == 'postgresql':
+        executor.execute(text(
+            "INSERT INTO search_index (doc_id, kind, ref_id, project_id, title, body) "
+            "VALUES (:doc_id, :kind, :ref_id, :project_id, :title, :body) "
+            "ON CONFLICT (doc_id) DO UPDATE SET project_id = excluded.project_id, "
+            "title = excluded.title, body = excluded.body"
+        ), params)
+
+def _id_column():
+    return 'rowid' if _dialect() == 'sqlite' else 'doc_id'
+
+def index_project(project_id, name, content, connection=None):
+    """
+    Add or refresh a project in the search index, as part of the caller's transaction
+
+    Args:
+        project_id: Project ID
+        name: Project name
+        content: Project source
+        connection: Core connection to execute on instead of db.session
+    """
+    _upsert(connection if connection is not None else db.session, 'project', project_id, project_id, name, content)
+
+def exercise_text(description, category):
+    """The searchable body of an exercise: its category and its description without HTML"""
+    return f"{category or ''}\n{html.unescape(_TAG_PATTERN.sub(' ', description or ''))}"
+
+def index_exercise(exercise):
+    """Add or refresh an exercise in the search index, as part of the session's transaction"""
+    _upsert(db.session, 'exercise', exercise.id, None, exercise.title,
+            exercise_text(exercise.description, exercise.category))
+
+def index_chat_messages(messages):
+    """Add saved ChatMessage rows to the search index, as part of the session's transaction"""
+    for message in messages:
+        _upsert(db.session, 'chat', message.id, message.project_id, '', message.message)
+
+def remove_from_search(kind, ref_id):
+    """Remove one document from the search index, as part of the session's transaction"""
+    if search_supported():
+        db.session.execute(text(f"DELETE FROM search_index WHERE {_id_column()} = :doc_id"),
+                           {'doc_id': _doc_id(kind, ref_id)})
+
+def remove_project_from_search(project_id):
+    """Remove a project and its chat messages from the search index, as part of the session's transaction"""
+    if search_supported():
+        db.session.execute(text("DELETE FROM search_index WHERE project_id = :project_id"),
+                           {'project_id': int(project_id)})
+
+def rebuild_search_index():
+    """
+    Index every project, exercise and chat message from scratch
+
+    Rows are read in id order and committed in batches of REINDEX_BATCH_SIZE,
+    so memory stays flat on large tables.
+
+    Returns:
+        Number of indexed documents
+    """
+    if not search_supported():
+        return 0
+    ensure_search_index()
+    db.session.execute(text("DELETE FROM search_index"))
+    db.session.commit()
+
+    indexed = 0
+    for model, index in [
+        (Project, lambda rows: [index_project(row.id, row.name, row.content) for row in rows]),
+        (Exercise, lambda rows: [index_exercise(row) for row in rows]),
+        (ChatMessage, index_chat_messages),
+    ]:
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(REINDEX_BATCH_SIZE).all()
+            if not rows:
+                break
+            index(rows)
+            db.session.commit()
+            indexed += len(rows)
+            last_id = rows[-1].id
+    logging.info(f"Indexed {indexed} documents for search")
+    return indexed
+
+def search_index_size():
+    return db.session.execute(text("SELECT count(*) FROM search_index")).scalar() if search_supported() else 0
+
+def _query_terms(query):
+    # The words of the query as each backend tokenizes text: FTS5 keeps "_" inside words, PostgreSQL splits on it
+    pattern = r"\w+" if _dialect() == 'sqlite' else r"[^\W_]+"
+    return re.findall(pattern, query.lower())[:SEARCH_MAX_TERMS]
+
+def _match_expression(terms):
+    """All terms must match; the last one may be a prefix, since users search as they type"""
+    if _dialect() == 'sqlite':
+        return " ".join(f'"{term}"' for term in terms) + "*"
+    return " & ".join(terms) + ":*"
+
+# Projects the user owns or collaborates on
+ACCESSIBLE_PROJECTS = (
+    "SELECT id FROM project WHERE owner_id = :user_id "
+    "UNION SELECT project_id FROM project_collaborators WHERE user_id = :user_id"
+)
+
+def _highlighted(value):
+    """HTML-escape an index snippet and turn its markers into <mark> tags"""
+    return html.escape(value or '').replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+def search(user_id, query, kinds=None, page=1, per_page=SEARCH_PAGE_SIZE):
+    """
+    Full-text search over the projects a user can open, all exercises and
+    the chat of the user's projects
+
+    Access is checked in the query itself: project and chat documents carry
+    their project ID and only match when the user owns or collaborates on
+    that project, so sharing changes take effect without reindexing.
+
+    Args:
+        user_id: ID of the searching user
+        query: Free text; every word must match, the last one as a prefix
+        kinds: Document kinds to search (subset of KINDS), or None for all
+        page: 1-based page number
+        per_page: Results per page
+
+    Returns:
+        {"results": [{"kind", "id", "project_id", "title", "title_html", "snippet_html", ...}],
+         "page", "per_page", "has_more"}, best matches first. Chat results also
+        have "project_name", "username" and "sent_at".
+    """
+    kinds = [kind for kind in (kinds or KINDS) if kind in KINDS]
+    terms = _query_terms(query)
+    if not terms or not kinds:
+        return {'results': [], 'page': page, 'per_page': per_page, 'has_more': False}
+
+    params = {'user_id': user_id, 'match': _match_expression(terms), 'limit': per_page + 1,
+              'offset': (page - 1) * per_page, 'start': _MARK_START, 'end': _MARK_END}
+    kind_list = ", ".join(f"'{kind}'" for kind in kinds)  # Validated against KINDS above
+    where = f"kind IN ({kind_list}) AND (project_id IS NULL OR project_id IN ({ACCESSIBLE_PROJECTS}))"
+
+    if _dialect() == 'sqlite':
+        statement = text(
+            f"SELECT kind, ref_id, project_id, title, highlight(search_index, 0, :start, :end), "
+            f"snippet(search_index, 1, :start, :end, '…', 16) "
+            f"FROM search_index WHERE search_index MATCH :match AND {where} "
+            f"ORDER BY bm25(search_index, {TITLE_WEIGHT}, 1.0) LIMIT :limit OFFSET :offset"
+        )
+    else:
+        headline = "'StartSel=\"' || :start || '\", StopSel=\"' || :end || '\", MaxWords=24, MinWords=8'"
+        statement = text(
+            f"SELECT kind, ref_id, project_id, title, ts_headline('simple', title, q, {headline}), "
+            f"ts_headline('simple', body, q, {headline}) "
+            f"FROM search_index, to_tsquery('simple', :match) AS q WHERE document @@ q AND {where} "
+            f"ORDER BY ts_rank(document, q) DESC, doc_id LIMIT :limit OFFSET :offset"
+        )
+
+    with metrics.span("search.query"):
+        rows = db.session.execute(statement, params).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    results = [
+        {
+            'kind': kind,
+            'id': ref_id,
+            'project_id': project_id,
+            'title': title,
+            'title_html': _highlighted(title_html),
+            'snippet_html': _highlighted(snippet),
+        }
+        for kind, ref_id, project_id, title, title_html, snippet in rows
+    ]
+    _add_details(results)
+    return {'results': results, 'page': page, 'per_page': per_page, 'has_more': has_more}
+
+def _add_details(results):
+    """Name the project of project and chat results, and the sender and time of chat results"""
+    project_ids = {result['project_id'] for result in results if result['project_id'] is not None}
+    names = dict(db.session.query(Project.id, Project.name).filter(Project.id.in_(project_ids)).all()) if project_ids else {}
+
+    chat_ids = [result['id'] for result in results if result['kind'] == 'chat']
+    chats = {
+        message_id: (username, sent_at)
+        for message_id, username, sent_at in db.session.query(ChatMessage.id, User.username, ChatMessage.sent_at)
+        .join(User, ChatMessage.user_id == User.id).filter(ChatMessage.id.in_(chat_ids)).all()
+    } if chat_ids else {}
+
+    for result in results:
+        if result['project_id'] is not None:
+            result['project_name'] = names.get(result['project_id'])
+        if result['kind'] == 'chat':
+            username, sent_at = chats.get(result['id'], (None, None))
+            result['username'] = username
+            result['sent_at'] = sent_at.isoformat() if sent_at else None
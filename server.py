@@ -1,19 +1,39 @@
 # server.py
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from concurrency import ASYNC_MODE, cooperative, patch_standard_library
+patch_standard_library()  # Before anything else imports socket, threading or subprocess
+
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, abort, g, Response
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
+import atexit
 import logging
 import subprocess
 import tempfile
 import json
-import resource
+import time
+import shutil
+import hashlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
+from sqlalchemy import select, inspect
 from dotenv import load_dotenv
-from models import User, Project, Document, Exercise, ExerciseProgress, CompilationHistory, ChatMessage, db, app
-from exercise_manager import create_sample_exercises
+from models import User, Project, Document, Exercise, ExerciseProgress, ChatMessage, db, app, store_blob
+from exercise_manager import get_all_exercises, get_exercise_by_id, exercise_cache_version
+from http_cache import conditional_response, compress_response
+from code_scanner import scan_code, DANGEROUS_CALLS, INPUT_CALLS
+from builder import build_project, forget_project, is_valid_filename
+from sandbox import run_executable, cpu_time_ms
+from auth import password_hasher, login_limiter, login_latency, AuthBusyError, AUTH_RETRY_AFTER
 from admin import admin_bp
+from assets import assets_bp
+from batch_writer import history_writer, ChatWriter
+from metrics import metrics
+from doc_sync import doc_sync, parse_accept
+from document_store import DocumentStore
+from diagnostics import DiagnosticsScheduler, DIAGNOSTICS_FORMAT_FLAGS, parse_diagnostics, format_diagnostics
+from db_config import pool_stats, engine_options
+from regrade import regrader
+from search import search, search_supported, index_project, remove_project_from_search, KINDS, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
 
 load_dotenv()
 
@@ -23,51 +43,103 @@ app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "INSECURE_DEFAULT_KEY")
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL", 'sqlite:///site.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.register_blueprint(admin_bp)
+app.register_blueprint(assets_bp)
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*")
 
-bcrypt = Bcrypt(app)
-socketio = SocketIO(app, cors_allowed_origins=allowed_origins)
+socketio = SocketIO(app, cors_allowed_origins=allowed_origins, async_mode=ASYNC_MODE)
 
 # Track connected users by session ID
 connected_users = {}
-active_projects = {}  # Project ID -> Document Content
-
-# Set resource limits for child processes
-def set_resource_limits():
-    """Set resource limits for child processes"""
-    # Limit memory usage (32MB)
-    resource.setrlimit(resource.RLIMIT_AS, (32 * 1024 * 1024, 32 * 1024 * 1024))
-    # Limit CPU time (2 seconds)
-    resource.setrlimit(resource.RLIMIT_CPU, (2, 2))
-    # Limit file size creation (1MB)
-    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
-
-# Add this function to detect potentially dangerous code
+client_projects = {}  # Session ID -> ID of the project the client is editing
+
+def open_project_ids():
+    """IDs (as strings) of the projects that have connected clients"""
+    return {str(project_id) for project_id in list(client_projects.values())}
+
+def read_project_content(project_id):
+    project = Project.query.get(project_id)
+    return (project.content or "") if project else None
+
+def write_project_content(project_id, text):
+    """Write a live document back in its own transaction, leaving the request's session alone"""
+    projects = Project.__table__
+    with db.engine.begin() as connection:
+        connection.execute(
+            projects.update()
+            .where(projects.c.id == int(project_id))
+            .values(content_hash=store_blob(text, connection), updated_at=datetime.utcnow())
+        )
+        name = connection.execute(select(projects.c.name).where(projects.c.id == int(project_id))).scalar()
+        if name is not None:
+            index_project(project_id, name, text, connection)
+
+def forget_live_document(project_id):
+    """Drop the per-project state kept alongside a live document"""
+    doc_sync.log.forget(project_id)
+    diagnostics_scheduler.forget(project_id)
+
+# Project ID -> Document Content, evicted when idle or over the memory budget
+active_projects = DocumentStore(
+    load=read_project_content,
+    save=write_project_content,
+    open_projects=open_project_ids,
+    on_evict=forget_live_document
+)
+
+def publish_diagnostics(project_id, payload):
+    socketio.emit("diagnostics", payload, to=f"project_{project_id}")
+
+# Syntax checks of each project's document once edits settle
+diagnostics_scheduler = DiagnosticsScheduler(get_source=active_projects.get, publish=publish_diagnostics)
+
+def flush_documents():
+    """Write back edited documents at shutdown"""
+    with app.app_context():
+        active_projects.flush()
+
+atexit.register(flush_documents)
+
+# Chat history pagination
+CHAT_PAGE_SIZE = 50
+CHAT_MAX_PAGE_SIZE = 200
+
+# When set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+app.after_request(compress_response)
+
+@app.teardown_request
+def record_request_time(exception=None):
+    """Record the duration of every HTTP request, per endpoint"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe(f"http.{request.endpoint or 'unmatched'}", time.perf_counter() - started)
+
+SECURITY_CHECK_MESSAGE = "Your code contains potentially dangerous system or file operations that are not allowed for security reasons. Please avoid using system(), popen(), file I/O operations, and other similar functions."
+
 def check_for_dangerous_code(code):
     """
     Check for potentially dangerous code patterns that could be used maliciously.
-    Returns True if dangerous patterns are detected, False otherwise.
+    Comments and string literals are ignored, and verdicts are cached per source.
+    Returns the ScanResult (truthy) if a dangerous call is detected, None otherwise.
     """
-    dangerous_patterns = [
-        r'system\s*\(',       # system() calls to execute shell commands
-        r'popen\s*\(',        # popen() calls for creating processes
-        r'fopen\s*\(',        # File operations that could write to the filesystem
-        r'fwrite\s*\(',       # File write operations
-        r'fprintf\s*\(',      # File write operations
-        r'exec[lv][pe]\s*\(', # exec family of functions
-        r'fork\s*\(',         # Process creation
-        r'unlink\s*\(',       # File deletion
-        r'remove\s*\(',       # File deletion
-        r'rename\s*\(',       # File renaming
-        r'mkdir\s*\(',        # Directory creation
-        r'rmdir\s*\('         # Directory removal
-    ]
-    
-    import re
-    for pattern in dangerous_patterns:
-        if re.search(pattern, code):
-            return True
-    return False
+    scan = scan_code(code)
+    return scan if scan.dangerous_call else None
+
+def security_check_failure(scan, **extra):
+    """Build the security_check failure response for a dangerous scan result"""
+    return {
+        "success": False,
+        "stage": "security_check",
+        "output": f"{SECURITY_CHECK_MESSAGE}\nFound {scan.dangerous_call}() on line {scan.line}: {DANGEROUS_CALLS[scan.dangerous_call]}.",
+        "pattern": scan.dangerous_call,
+        "line": scan.line,
+        **extra
+    }
 
 # The implementation function for executing code
 def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None, user_input="", compile_only=False):
@@ -92,55 +164,56 @@ def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None,
     
     try:
         # Write code to file
-        with open(source_path, 'w', encoding='utf-8') as f:
-            f.write(code)
+        with metrics.span("execute.setup"):
+            with open(source_path, 'w', encoding='utf-8') as f:
+                f.write(code)
         
         # Check for potentially dangerous code
-        if check_for_dangerous_code(code):
-            return {
-                "success": False,
-                "stage": "security_check",
-                "output": "Your code contains potentially dangerous system or file operations that are not allowed for security reasons. Please avoid using system(), popen(), file I/O operations, and other similar functions."
-            }
+        with metrics.span("execute.security_check"):
+            dangerous = check_for_dangerous_code(code)
+        if dangerous:
+            return security_check_failure(dangerous)
         
         # Compile the code with standard library paths
         compile_command = [
             "gcc", 
-            source_path, 
+            "source.c",  # Relative, so diagnostics name the file rather than the temp directory
             "-o", exec_path,
             "-std=c11",      # Use C11 standard for modern features
             "-Wall",         # Enable all warnings
             "-I/usr/include",  # Standard include directory
             "-I/usr/local/include",  # Local include directory
             "-lm"            # Link with the math library
-        ]
+        ] + DIAGNOSTICS_FORMAT_FLAGS
         
-        compile_result = subprocess.run(
-            compile_command,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
+        with metrics.span("execute.compile"):
+            compile_result = subprocess.run(
+                compile_command,
+                capture_output=True,
+                text=True,
+                timeout=5,
+                cwd=temp_dir
+            )
+        diagnostics = parse_diagnostics(compile_result.stderr)
 
         if compile_result.returncode != 0:
             # Compilation failed
             if 'user_id' in session:
-                compilation_history = CompilationHistory(
+                history_writer.submit(
                     user_id=session['user_id'],
                     project_id=project_id,
                     document_id=document_id,
                     exercise_id=exercise_id,
                     code=code,
-                    compilation_output=compile_result.stderr,
+                    diagnostics=diagnostics,
                     status='compilation_error'
                 )
-                db.session.add(compilation_history)
-                db.session.commit()
             
             return {
                 "success": False,
                 "stage": "compilation",
-                "output": compile_result.stderr
+                "output": format_diagnostics(diagnostics),
+                "diagnostics": diagnostics
             }
             
         # If compile_only is True, return success without executing
@@ -148,12 +221,12 @@ def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None,
             return {
                 "success": True,
                 "stage": "compilation",
-                "output": "Compilation successful"
+                "output": "Compilation successful",
+                "diagnostics": diagnostics
             }
 
-        # Check if the program expects input
-        input_functions = ["scanf", "gets", "fgets", "getchar", "getc", "read", "fscanf"]
-        needs_input = any(func in code for func in input_functions)
+        # Check if the program expects input (reuses the cached security scan)
+        needs_input = bool(scan_code(code).calls & INPUT_CALLS)
         
         # If program needs input but no input is provided
         if needs_input and not user_input:
@@ -161,32 +234,19 @@ def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None,
                 "success": True,
                 "stage": "needs_input",
                 "stdout": "This program requires input. Please provide input below.",
-                "needs_input": True
+                "needs_input": True,
+                "diagnostics": diagnostics
             }
 
         # Execute the program with the provided input
         try:
-            process = subprocess.Popen(
-                [exec_path],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                preexec_fn=set_resource_limits  # Apply resource limits
-            )
-            
-            # Ensure input ends with a newline
-            if user_input and not user_input.endswith('\n'):
-                user_input += '\n'
-                
-            # Use communicate with a timeout to prevent deadlocks
-            stdout, stderr = process.communicate(input=user_input, timeout=5)
-            returncode = process.returncode
+            with metrics.span("execute.run"):
+                stdout, stderr, returncode, profile = run_executable(exec_path, user_input)
             
-            # Save compilation history
+            # Save compilation history (written asynchronously in batches)
             if 'user_id' in session:
                 status = 'success' if returncode == 0 else 'runtime_error'
-                compilation_history = CompilationHistory(
+                history_writer.submit(
                     user_id=session['user_id'],
                     project_id=project_id,
                     document_id=document_id,
@@ -194,10 +254,10 @@ def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None,
                     code=code,
                     compilation_output="Compilation successful",
                     execution_output=stdout + stderr,
-                    status=status
+                    diagnostics=diagnostics,
+                    status=status,
+                    **profile
                 )
-                db.session.add(compilation_history)
-                db.session.commit()
 
             return {
                 "success": True,
@@ -205,16 +265,32 @@ def execute_code_impl(code, project_id=None, document_id=None, exercise_id=None,
                 "stdout": stdout,
                 "stderr": stderr,
                 "returncode": returncode,
-                "needs_input": needs_input
+                "needs_input": needs_input,
+                "profile": profile,
+                "diagnostics": diagnostics
             }
 
-        except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
+        except subprocess.TimeoutExpired as e:
+            # Runaway programs are recorded too, so they can be found in the history
+            if 'user_id' in session:
+                history_writer.submit(
+                    user_id=session['user_id'],
+                    project_id=project_id,
+                    document_id=document_id,
+                    exercise_id=exercise_id,
+                    code=code,
+                    compilation_output="Compilation successful",
+                    execution_output=(e.output or "") + (e.stderr or ""),
+                    diagnostics=diagnostics,
+                    status='timeout',
+                    **e.profile
+                )
             return {
                 "success": False,
                 "stage": "execution",
-                "output": "Execution timed out after 5 seconds"
+                "output": "Execution timed out after 5 seconds",
+                "profile": e.profile,
+                "diagnostics": diagnostics
             }
         except Exception as e:
             return {
@@ -251,7 +327,10 @@ def register():
         if existing_email:
             return render_template('register.html', error="Email already in use")
 
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        try:
+            hashed_password = password_hasher.generate_password_hash(password)
+        except AuthBusyError as e:
+            return render_template('register.html', error=str(e)), 503, {'Retry-After': str(AUTH_RETRY_AFTER)}
         new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
@@ -265,17 +344,31 @@ def register():
 @app.route("/login", methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
+        started = time.perf_counter()
         username = request.form.get('username')
         password = request.form.get('password')
+        ip = request.remote_addr
+
+        if login_limiter.is_limited(username, ip):
+            return render_template('login.html', error="Too many failed login attempts. Please wait a minute and try again."), 429
 
         user = User.query.filter_by(username=username).first()
 
-        if user and bcrypt.check_password_hash(user.password, password):
+        try:
+            valid = bool(user) and password_hasher.check_password_hash(user.password, password)
+        except AuthBusyError as e:
+            return render_template('login.html', error=str(e)), 503, {'Retry-After': str(AUTH_RETRY_AFTER)}
+        finally:
+            login_latency.record(time.perf_counter() - started)
+
+        if valid:
+            login_limiter.reset(username)
             session['user_id'] = user.id
             session['username'] = user.username
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
         else:
+            login_limiter.record_failure(username, ip)
             return render_template('login.html', error="Invalid credentials")
 
     return render_template('login.html')
@@ -350,6 +443,8 @@ def new_project():
         user_id = session['user_id']
         project = Project(name=name, owner_id=user_id)
         db.session.add(project)
+        db.session.flush()
+        index_project(project.id, name, None)
         db.session.commit()
         
         flash(f'Project "{name}" created successfully!', 'success')
@@ -420,6 +515,13 @@ def invite_collaborator(project_id):
     return redirect(url_for('project', project_id=project_id))
 
 
+@app.route("/metrics")
+def prometheus_metrics():
+    """Stage latency histograms and component gauges in Prometheus text format"""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route("/execute_code", methods=["POST"])
 def execute_code():
     if 'user_id' not in session:
@@ -471,38 +573,42 @@ def analyze_memory():
             f.write(code)
         
         # Check for potentially dangerous code
-        if check_for_dangerous_code(code):
-            return jsonify({
-                "success": False,
-                "stage": "security_check",
-                "output": "Your code contains potentially dangerous system or file operations that are not allowed for security reasons. Please avoid using system(), popen(), file I/O operations, and other similar functions."
-            })
+        with metrics.span("memory.security_check"):
+            dangerous = check_for_dangerous_code(code)
+        if dangerous:
+            return jsonify(security_check_failure(dangerous))
         
         # Compile the code with debug info
-        compile_result = subprocess.run(
-            ["gcc", source_path, "-o", exec_path, "-g", "-std=c11", "-I/usr/include", "-I/usr/local/include", "-lm"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
+        with metrics.span("memory.compile"):
+            compile_result = subprocess.run(
+                ["gcc", "source.c", "-o", exec_path, "-g", "-std=c11", "-I/usr/include", "-I/usr/local/include", "-lm"]
+                + DIAGNOSTICS_FORMAT_FLAGS,
+                capture_output=True,
+                text=True,
+                timeout=5,
+                cwd=temp_dir
+            )
 
         if compile_result.returncode != 0:
+            diagnostics = parse_diagnostics(compile_result.stderr)
             return jsonify({
                 "success": False,
                 "stage": "compilation",
-                "output": compile_result.stderr
+                "output": format_diagnostics(diagnostics),
+                "diagnostics": diagnostics
             })
         
         # Run with Valgrind for memory analysis
         try:
-            valgrind_result = subprocess.run(
-                ["valgrind", "--leak-check=full", "--show-leak-kinds=all", 
-                 "--track-origins=yes", "--log-file=valgrind.log", exec_path],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
+            with metrics.span("memory.valgrind"):
+                valgrind_result = subprocess.run(
+                    ["valgrind", "--leak-check=full", "--show-leak-kinds=all", 
+                     "--track-origins=yes", "--log-file=valgrind.log", exec_path],
+                    capture_output=True,
+                    text=True,
+                    timeout=10,
+                    cwd=temp_dir
+                )
             
             # Parse Valgrind output
             valgrind_log = os.path.join(temp_dir, "valgrind.log")
@@ -579,27 +685,34 @@ def analyze_memory():
             pass
 
 # Updated execute_test_cases to use our implementation
-def execute_test_cases(code, test_cases_json):
-    test_cases = json.loads(test_cases_json)
+def execute_test_cases(code, test_cases):
+    """
+    Run code against a list of test cases (dicts with 'input' and 'expected_output')
+    
+    A test case may also set "time_limit_ms" (CPU time) and "memory_limit_kb"
+    (peak resident memory); exceeding either fails the test, as does writing
+    more than OUTPUT_LIMIT_BYTES. Every result carries the run's profile.
+    """
+    if isinstance(test_cases, str):
+        test_cases = json.loads(test_cases)
     results = []
     
     # Check for potentially dangerous code first
-    if check_for_dangerous_code(code):
-        return {
-            "success": False,
-            "stage": "security_check",
-            "output": "Your code contains potentially dangerous system or file operations that are not allowed for security reasons. Please avoid using system(), popen(), file I/O operations, and other similar functions.",
-            "results": []
-        }
+    with metrics.span("judge.security_check"):
+        dangerous = check_for_dangerous_code(code)
+    if dangerous:
+        return security_check_failure(dangerous, results=[])
     
     # Compile the code using our implementation function
-    compile_result = execute_code_impl(code, compile_only=True)
+    with metrics.span("judge.compile"):
+        compile_result = execute_code_impl(code, compile_only=True)
     
     if not compile_result.get("success", False):
         return {
             "success": False,
             "stage": "compilation",
             "output": compile_result.get("output", "Compilation failed"),
+            "diagnostics": compile_result.get("diagnostics", []),
             "results": []
         }
     
@@ -619,7 +732,7 @@ def execute_test_cases(code, test_cases_json):
         # Compile with the same options
         compile_command = [
             "gcc", 
-            source_path, 
+            source_path,
             "-o", exec_path,
             "-std=c11",
             "-Wall",
@@ -628,51 +741,54 @@ def execute_test_cases(code, test_cases_json):
             "-lm"            # Link with the math library
         ]
         
-        subprocess.run(compile_command, check=True, capture_output=True)
+        with metrics.span("judge.compile"):
+            subprocess.run(compile_command, check=True, capture_output=True)
         
         # Execute test cases
         for i, test_case in enumerate(test_cases):
             input_data = test_case.get("input", "")
             expected_output = test_case.get("expected_output", "").strip()
+            time_limit_ms = test_case.get("time_limit_ms")
+            memory_limit_kb = test_case.get("memory_limit_kb")
+            
+            result = {
+                "test_case": i + 1,
+                "input": input_data,
+                "expected": expected_output
+            }
+            
+            # A runaway solution is stopped soon after it exceeds its CPU budget
+            timeout = 5
+            if time_limit_ms:
+                timeout = min(timeout, time_limit_ms / 1000 * 2 + 0.5)
             
             try:
-                execution_result = subprocess.run(
-                    [exec_path],
-                    input=input_data,
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                    preexec_fn=set_resource_limits
-                )
-                
-                actual_output = execution_result.stdout.strip()
+                with metrics.span("judge.test_case"):
+                    actual_output, _, _, profile = run_executable(exec_path, input_data, timeout=timeout)
+                actual_output = actual_output.strip()
+                cpu_time = cpu_time_ms(profile)
                 
-                if actual_output == expected_output:
-                    results.append({
-                        "test_case": i + 1,
-                        "status": "passed",
-                        "input": input_data,
-                        "expected": expected_output,
-                        "actual": actual_output
-                    })
+                if profile["output_truncated"]:
+                    status = "output_limit_exceeded"
+                elif time_limit_ms and cpu_time is not None and cpu_time > time_limit_ms:
+                    status = "time_limit_exceeded"
+                elif memory_limit_kb and profile["peak_rss_kb"] is not None and profile["peak_rss_kb"] > memory_limit_kb:
+                    status = "memory_limit_exceeded"
+                elif actual_output == expected_output:
+                    status = "passed"
                 else:
-                    all_passed = False
-                    results.append({
-                        "test_case": i + 1,
-                        "status": "failed",
-                        "input": input_data,
-                        "expected": expected_output,
-                        "actual": actual_output
-                    })
-            except subprocess.TimeoutExpired:
+                    status = "failed"
+                result.update(status=status, actual=actual_output, profile=profile)
+            except subprocess.TimeoutExpired as e:
+                if time_limit_ms:
+                    result.update(status="time_limit_exceeded", actual=f"Exceeded the time limit of {time_limit_ms} ms")
+                else:
+                    result.update(status="timeout", actual="Execution timed out after 5 seconds")
+                result["profile"] = e.profile
+            
+            if result["status"] != "passed":
                 all_passed = False
-                results.append({
-                    "test_case": i + 1,
-                    "status": "timeout",
-                    "input": input_data,
-                    "expected": expected_output,
-                    "actual": "Execution timed out after 5 seconds"
-                })
+            results.append(result)
     except Exception as e:
         return {
             "success": False,
@@ -693,6 +809,9 @@ def execute_test_cases(code, test_cases_json):
         "results": results
     }
 
+# Admin re-judge jobs grade submissions with the same judge as submit_exercise
+regrader.judge = execute_test_cases
+
 # Exercise routes
 @app.route("/exercises")
 def exercises():
@@ -700,17 +819,30 @@ def exercises():
         return redirect(url_for('login'))
     
     user_id = session['user_id']
-    exercises = Exercise.query.all()
     
     # Get user's progress for each exercise
     progress_dict = {}
     for progress in ExerciseProgress.query.filter_by(user_id=user_id).all():
         progress_dict[progress.exercise_id] = progress
     
-    return render_template(
-        'exercises.html',
-        exercises=exercises,
-        progress_dict=progress_dict
+    # The page depends on the exercise set and on this user's progress only
+    version, exercises_updated_at = exercise_cache_version()
+    progress_state = sorted((p.exercise_id, p.status, p.attempts) for p in progress_dict.values())
+    etag = hashlib.sha1(repr((version, user_id, progress_state)).encode()).hexdigest()
+    last_modified = max(
+        [exercises_updated_at] +
+        [p.last_attempt for p in progress_dict.values() if p.last_attempt] +
+        [p.completed_at for p in progress_dict.values() if p.completed_at]
+    )
+    
+    return conditional_response(
+        etag=etag,
+        last_modified=last_modified,
+        render=lambda: render_template(
+            'exercises.html',
+            exercises=get_all_exercises(),
+            progress_dict=progress_dict
+        )
     )
 
 
@@ -720,7 +852,9 @@ def exercise(exercise_id):
         return redirect(url_for('login'))
     
     user_id = session['user_id']
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = get_exercise_by_id(exercise_id)
+    if not exercise:
+        abort(404)
     
     # Get or create user progress
     progress = ExerciseProgress.query.filter_by(
@@ -756,7 +890,9 @@ def submit_exercise(exercise_id):
     if not code:
         return jsonify({"error": "No code provided"}), 400
     
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = get_exercise_by_id(exercise_id)
+    if not exercise:
+        abort(404)
     progress = ExerciseProgress.query.filter_by(
         user_id=user_id, 
         exercise_id=exercise_id
@@ -772,16 +908,60 @@ def submit_exercise(exercise_id):
     progress.status = 'in_progress'
     
     # Compile and execute the code with test cases
-    result = execute_test_cases(code, exercise.test_cases)
+    result = execute_test_cases(code, exercise.test_case_list)
     
     if result["success"]:
         progress.status = 'completed'
         progress.completed_at = datetime.utcnow()
     
-    db.session.commit()
+    with metrics.span("judge.db_commit"):
+        db.session.commit()
     
     return jsonify(result)
 
+def client_accept(sid):
+    """Binary encodings a connected client accepts for document payloads"""
+    return connected_users.get(sid, {}).get('accept', frozenset())
+
+def send_document_sync(event, payload, text, project_id=None):
+    """
+    Send a document sync payload, as a (compressed) binary frame for each
+    client that accepts one when it is large
+
+    Args:
+        event (str): "document", "document_patch" or "document_synced"
+        payload (dict): Payload from doc_sync
+        text (str): The document text after this message
+        project_id (optional): Broadcast to this project's room except the sender;
+            by default the payload goes to the sender only
+    """
+    if project_id is None:
+        emit(event, doc_sync.encode(event, payload, text, client_accept(request.sid)))
+        return
+
+    room = f"project_{project_id}"
+    groups = {}  # Accepted encodings -> sids
+    for sid, _ in socketio.server.manager.get_participants('/', room):
+        if sid != request.sid:
+            groups.setdefault(client_accept(sid), []).append(sid)
+
+    encoded = {accept: doc_sync.encode(event, payload, text, accept, len(sids)) for accept, sids in groups.items()}
+    if all(data is payload for data in encoded.values()):
+        emit(event, payload, to=room, include_self=False)
+        return
+    for accept, sids in groups.items():
+        for sid in sids:
+            emit(event, encoded[accept], to=sid)
+
+def load_document(project_id):
+    """
+    Get a project's live document, loading it from the database if it is not in memory
+
+    Returns:
+        str: The document text, or None if the project does not exist
+    """
+    return active_projects.load(project_id)
+
 # Socket.IO event handlers
 @socketio.on("connect")
 def handle_connect():
@@ -795,7 +975,8 @@ def handle_connect():
     # Add user to connected users
     connected_users[request.sid] = {
         'user_id': user_id,
-        'username': username
+        'username': username,
+        'accept': parse_accept(request.args.get('accept'))
     }
     
     logging.info(f"User connected: {username} ({request.sid})")
@@ -804,16 +985,14 @@ def handle_connect():
     project_id = request.args.get('project_id')
     if project_id:
         join_room(f"project_{project_id}")
+        client_projects[request.sid] = project_id
         
-        # Send current document state if available
-        if project_id in active_projects:
-            emit("document", {"text": active_projects[project_id]})
-        else:
-            # Load from database if not in memory
-            project = Project.query.get(project_id)
-            if project:
-                active_projects[project_id] = project.content or ""
-                emit("document", {"text": active_projects[project_id]})
+        # Clients that send "accept" follow up with join_project and their
+        # revision; send older clients the current document state now
+        if 'accept' not in request.args:
+            text = load_document(project_id)
+            if text is not None:
+                send_document_sync("document", doc_sync.snapshot(project_id, text), text)
         
         # Notify everyone in the room about the new user
         emit("user_connected", {
@@ -841,16 +1020,18 @@ def handle_disconnect():
         username = connected_users[request.sid]['username']
         logging.info(f"User disconnected: {request.sid} ({username})")
         
-        # Add the namespace parameter '/' here too
-        for room in socketio.server.manager.get_rooms(request.sid, '/'):
-            if room.startswith("project_"):
-                project_id = room[8:]  # Remove "project_" prefix
-                
-                # Notify others in the room
-                emit("user_disconnected", {
-                    "sid": request.sid,
-                    "username": username
-                }, to=room)
+        project_id = client_projects.pop(request.sid, None)
+        if project_id is not None:
+            # Notify others in the room
+            emit("user_disconnected", {
+                "sid": request.sid,
+                "username": username
+            }, to=f"project_{project_id}")
+            
+            # Persist edits as soon as the last client leaves; the document
+            # stays cached until it is evicted
+            if str(project_id) not in open_project_ids():
+                active_projects.flush(project_id)
         
         # Remove user from connected users
         del connected_users[request.sid]
@@ -865,23 +1046,31 @@ def handle_join_project(data):
     if not project_id:
         return
     
-    # Leave current rooms (if any)
-    # Add the namespace parameter '/' here
-    for room in socketio.server.manager.get_rooms(request.sid, '/'):
-        if room.startswith("project_"):
-            leave_room(room)
+    if 'accept' in data:
+        connected_users[request.sid]['accept'] = parse_accept(data['accept'])
+    
+    # Leave the current project room (if any)
+    previous_project_id = client_projects.get(request.sid)
+    if previous_project_id is not None and str(previous_project_id) != str(project_id):
+        leave_room(f"project_{previous_project_id}")
     
     # Join new project room
     join_room(f"project_{project_id}")
-    
-    # Load project from database if not already in memory
-    if project_id not in active_projects:
-        project = Project.query.get(project_id)
-        if project:
-            active_projects[project_id] = project.content or ""
-    
-    # Send current document state
-    emit("document", {"text": active_projects.get(project_id, "")})
+    client_projects[request.sid] = project_id
+    
+    # Send the current document state: just its revision if the client is up
+    # to date, or a patch when the client has a recent revision
+    text = load_document(project_id)
+    event, payload = doc_sync.catch_up(project_id, text or "", data.get('rev'))
+    send_document_sync(event, payload, text or "")
+    
+    # Diagnostics for this revision, or a check if there are none yet
+    if text is not None:
+        latest_diagnostics = diagnostics_scheduler.latest_for(project_id, payload['rev'])
+        if latest_diagnostics:
+            emit("diagnostics", latest_diagnostics)
+        else:
+            diagnostics_scheduler.schedule(project_id)
     
     # Notify others in the room
     emit("user_joined", {
@@ -904,8 +1093,12 @@ def handle_join_project(data):
 
 
 @socketio.on("edit")
+@metrics.timed("edit.total")
 def handle_edit(operation):
-    """Handles edit operations and syncs them with all clients."""
+    """
+    Handles edit operations and syncs them with all clients.
+    Acknowledges with {"base", "rev"}: the revisions before and after the edit.
+    """
     if 'user_id' not in session:
         return
     
@@ -915,47 +1108,52 @@ def handle_edit(operation):
     
     try:
         # Load project content if not in memory
-        if project_id not in active_projects:
-            project = Project.query.get(project_id)
-            if project:
-                active_projects[project_id] = project.content or ""
-            else:
-                active_projects[project_id] = ""
-        
-        document = active_projects[project_id]
+        document = load_document(project_id)
+        if document is None:
+            emit("edit_error", {"message": "Project not found"}, to=request.sid)
+            return
         
         if operation["type"] == "insert":
             text = operation["text"]
             position = min(max(0, operation["position"]), len(document))
-            active_projects[project_id] = document[:position] + text + document[position:]
+            updated = document[:position] + text + document[position:]
 
         elif operation["type"] == "delete":
             position = min(max(0, operation["position"]), len(document))
             length = len(operation["text"])
             if position + length <= len(document):
-                active_projects[project_id] = document[:position] + document[position + length:]
+                updated = document[:position] + document[position + length:]
             else:
-                active_projects[project_id] = document[:position]
+                updated = document[:position]
         
         elif operation["type"] == "replace":
-            active_projects[project_id] = operation["text"]
+            updated = operation["text"]
         
         else:
             logging.warning(f"Unknown operation type: {operation['type']}")
             return
 
+        active_projects[project_id] = updated
+
         # Save changes to database periodically
         if operation.get('save', False) or operation["type"] == "replace":
-            project = Project.query.get(project_id)
-            if project:
-                project.content = active_projects[project_id]
-                project.updated_at = datetime.utcnow()
-                db.session.commit()
+            with metrics.span("edit.db_save"):
+                project = Project.query.get(project_id)
+                if project:
+                    project.content = updated
+                    project.updated_at = datetime.utcnow()
+                    index_project(project_id, project.name, updated)
+                    db.session.commit()
+                    active_projects.mark_saved(project_id, updated)
+
+        # Send the change to all clients in the room except sender
+        with metrics.span("edit.emit"):
+            patch = doc_sync.edit_patch(project_id, document, updated)
+            send_document_sync("document_patch", patch, updated, project_id=project_id)
+
+        diagnostics_scheduler.schedule(project_id)
 
-        # Send updated document to all clients in the room except sender
-        emit("document", {"text": active_projects[project_id]}, 
-             to=f"project_{project_id}", 
-             include_self=False)
+        return {"base": patch["base"], "rev": patch["rev"]}
 
     except Exception as e:
         logging.error(f"Error handling edit: {e}", exc_info=True)
@@ -967,29 +1165,120 @@ def handle_chat_message(data):
         return
     
     user_id = session['user_id']
-    project_id = data.get('project_id')
     message = data.get('message')
+    try:
+        project_id = int(data.get('project_id'))  # Clients send it as a string
+    except (TypeError, ValueError):
+        return
     
-    if not project_id or not message:
+    if not message:
         return
     
-    # Create new chat message
-    chat_message = ChatMessage(
+    # Persisted in small batches; broadcast_chat_messages emits once committed
+    queued = chat_writer.submit(
         user_id=user_id,
+        username=session.get('username'),
         project_id=project_id,
         message=message
     )
-    db.session.add(chat_message)
-    db.session.commit()
+    if not queued:
+        emit("chat_error", {"message": "Chat is busy, please resend your message"}, to=request.sid)
+
+def broadcast_chat_messages(messages):
+    """Broadcast committed chat messages to their project rooms, in commit order"""
+    for chat_message in messages:
+        with metrics.span("chat.emit"):
+            socketio.emit("new_chat_message", {
+                "id": chat_message['id'],
+                "user_id": chat_message['user_id'],
+                "username": chat_message['username'],
+                "message": chat_message['message'],
+                "timestamp": chat_message['sent_at'].isoformat()
+            }, to=f"project_{chat_message['project_id']}")
+
+chat_writer = ChatWriter.from_env(on_written=broadcast_chat_messages)
+
+metrics.register_gauges('history_writer', "Compilation history writer queue and totals", history_writer.stats)
+metrics.register_gauges('chat_writer', "Chat message writer queue and totals", chat_writer.stats)
+metrics.register_gauges('db_pool', "Database connection pool utilization", lambda: pool_stats(db.engine))
+metrics.register_gauges('realtime', "Connected Socket.IO clients and projects held in memory", lambda: {
+    'connected_users': len(connected_users),
+    'active_projects': len(active_projects)
+})
+metrics.register_gauges('documents', "Live documents held in memory and their eviction", active_projects.stats)
+metrics.register_gauges('diagnostics', "As-you-type syntax checks", diagnostics_scheduler.stats)
+metrics.register_gauges('doc_sync', "Document sync messages, and bytes sent versus full JSON snapshots", doc_sync.stats)
+metrics.register_gauges('regrade', "Exercise re-judge jobs", regrader.stats)
+
+@app.route("/api/projects/<int:project_id>/messages")
+def api_project_messages(project_id):
+    """Return one page of chat history, newest page first, messages oldest first"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
     
-    # Broadcast message to all clients in the room
-    emit("new_chat_message", {
-        "id": chat_message.id,
-        "user_id": user_id,
-        "username": session.get('username'),
-        "message": message,
-        "timestamp": chat_message.sent_at.isoformat()
-    }, to=f"project_{project_id}")
+    user_id = session['user_id']
+    project = Project.query.get_or_404(project_id)
+    
+    # Check if user has access
+    if project.owner_id != user_id and user_id not in [u.id for u in project.collaborators]:
+        return jsonify({"error": "Access denied"}), 403
+    
+    before = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', CHAT_PAGE_SIZE, type=int), 1), CHAT_MAX_PAGE_SIZE)
+    
+    query = db.session.query(ChatMessage, User.username).join(User, ChatMessage.user_id == User.id) \
+        .filter(ChatMessage.project_id == project_id)
+    if before:
+        query = query.filter(ChatMessage.id < before)
+    
+    # Fetch one extra row to know whether an older page exists
+    rows = query.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = list(reversed(rows[:limit]))
+    
+    return jsonify({
+        "messages": [
+            {
+                "id": chat_message.id,
+                "user_id": chat_message.user_id,
+                "username": username,
+                "message": chat_message.message,
+                "timestamp": chat_message.sent_at.isoformat()
+            }
+            for chat_message, username in rows
+        ],
+        "next_before": rows[0][0].id if has_more else None
+    })
+
+@app.route("/api/search")
+def api_search():
+    """Full-text search over the user's projects, exercises and project chat, best matches first"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not search_supported():
+        return jsonify({"error": "Search is not available on this database"}), 503
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+
+    kinds = None
+    if request.args.get('type'):
+        kinds = request.args.get('type').split(',')
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            return jsonify({"error": f"Unknown type: {', '.join(unknown)}"}), 400
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+
+    results = search(session['user_id'], query, kinds=kinds, page=page, per_page=per_page)
+    for result in results['results']:
+        if result['kind'] == 'exercise':
+            result['url'] = url_for('exercise', exercise_id=result['id'])
+        else:
+            result['url'] = url_for('project', project_id=result['project_id'])
+    return jsonify(results)
 
 @app.route("/api/projects/<int:project_id>", methods=["GET", "PUT", "DELETE"])
 def api_project(project_id):
@@ -1004,14 +1293,17 @@ def api_project(project_id):
         return jsonify({"error": "Access denied"}), 403
     
     if request.method == "GET":
-        return jsonify({
+        # Changes to the name or content bump updated_at; a 304 skips loading the content.
+        # No Last-Modified: polling clients can see several saves within its one-second resolution.
+        etag = hashlib.sha1(repr((project.content_hash, project.name, project.updated_at)).encode()).hexdigest()
+        return conditional_response(etag, render=lambda: jsonify({
             "id": project.id,
             "name": project.name,
             "content": project.content,
             "owner_id": project.owner_id,
             "created_at": project.created_at.isoformat(),
             "updated_at": project.updated_at.isoformat()
-        })
+        }))
     
     elif request.method == "PUT":
         # Only owner or collaborators with write permission can update
@@ -1025,13 +1317,16 @@ def api_project(project_id):
             project.name = data['name']
         if 'content' in data:
             project.content = data['content']
-            # Update in-memory version
-            if project_id in active_projects:
-                active_projects[project_id] = data['content']
         
         project.updated_at = datetime.utcnow()
+        index_project(project.id, project.name, project.content)
         db.session.commit()
         
+        # Update in-memory version
+        if 'content' in data and project_id in active_projects:
+            active_projects[project_id] = data['content']
+            active_projects.mark_saved(project_id, data['content'])
+        
         return jsonify({
             "id": project.id,
             "name": project.name,
@@ -1044,14 +1339,199 @@ def api_project(project_id):
             return jsonify({"error": "Only the owner can delete a project"}), 403
         
         # Remove from active projects
-        if project_id in active_projects:
-            del active_projects[project_id]
+        active_projects.pop(project_id)
+        forget_project(project_id)
         
+        Document.query.filter_by(project_id=project_id).delete()
+        remove_project_from_search(project_id)
         db.session.delete(project)
         db.session.commit()
         
         return jsonify({"message": "Project deleted successfully"})
 
+def has_project_access(project, user_id):
+    """Return True if the user owns or collaborates on the project"""
+    return project.owner_id == user_id or user_id in [u.id for u in project.collaborators]
+
+
+def document_json(document, include_content=False):
+    data = {
+        "id": document.id,
+        "name": document.name,
+        "project_id": document.project_id,
+        "updated_at": document.updated_at.isoformat()
+    }
+    if include_content:
+        data["content"] = document.content or ""
+    return data
+
+
+@app.route("/api/projects/<int:project_id>/documents", methods=["GET", "POST"])
+def api_project_documents(project_id):
+    """List or create the source files of a multi-file project"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    user_id = session['user_id']
+    project = Project.query.get_or_404(project_id)
+    
+    if not has_project_access(project, user_id):
+        return jsonify({"error": "Access denied"}), 403
+    
+    if request.method == "GET":
+        documents = Document.query.filter_by(project_id=project_id).order_by(Document.name).all()
+        return jsonify({"documents": [document_json(d) for d in documents]})
+    
+    data = request.json or {}
+    name = data.get('name', '')
+    if not is_valid_filename(name):
+        return jsonify({"error": "File name must be a plain .c or .h name, e.g. utils.c"}), 400
+    if Document.query.filter_by(project_id=project_id, name=name).first():
+        return jsonify({"error": f"File {name} already exists"}), 409
+    
+    document = Document(name=name, content=data.get('content', ''), project_id=project_id, user_id=user_id)
+    db.session.add(document)
+    db.session.commit()
+    
+    return jsonify(document_json(document, include_content=True)), 201
+
+
+@app.route("/api/projects/<int:project_id>/documents/<int:document_id>", methods=["GET", "PUT", "DELETE"])
+def api_project_document(project_id, document_id):
+    """Read, update or delete one source file of a multi-file project"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    user_id = session['user_id']
+    project = Project.query.get_or_404(project_id)
+    
+    if not has_project_access(project, user_id):
+        return jsonify({"error": "Access denied"}), 403
+    
+    document = Document.query.filter_by(id=document_id, project_id=project_id).first_or_404()
+    
+    if request.method == "GET":
+        return jsonify(document_json(document, include_content=True))
+    
+    elif request.method == "PUT":
+        data = request.json or {}
+        if 'name' in data:
+            if not is_valid_filename(data['name']):
+                return jsonify({"error": "File name must be a plain .c or .h name, e.g. utils.c"}), 400
+            if data['name'] != document.name and Document.query.filter_by(project_id=project_id, name=data['name']).first():
+                return jsonify({"error": f"File {data['name']} already exists"}), 409
+            document.name = data['name']
+        if 'content' in data:
+            document.content = data['content']
+        document.updated_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify(document_json(document))
+    
+    elif request.method == "DELETE":
+        db.session.delete(document)
+        db.session.commit()
+        return jsonify({"message": "File deleted successfully"})
+
+
+@app.route("/api/projects/<int:project_id>/build", methods=["POST"])
+def api_project_build(project_id):
+    """
+    Build a multi-file project from its Documents (incrementally) and optionally run it.
+    Projects without documents are built from their single content as main.c.
+    """
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    user_id = session['user_id']
+    project = Project.query.get_or_404(project_id)
+    
+    if not has_project_access(project, user_id):
+        return jsonify({"error": "Access denied"}), 403
+    
+    data = request.json or {}
+    user_input = data.get('input', '')
+    run = data.get('run', True)
+    
+    files = {d.name: d.content or "" for d in Document.query.filter_by(project_id=project_id).all()}
+    if not files:
+        files = {"main.c": load_document(project_id) or ""}
+    
+    for name, content in files.items():
+        dangerous = check_for_dangerous_code(content)
+        if dangerous:
+            return jsonify(security_check_failure(dangerous, file=name))
+    
+    # History keeps a single text per build, with each file under a marker line
+    combined_code = "\n".join(f"// ==== {name} ====\n{content}" for name, content in sorted(files.items()))
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        build = build_project(project_id, files, temp_dir)
+        
+        if not build["success"]:
+            history_writer.submit(
+                user_id=user_id,
+                project_id=project_id,
+                code=combined_code,
+                diagnostics=build["diagnostics"],
+                status='compilation_error'
+            )
+            return jsonify(build)
+        
+        result = {
+            "success": True,
+            "stage": "compilation",
+            "output": "Compilation successful",
+            "compiled": build["compiled"],
+            "reused": build["reused"],
+            "diagnostics": build["diagnostics"]
+        }
+        if not run:
+            return jsonify(result)
+        
+        try:
+            stdout, stderr, returncode, profile = run_executable(build["executable"], user_input)
+        except subprocess.TimeoutExpired as e:
+            history_writer.submit(
+                user_id=user_id,
+                project_id=project_id,
+                code=combined_code,
+                compilation_output="Compilation successful",
+                execution_output=(e.output or "") + (e.stderr or ""),
+                diagnostics=build["diagnostics"],
+                status='timeout',
+                **e.profile
+            )
+            return jsonify(dict(result, success=False, stage="execution", output="Execution timed out after 5 seconds", profile=e.profile))
+        
+        history_writer.submit(
+            user_id=user_id,
+            project_id=project_id,
+            code=combined_code,
+            compilation_output="Compilation successful",
+            execution_output=stdout + stderr,
+            diagnostics=build["diagnostics"],
+            status='success' if returncode == 0 else 'runtime_error',
+            **profile
+        )
+        
+        return jsonify(dict(
+            result,
+            stage="execution",
+            stdout=stdout,
+            stderr=stderr,
+            returncode=returncode,
+            profile=profile
+        ))
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "stage": "error",
+            "output": f"Error: {str(e)}"
+        })
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
 @socketio.on("cursor_move")
 def handle_cursor_move(data):
     """Handles cursor movement and syncs with other clients."""
@@ -1074,26 +1554,56 @@ def handle_cursor_move(data):
     }, to=f"project_{project_id}", include_self=False)
 
 @socketio.on("request_sync")
-def handle_request_sync():
-    """Handles request for document sync."""
+def handle_request_sync(data=None):
+    """
+    Handles request for document sync from the client's revision {"rev"}.
+    Replies with document_synced if the client is up to date, otherwise a
+    patch or the full document, and acknowledges once that has been sent.
+    """
     if 'user_id' not in session:
-        return
-    
-    # Find the project room this user is in
-    project_id = None
-    for room in socketio.server.manager.get_rooms(request.sid, '/'):
-        if room.startswith("project_"):
-            project_id = room[8:]  # Remove "project_" prefix
-            break
+        return False
     
-    if project_id and project_id in active_projects:
-        emit("document", {"text": active_projects[project_id]})
+    project_id = client_projects.get(request.sid)
+    text = load_document(project_id) if project_id is not None else None
+    if text is None:
+        return False
     
+    event, payload = doc_sync.catch_up(project_id, text, (data or {}).get('rev'))
+    send_document_sync(event, payload, text)
+    return True
+
+def create_app(config=None):
+    """
+    The application, for WSGI servers (e.g. gunicorn "server:create_app()")
+
+    Importing this module registers the routes, Socket.IO handlers and
+    blueprints without touching the database: the schema, migrations and
+    sample data come from `python manage.py init`, run once per database, so
+    workers start and recycle without checking any of it. Background threads
+    and caches start on first use.
+
+    Args:
+        config: Optional settings applied over the environment's, before the first database use
+
+    Returns:
+        The Flask app
+    """
+    if config:
+        app.config.update(config)
+        if 'SQLALCHEMY_DATABASE_URI' in config and 'SQLALCHEMY_ENGINE_OPTIONS' not in config:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config['SQLALCHEMY_DATABASE_URI'])
+    return app
+
 if __name__ == "__main__":
-    print("Starting Collaborative Code Editor server with HTTPS...")
+    print(f"Starting Collaborative Code Editor server with HTTPS ({ASYNC_MODE} mode)...")
     with app.app_context():
-        db.create_all()
-        create_sample_exercises()
+        if not inspect(db.engine).has_table(User.__tablename__):
+            # First run on a new database; afterwards, run `python manage.py init` after upgrades
+            from manage import init_database
+            init_database()
+    
+    # The debugger and reloader are for development; eventlet/gevent mode is the production server
+    debug = not cooperative()
     
     # Check if certificate files exist
     import os
@@ -1108,19 +1618,22 @@ if __name__ == "__main__":
     if os.path.exists(cert_file) and os.path.exists(key_file):
         print(f"Found certificates: {cert_file}, {key_file}")
         try:
-            # Correct way to pass SSL context to SocketIO
-            context = (cert_file, key_file)
+            # Werkzeug takes an SSL context, the eventlet and gevent servers take the files
+            if cooperative():
+                ssl_options = {'certfile': cert_file, 'keyfile': key_file}
+            else:
+                ssl_options = {'ssl_context': (cert_file, key_file)}
             print("Starting with SSL context...")
             socketio.run(app, 
                         host="0.0.0.0", 
                         port=5001, 
-                        debug=True, 
-                        ssl_context=context)
+                        debug=debug, 
+                        **ssl_options)
         except Exception as e:
             print(f"SSL startup failed: {e}")
             print("Falling back to HTTP...")
-            socketio.run(app, host="0.0.0.0", port=5001, debug=True)
+            socketio.run(app, host="0.0.0.0", port=5001, debug=debug)
     else:
         print(f"Certificate files not found. Checked: {cert_file}, {key_file}")
         print("Starting with HTTP...")
-        socketio.run(app, host="0.0.0.0", port=5001, debug=True)
\ No newline at end of file
+        socketio.run(app, host="0.0.0.0", port=5001, debug=debug)
\ No newline at end of file
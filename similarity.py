@@ -0,0 +1,296 @@
+# similarity.py
+import os
+import re
+import hashlib
+import logging
+from datetime import datetime
+from itertools import groupby, combinations
+from operator import itemgetter
+from collections import Counter
+from functools import lru_cache
+from sqlalchemy import select, union, exists
+from models import db, Blob, User, blob_hash, ExerciseProgress, CompilationHistory, SimilaritySource, SimilarityFingerprint, load_blob
+from metrics import metrics
+
+# Normalized tokens per fingerprinted k-gram; shorter shared runs are not evidence
+SIMILARITY_KGRAM = int(os.getenv("SIMILARITY_KGRAM", "8"))
+
+# Winnowing window (k-grams): any shared run of KGRAM + WINDOW - 1 tokens is always detected
+SIMILARITY_WINDOW = int(os.getenv("SIMILARITY_WINDOW", "4"))
+
+# Fingerprints found in more than this share of an exercise's sources are boilerplate and ignored
+SIMILARITY_MAX_SHARE = float(os.getenv("SIMILARITY_MAX_SHARE", "0.5"))
+
+# Fingerprints found in more sources than this are ignored too, which bounds the pairs each one adds
+SIMILARITY_MAX_POSTINGS = int(os.getenv("SIMILARITY_MAX_POSTINGS", "32"))
+
+# Shared fingerprints a pair needs before it is reported
+SIMILARITY_MIN_SHARED = int(os.getenv("SIMILARITY_MIN_SHARED", "3"))
+
+# Pairs listed per exercise
+SIMILARITY_TOP_PAIRS = int(os.getenv("SIMILARITY_TOP_PAIRS", "50"))
+
+# Sources fingerprinted per transaction
+INDEX_BATCH_SIZE = 200
+
+C_KEYWORDS = frozenset("""
+    auto break case char const continue default do double else enum extern float for goto if inline int long
+    register restrict return short signed sizeof static struct switch typedef union unsigned void volatile while
+    _Alignas _Alignof _Atomic _Bool _Complex _Generic _Imaginary _Noreturn _Static_assert _Thread_local
+""".split())
+
+# Comments, preprocessor lines and whitespace are skipped; every other token is kept in order
+SIMILARITY_TOKEN_PATTERN = re.compile(r"""
+      (?P<skip>//[^\n]*|/\*.*?(?:\*/|\Z)|^[ \t]*\#(?:\\\n|[^\n])*|\s+)
+    | (?P<string>"(?:\\.|[^"\\\n])*"?)
+    | (?P<char>'(?:\\.|[^'\\\n])*'?)
+    | (?P<number>\.?\d(?:[eEpP][+-]|[\w.])*)
+    | (?P<name>[A-Za-z_]\w*)
+    | (?P<operator>\S)
+""", re.DOTALL | re.MULTILINE | re.VERBOSE)
+
+_ABSTRACTED = {'string': 'S', 'char': 'C', 'number': 'N'}
+
+def normalize(code):
+    """
+    Tokenize C source with identifiers and literals abstracted, so renaming
+    variables, changing constants, reformatting or editing comments does not
+    hide a copy
+
+    Returns:
+        List of tokens: keywords and operators as written, "I" for identifiers,
+        "S", "C" and "N" for string, character and numeric literals
+    """
+    tokens = []
+    for match in SIMILARITY_TOKEN_PATTERN.finditer(code):
+        kind = match.lastgroup
+        if kind == 'skip':
+            continue
+        if kind == 'name':
+            word = match.group()
+            tokens.append(word if word in C_KEYWORDS else 'I')
+        else:
+            tokens.append(_ABSTRACTED.get(kind, match.group()))
+    return tokens
+
+# Rabin-Karp rolling hash of k-grams over per-token values, modulo a Mersenne prime
+_MODULUS = (1 << 61) - 1
+_BASE = 1000003
+
+@lru_cache(maxsize=4096)
+def _token_value(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big') % _MODULUS
+
+def fingerprints(code, k=SIMILARITY_KGRAM, window=SIMILARITY_WINDOW):
+    """
+    Winnowed fingerprints of a source: the minimum k-gram hash of every
+    window of consecutive k-grams (Schleimer, Wilkerson and Aiken, 2003)
+
+    Returns:
+        Set of non-negative integers below 2**61
+    """
+    values = [_token_value(token) for token in normalize(code)]
+    leading = pow(_BASE, k - 1, _MODULUS)
+    hashes = []
+    rolling = 0
+    for i, value in enumerate(values):
+        if i >= k:
+            rolling = (rolling - values[i - k] * leading) % _MODULUS
+        rolling = (rolling * _BASE + value) % _MODULUS
+        if i >= k - 1:
+            hashes.append(rolling)
+
+    if len(hashes) <= window:
+        return set(hashes[:1])
+    return {min(hashes[i:i + window]) for i in range(len(hashes) - window + 1)}
+
+def _submissions(exercise_id, initial_code=None):
+    """
+    (code hash, user ID) selects of the exercise's submitted sources
+
+    Progress rows nobody submitted from (created when a user opens the
+    exercise, holding the starter code) and the unchanged starter code
+    itself are left out: every viewer shares them, so they would match
+    everyone.
+    """
+    progress = ExerciseProgress.__table__
+    history = CompilationHistory.__table__
+    submitted = (progress.c.attempts > 0) | (progress.c.status != 'not_started')
+    from_progress = (progress.c.exercise_id == exercise_id) & progress.c.user_code_hash.isnot(None) & submitted
+    from_history = history.c.exercise_id == exercise_id
+    if initial_code:
+        starter = blob_hash(initial_code)
+        from_progress &= progress.c.user_code_hash != starter
+        from_history &= history.c.code_hash != starter
+    return (
+        select(progress.c.user_code_hash.label('hash'), progress.c.user_id).where(from_progress),
+        select(history.c.code_hash.label('hash'), history.c.user_id).where(from_history),
+    )
+
+def exercise_sources(exercise_id, initial_code=None):
+    """Subquery of the blob hashes of every source submitted for an exercise, aliased as "hash" """
+    return union(*(query.with_only_columns(query.selected_columns.hash)
+                   for query in _submissions(exercise_id, initial_code))).subquery()
+
+def index_exercise(exercise_id, initial_code=None):
+    """
+    Fingerprint the exercise's sources that are not in the index yet
+
+    Sources are keyed by content hash, so a source submitted many times (or
+    for several exercises) is fingerprinted once.
+
+    Returns:
+        Number of newly indexed sources
+    """
+    sources = exercise_sources(exercise_id, initial_code)
+    missing = db.session.execute(
+        select(sources.c.hash).where(~exists().where(SimilaritySource.hash == sources.c.hash))
+    ).scalars().all()
+
+    for start in range(0, len(missing), INDEX_BATCH_SIZE):
+        with metrics.span("similarity.index"):
+            _index_batch(missing[start:start + INDEX_BATCH_SIZE])
+    return len(missing)
+
+def _index_batch(digests):
+    now = datetime.utcnow()
+    prints = {}
+    for digest in digests:
+        code = load_blob(digest)
+        if code is not None:
+            prints[digest] = fingerprints(code)
+
+    # Another request may be indexing the same sources; the first writer wins
+    _insert_ignoring_duplicates(SimilaritySource.__table__, [
+        {'hash': digest, 'fingerprint_count': len(values), 'indexed_at': now} for digest, values in prints.items()
+    ])
+    source_ids = dict(db.session.execute(
+        select(SimilaritySource.hash, SimilaritySource.id).where(SimilaritySource.hash.in_(list(prints)))
+    ).all())
+    _insert_ignoring_duplicates(SimilarityFingerprint.__table__, [
+        {'fingerprint': fingerprint, 'source_id': source_ids[digest]}
+        for digest, values in prints.items() for fingerprint in values
+    ])
+    db.session.commit()
+
+def _insert_ignoring_duplicates(table, rows):
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+    else:
+        db.session.execute(table.insert().prefix_with('IGNORE'), rows)
+
+def similar_pairs(exercise_id, initial_code=None, limit=SIMILARITY_TOP_PAIRS):
+    """
+    The most similar pairs of sources submitted by different users for an exercise
+
+    Pairs come from the inverted index: only sources sharing a fingerprint
+    are ever compared, and fingerprints shared by more than
+    SIMILARITY_MAX_SHARE of the sources or SIMILARITY_MAX_POSTINGS sources
+    (or present in the starter code) are skipped as boilerplate, and the
+    unchanged starter code is not a submission at all. Each
+    fingerprint therefore adds a bounded number of pairs, and the work grows
+    with the size of the index rather than with the square of the number of
+    submissions. The exercise's sources are indexed first if needed.
+
+    Args:
+        exercise_id: Exercise ID
+        initial_code: The exercise's starter code, whose fingerprints are ignored
+        limit: Maximum number of pairs
+
+    Returns:
+        List of {"source_a", "source_b" (blob hashes), "users_a", "users_b"
+        (usernames), "shared" (fingerprints in common, not counting skipped
+        ones), "similarity" (Jaccard
+        index of the fingerprint sets), "containment" (share of the smaller
+        set found in the other)}, most similar first. A source submitted by
+        several users is reported as a pair of itself with similarity 1.0.
+    """
+    index_exercise(exercise_id, initial_code)
+
+    owners = _source_owners(exercise_id, initial_code)
+    if not owners:
+        return []
+    ignored = fingerprints(initial_code) if initial_code else set()
+    max_postings = max(2, min(SIMILARITY_MAX_POSTINGS, int(len(owners) * SIMILARITY_MAX_SHARE)))
+
+    shared = Counter()
+    kept = Counter()  # Source ID -> fingerprints that were not skipped
+    with metrics.span("similarity.match"):
+        indexed = select(SimilaritySource.id, SimilaritySource.hash).where(
+            SimilaritySource.hash.in_(select(exercise_sources(exercise_id, initial_code).c.hash))
+        )
+        digests = dict(db.session.execute(indexed).all())
+        # A Core connection, since this can stream hundreds of thousands of rows
+        postings = db.session.connection().execute(
+            select(SimilarityFingerprint.fingerprint, SimilarityFingerprint.source_id)
+            .where(SimilarityFingerprint.source_id.in_(indexed.with_only_columns(SimilaritySource.id)))
+            .order_by(SimilarityFingerprint.fingerprint)
+        )
+        for fingerprint, rows in groupby(postings, key=itemgetter(0)):
+            sources = [row[1] for row in rows]
+            if fingerprint in ignored or len(sources) > max_postings:
+                continue
+            kept.update(sources)
+            for pair in combinations(sorted(sources), 2):
+                shared[pair] += 1
+
+    pairs = []
+    for digest, users in owners.items():
+        if len(users) > 1:
+            pairs.append((digest, digest, 0, 1.0, 1.0))
+    for (a, b), count in shared.items():
+        a_digest, b_digest = digests[a], digests[b]
+        if count < SIMILARITY_MIN_SHARED or len(owners[a_digest] | owners[b_digest]) < 2:
+            continue  # Too little in common, or one user's own revisions
+        pairs.append((a_digest, b_digest, count, count / (kept[a] + kept[b] - count), count / min(kept[a], kept[b])))
+    pairs.sort(key=lambda pair: (pair[3], pair[4], pair[2]), reverse=True)
+    pairs = pairs[:limit]
+
+    user_ids = {user_id for a, b, *_ in pairs for user_id in owners[a] | owners[b]}
+    usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all()) if user_ids else {}
+
+    def names(digest):
+        return sorted(usernames.get(user_id, f"#{user_id}") for user_id in owners[digest])
+
+    return [
+        {
+            'source_a': a,
+            'source_b': b,
+            'users_a': names(a),
+            'users_b': names(b),
+            'shared': count,
+            'similarity': round(similarity, 4),
+            'containment': round(containment, 4),
+        }
+        for a, b, count, similarity, containment in pairs
+    ]
+
+def _source_owners(exercise_id, initial_code=None):
+    """Blob hash -> IDs of the users who submitted it for the exercise"""
+    rows = db.session.execute(union(*_submissions(exercise_id, initial_code)))
+    owners = {}
+    for digest, user_id in rows:
+        owners.setdefault(digest, set()).add(user_id)
+    return owners
+
+def forget_orphans():
+    """
+    Drop index entries whose source blob no longer exists (run after blob garbage collection)
+
+    Returns:
+        Number of sources removed
+    """
+    orphaned = select(SimilaritySource.id).where(~exists().where(Blob.hash == SimilaritySource.hash))
+    db.session.execute(SimilarityFingerprint.__table__.delete().where(SimilarityFingerprint.source_id.in_(orphaned)))
+    result = db.session.execute(SimilaritySource.__table__.delete().where(SimilaritySource.id.in_(orphaned)))
+    db.session.commit()
+    if result.rowcount:
+        logging.info(f"Removed {result.rowcount} sources from the similarity index")
+    return result.rowcount
@@ -0,0 +1,79 @@
+// static/admin-exercise-form.js
+// Initialize CodeMirror for code fields
+const initialCodeEditor = CodeMirror.fromTextArea(document.getElementById('initial_code'), {
+    lineNumbers: true,
+    mode: 'text/x-csrc',
+    theme: 'default',
+    indentUnit: 4,
+    indentWithTabs: true,
+    lineWrapping: true
+});
+
+const solutionCodeEditor = CodeMirror.fromTextArea(document.getElementById('solution_code'), {
+    lineNumbers: true,
+    mode: 'text/x-csrc',
+    theme: 'default',
+    indentUnit: 4,
+    indentWithTabs: true,
+    lineWrapping: true
+});
+
+// Set default test cases for a new exercise
+const testCases = document.getElementById('test_cases');
+if (!testCases.value) {
+    testCases.value = JSON.stringify([
+        { "input": "", "expected_output": "" }
+    ], null, 2);
+}
+
+// Re-judge progress, polled while a job runs (edit page only)
+const regradePanel = document.getElementById('regrade-panel');
+
+function showRegradeJob(job) {
+    const progress = document.getElementById('regrade-progress');
+    progress.style.display = 'block';
+    progress.value = job.progress;
+
+    let status = `${job.state}: ${job.judged} of ${job.sources} distinct sources judged ` +
+        `(${job.submissions} submissions), ${job.passed} passing, ${job.failed} failing, ` +
+        `${job.updated} submissions updated`;
+    if (job.errors) status += `, ${job.errors} could not be judged`;
+    if (job.error) status += ` - ${job.error}`;
+    document.getElementById('regrade-status').textContent = status;
+    document.getElementById('regrade-button').disabled = !['done', 'failed'].includes(job.state);
+
+    if (!['done', 'failed'].includes(job.state)) {
+        setTimeout(() => {
+            fetch(regradePanel.dataset.statusUrl.replace('JOB', job.id))
+                .then(response => response.json())
+                .then(showRegradeJob);
+        }, 1000);
+    }
+}
+
+if (regradePanel) {
+    document.getElementById('regrade-button').addEventListener('click', function() {
+        fetch(regradePanel.dataset.regradeUrl, { method: 'POST' })
+            .then(response => response.json())
+            .then(showRegradeJob);
+    });
+
+    if (regradePanel.dataset.job) {
+        showRegradeJob(JSON.parse(regradePanel.dataset.job));
+    }
+}
+
+// Form submission
+document.getElementById('exercise-form').addEventListener('submit', function(e) {
+    // Update CodeMirror textareas before submission
+    initialCodeEditor.save();
+    solutionCodeEditor.save();
+
+    // Validate test cases JSON
+    try {
+        JSON.parse(testCases.value);
+    } catch (error) {
+        e.preventDefault();
+        alert('Error in test cases JSON format: ' + error.message);
+    }
+});
@@ -0,0 +1,47 @@
+// static/admin-exercises.js
+// Search functionality
+document.getElementById('exercise-search').addEventListener('input', function() {
+    const searchTerm = this.value.toLowerCase();
+    const rows = document.querySelectorAll('.exercises-table tbody tr');
+
+    rows.forEach(row => {
+        const title = row.querySelector('td:nth-child(2)').textContent.toLowerCase();
+        const category = row.querySelector('td:nth-child(4)').textContent.toLowerCase();
+
+        if (title.includes(searchTerm) || category.includes(searchTerm)) {
+            row.style.display = '';
+        } else {
+            row.style.display = 'none';
+        }
+    });
+});
+
+// Delete modal functionality
+const modal = document.getElementById('delete-modal');
+const closeBtn = document.querySelector('.close');
+const cancelBtn = document.getElementById('cancel-delete');
+const deleteForm = document.getElementById('delete-form');
+const exerciseTitle = document.getElementById('exercise-title');
+
+// Show modal when delete button is clicked
+document.querySelectorAll('.delete-btn').forEach(button => {
+    button.addEventListener('click', function() {
+        const id = this.getAttribute('data-id');
+        const title = this.getAttribute('data-title');
+
+        deleteForm.action = deleteForm.dataset.deleteUrl.replace('0', id);
+        exerciseTitle.textContent = title;
+        modal.style.display = 'block';
+    });
+});
+
+// Close modal
+closeBtn.addEventListener('click', () => modal.style.display = 'none');
+cancelBtn.addEventListener('click', () => modal.style.display = 'none');
+
+// Close modal when clicking outside
+window.addEventListener('click', (event) => {
+    if (event.target == modal) {
+        modal.style.display = 'none';
+    }
+});
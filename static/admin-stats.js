@@ -0,0 +1,45 @@
+// static/admin-stats.js
+document.addEventListener('DOMContentLoaded', function() {
+    // Simplified chart creation
+    const exerciseCtx = document.getElementById('exercisesByDifficultyChart').getContext('2d');
+    const compileCtx = document.getElementById('compilationSuccessChart').getContext('2d');
+
+    // Create basic charts with hardcoded values (will be replaced with actual data when rendered)
+    new Chart(exerciseCtx, {
+        type: 'doughnut',
+        data: {
+            labels: ['Easy', 'Medium', 'Hard'],
+            datasets: [{
+                data: [1, 1, 1], // Placeholder data
+                backgroundColor: ['#2ecc71', '#f39c12', '#e74c3c']
+            }]
+        },
+        options: {
+            responsive: true,
+            plugins: {
+                legend: {
+                    position: 'right'
+                }
+            }
+        }
+    });
+
+    new Chart(compileCtx, {
+        type: 'pie',
+        data: {
+            labels: ['Successful', 'Failed'],
+            datasets: [{
+                data: [1, 1], // Placeholder data
+                backgroundColor: ['#2ecc71', '#e74c3c']
+            }]
+        },
+        options: {
+            responsive: true,
+            plugins: {
+                legend: {
+                    position: 'right'
+                }
+            }
+        }
+    });
+});
@@ -0,0 +1,37 @@
+// static/admin-users.js
+// Search functionality
+document.getElementById('user-search').addEventListener('input', function() {
+    const searchTerm = this.value.toLowerCase();
+    const rows = document.querySelectorAll('.users-table tbody tr');
+
+    rows.forEach(row => {
+        const username = row.querySelector('td:nth-child(2)').textContent.toLowerCase();
+        const email = row.querySelector('td:nth-child(3)').textContent.toLowerCase();
+
+        if (username.includes(searchTerm) || email.includes(searchTerm)) {
+            row.style.display = '';
+        } else {
+            row.style.display = 'none';
+        }
+    });
+});
+
+// View button functionality
+document.querySelectorAll('.view-btn').forEach(button => {
+    button.addEventListener('click', function() {
+        const userId = this.getAttribute('data-id');
+        // Implement view user details functionality
+        alert('View user ID: ' + userId);
+    });
+});
+
+// Reset password button functionality
+document.querySelectorAll('.reset-btn').forEach(button => {
+    button.addEventListener('click', function() {
+        const userId = this.getAttribute('data-id');
+        if (confirm('Are you sure you want to reset the password for this user?')) {
+            // Implement password reset functionality
+            alert('Password reset for user ID: ' + userId);
+        }
+    });
+});
@@ -0,0 +1,899 @@
+// static/editor.js
+// Global variables
+let editor;
+let socket;
+let activeUsers = new Map();
+let executionInProgress = false;
+const projectId = document.body.dataset.projectId;
+const currentUserId = document.body.dataset.userId;
+const currentUsername = document.body.dataset.username;
+let userCursors = {};  // Store other users' cursor positions
+let userColors = {};   // Store colors for each user
+let renderedMessageIds = new Set();  // Chat messages already on screen
+let olderMessagesCursor = null;      // `before` id of the next older chat page
+let chatHistoryLoaded = false;
+let documentRevision = null;         // Server revision of the text in the editor, null if unknown
+let pendingEdits = 0;                // Edits sent but not yet acknowledged
+let syncNeeded = false;              // Resync once pending edits and syncs are acknowledged
+let syncInFlight = false;            // A request_sync has not been answered yet
+let syncQueue = Promise.resolve();   // Keeps document messages in order while they decode
+// Large document messages arrive as binary frames, compressed if we can decompress them
+const acceptEncodings = 'DecompressionStream' in window ? 'deflate,json' : 'json';
+let diagnosticLines = [];            // [line handle, class] pairs highlighted by the last diagnostics
+
+// Generate a color based on username
+function generateUserColor(username) {
+    let hash = 0;
+    for (let i = 0; i < username.length; i++) {
+        hash = username.charCodeAt(i) + ((hash << 5) - hash);
+    }
+
+    // Generate bright, distinct colors
+    const hue = hash % 360;
+    return `hsl(${hue}, 70%, 50%)`;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    initializeEditor();
+    initializeSocketConnection();
+    initializeUIEvents();
+});
+
+function initializeEditor() {
+    const editorElement = document.getElementById('editor');
+
+    editor = CodeMirror.fromTextArea(editorElement, {
+        lineNumbers: true,
+        gutters: ['CodeMirror-linenumbers', 'diagnostics-gutter'],
+        mode: 'text/x-csrc',
+        theme: 'default',
+        indentUnit: 4,
+        indentWithTabs: true,
+        lineWrapping: true,
+        autoCloseBrackets: true,
+        matchBrackets: true,
+        extraKeys: {
+            "Ctrl-Enter": function() {
+                runCode();
+            },
+            "Ctrl-S": function() {
+                saveCode();
+                return false;
+            },
+            "Ctrl-Space": "autocomplete"
+        }
+    });
+
+    editor.setSize(null, "80vh");
+
+    editor.on('change', function(instance, changeObj) {
+        if (changeObj.origin !== 'setValue' && changeObj.origin !== 'socket') {
+            let operation;
+            if (changeObj.origin === '+input' || changeObj.origin === 'paste') {
+                operation = {
+                    type: 'insert',
+                    position: editor.indexFromPos(changeObj.from),
+                    text: changeObj.text.join('\n'),
+                    project_id: projectId
+                };
+            } else if (changeObj.origin === '+delete' || changeObj.origin === 'cut') {
+                operation = {
+                    type: 'delete',
+                    position: editor.indexFromPos(changeObj.from),
+                    text: changeObj.removed.join('\n'),
+                    project_id: projectId
+                };
+            } else if (changeObj.origin === 'complete-reset') {
+                operation = {
+                    type: 'replace',
+                    text: editor.getValue(),
+                    project_id: projectId
+                };
+            }
+
+            if (operation) {
+                pendingEdits++;
+                socket.emit('edit', operation, onEditAck);
+            }
+        }
+    });
+
+    // Track cursor position changes for collaborative editing
+    editor.on('cursorActivity', function() {
+        const cursor = editor.getCursor();
+        socket.emit('cursor_move', { 
+            project_id: projectId,
+            position: { line: cursor.line, ch: cursor.ch }
+        });
+    });
+}
+
+function initializeSocketConnection() {
+    socket = io({
+        query: {
+            project_id: projectId,
+            accept: acceptEncodings
+        },
+        // Spread reconnects out after a network blip takes a whole lab offline
+        reconnectionDelay: 1000,
+        reconnectionDelayMax: 10000,
+        randomizationFactor: 0.5
+    });
+
+    // Socket event handlers
+    socket.on('connect', onSocketConnect);
+    socket.on('document', inSyncOrder(onDocumentUpdate));
+    socket.on('document_patch', inSyncOrder(onDocumentPatch));
+    socket.on('document_synced', inSyncOrder(onDocumentSynced));
+    socket.on('diagnostics', inSyncOrder(onDiagnostics));
+    socket.on('user_connected', onUserConnected);
+    socket.on('user_disconnected', onUserDisconnected);
+    socket.on('all_users', onAllUsers);
+    socket.on('edit_error', onEditError);
+    socket.on('cursor_update', onCursorUpdate);
+    socket.on('new_chat_message', onNewChatMessage);
+    socket.on('chat_error', onChatError);
+}
+
+function initializeUIEvents() {
+    // Button click events
+    document.getElementById('run-button').addEventListener('click', runCode);
+    document.getElementById('compile-button').addEventListener('click', compileCode);
+    document.getElementById('save-button').addEventListener('click', saveCode);
+    document.getElementById('toggle-results').addEventListener('click', toggleResults);
+    document.getElementById('run-with-input-btn').addEventListener('click', runWithInput);
+
+    // Tab switching
+    document.getElementById('output-tabs').addEventListener('click', function(e) {
+        if (e.target.classList.contains('tab')) {
+            switchTab(e.target.getAttribute('data-tab'));
+        }
+    });
+
+    // Initialize first tab
+    document.querySelector('.tab.active').click();
+
+    document.getElementById('load-older-messages').addEventListener('click', function() {
+        loadChatHistory(olderMessagesCursor);
+    });
+
+    // Chat form submission
+    document.getElementById('chat-form').addEventListener('submit', function(e) {
+        e.preventDefault();
+        sendChatMessage();
+    });
+}
+
+// Socket event handlers
+function onSocketConnect() {
+    console.log('Connected to server');
+
+    // Join project room
+    // Pass our revision so a reconnect only fetches what changed, unless
+    // edits were in flight when the connection dropped
+    if (pendingEdits > 0) {
+        pendingEdits = 0;
+        documentRevision = null;
+    }
+    syncInFlight = false;
+    socket.emit('join_project', {
+        project_id: projectId,
+        rev: documentRevision,
+        accept: acceptEncodings
+    });
+
+    // Only the latest page of chat history; older pages load on demand
+    if (!chatHistoryLoaded) {
+        chatHistoryLoaded = true;
+        loadChatHistory(null);
+    }
+}
+
+function loadChatHistory(before) {
+    let url = `/api/projects/${projectId}/messages?limit=50`;
+    if (before) {
+        url += `&before=${before}`;
+    }
+
+    fetch(url)
+    .then(response => response.json())
+    .then(data => {
+        const chatMessages = document.getElementById('chat-messages');
+        const loadOlderButton = document.getElementById('load-older-messages');
+        const previousHeight = chatMessages.scrollHeight;
+
+        // Messages arrive oldest first; insert them above anything already shown
+        let anchor = loadOlderButton.nextSibling;
+        data.messages.forEach(message => {
+            if (renderedMessageIds.has(message.id)) return;
+            renderedMessageIds.add(message.id);
+            chatMessages.insertBefore(createChatMessageElement(message), anchor);
+        });
+
+        olderMessagesCursor = data.next_before;
+        loadOlderButton.style.display = olderMessagesCursor ? 'block' : 'none';
+
+        if (before) {
+            // Keep the viewport on the message that was at the top
+            chatMessages.scrollTop = chatMessages.scrollHeight - previousHeight;
+        } else {
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }
+    })
+    .catch(error => {
+        console.error('Failed to load chat history:', error);
+    });
+}
+
+function onChatError(data) {
+    showNotification(data.message, 'error');
+}
+
+function decodeSyncPayload(data) {
+    if (!data || !data.encoding) {
+        return Promise.resolve(data);
+    }
+    let stream = new Blob([data.data]).stream();
+    if (data.encoding === 'deflate') {
+        stream = stream.pipeThrough(new DecompressionStream('deflate'));
+    }
+    return new Response(stream).text().then(JSON.parse);
+}
+
+function inSyncOrder(handler) {
+    return function(data) {
+        syncQueue = syncQueue
+            .then(() => decodeSyncPayload(data))
+            .then(handler)
+            .catch(error => console.error('Failed to apply document update:', error));
+    };
+}
+
+function requestSync() {
+    // Our own edits in flight would make the reply stale, and one
+    // outstanding request is enough; wait for their acks
+    if (pendingEdits > 0 || syncInFlight) {
+        syncNeeded = true;
+        return;
+    }
+    syncNeeded = false;
+    syncInFlight = true;
+    // The server replies with document_synced, a patch or the whole
+    // document, then acks; the ack queues behind that reply
+    socket.emit('request_sync', { rev: documentRevision }, inSyncOrder(function() {
+        syncInFlight = false;
+        if (syncNeeded) {
+            requestSync();
+        }
+    }));
+}
+
+function onDocumentSynced(data) {
+    // Nothing changed since our revision
+    documentRevision = data.rev;
+}
+
+function onEditAck(ack) {
+    pendingEdits = Math.max(0, pendingEdits - 1);
+    if (ack && ack.base === documentRevision) {
+        documentRevision = ack.rev;
+    } else {
+        documentRevision = null;  // Others' changes landed first; fetch the whole document
+        syncNeeded = true;
+    }
+    if (syncNeeded) {
+        requestSync();
+    }
+}
+
+function onDocumentPatch(patch) {
+    if (patch.base !== documentRevision || pendingEdits > 0) {
+        requestSync();
+        return;
+    }
+
+    editor.replaceRange(patch.text, editor.posFromIndex(patch.start), editor.posFromIndex(patch.end), 'socket');
+    documentRevision = patch.rev;
+    document.getElementById('last-updated').textContent = new Date().toLocaleString();
+}
+
+function onDiagnostics(data) {
+    // Computed for another revision; a check of the newer text will follow
+    if (data.rev !== documentRevision) return;
+
+    const severityRank = { error: 3, warning: 2, note: 1 };
+    const byLine = new Map();
+    data.diagnostics.forEach(diagnostic => {
+        const line = diagnostic.line - 1;
+        if (!byLine.has(line)) byLine.set(line, []);
+        byLine.get(line).push(diagnostic);
+    });
+
+    editor.operation(() => {
+        editor.clearGutter('diagnostics-gutter');
+        diagnosticLines.forEach(([handle, className]) => editor.removeLineClass(handle, 'background', className));
+        diagnosticLines = [];
+
+        byLine.forEach((diagnostics, line) => {
+            if (line < 0 || line >= editor.lineCount()) return;
+            const severity = diagnostics.reduce((worst, d) =>
+                severityRank[d.severity] > severityRank[worst] ? d.severity : worst, 'note');
+
+            const marker = document.createElement('span');
+            marker.className = `diagnostic-marker ${severity}`;
+            marker.innerHTML = '<i class="fas fa-circle"></i>';
+            marker.title = diagnostics.map(d => `${d.line}:${d.column} ${d.severity}: ${d.message}`).join('\n');
+            editor.setGutterMarker(line, 'diagnostics-gutter', marker);
+
+            if (severity !== 'note') {
+                const className = `diagnostic-line-${severity}`;
+                diagnosticLines.push([editor.addLineClass(line, 'background', className), className]);
+            }
+        });
+    });
+
+    const errors = data.diagnostics.filter(d => d.severity === 'error').length;
+    const warnings = data.diagnostics.filter(d => d.severity === 'warning').length;
+    document.getElementById('diagnostics-summary').textContent = errors || warnings
+        ? `${errors} error${errors === 1 ? '' : 's'}, ${warnings} warning${warnings === 1 ? '' : 's'}`
+        : 'No problems';
+}
+
+function onDocumentUpdate(data) {
+    const cursor = editor.getCursor();
+    const scrollInfo = editor.getScrollInfo();
+
+    editor.operation(() => {
+        editor.setValue(data.text);
+        editor.changeGeneration(true);
+    });
+
+    editor.setCursor(cursor);
+    editor.scrollTo(scrollInfo.left, scrollInfo.top);
+    documentRevision = data.rev || null;
+
+    // Update last updated time
+    document.getElementById('last-updated').textContent = new Date().toLocaleString();
+}
+
+function onUserConnected(data) {
+    console.log('User connected:', data.username);
+
+    // Generate a color for this user
+    if (!userColors[data.user_id]) {
+        userColors[data.user_id] = generateUserColor(data.username);
+    }
+
+    activeUsers.set(data.sid, {
+        username: data.username,
+        user_id: data.user_id,
+        color: userColors[data.user_id],
+        isYou: data.user_id === currentUserId
+    });
+
+    updateUsersList();
+
+    // Show notification
+    if (data.user_id !== currentUserId) {
+        showNotification(`${data.username} joined the project`, 'info');
+    }
+}
+
+function onUserDisconnected(data) {
+    console.log('User disconnected:', data.username);
+
+    if (activeUsers.has(data.sid)) {
+        const user = activeUsers.get(data.sid);
+        activeUsers.delete(data.sid);
+
+        // Remove user cursor if exists
+        if (userCursors[data.sid]) {
+            userCursors[data.sid].clear();
+            delete userCursors[data.sid];
+        }
+
+        updateUsersList();
+
+        // Show notification
+        showNotification(`${data.username} left the project`, 'info');
+    }
+}
+
+function onAllUsers(data) {
+    console.log('Received all users:', data.users);
+
+    // Clear existing users except current user
+    activeUsers.clear();
+
+    // Add all users from the server
+    data.users.forEach(user => {
+        // Generate a color for this user if not already assigned
+        if (!userColors[user.user_id]) {
+            userColors[user.user_id] = generateUserColor(user.username);
+        }
+
+        activeUsers.set(user.sid, {
+            username: user.username,
+            user_id: user.user_id,
+            color: userColors[user.user_id],
+            isYou: user.user_id === currentUserId
+        });
+    });
+
+    updateUsersList();
+}
+
+function onEditError(data) {
+    console.error('Edit error:', data.message);
+    showNotification('Synchronization error: ' + data.message, 'error');
+}
+
+function onCursorUpdate(data) {
+    // Skip if it's the current user's cursor
+    if (data.user_id === currentUserId) return;
+
+    // Clear previous cursor marker for this user if it exists
+    if (userCursors[data.sid]) {
+        userCursors[data.sid].clear();
+    }
+
+    // Get the user's color
+    const user = activeUsers.get(data.sid);
+    if (!user) return;
+
+    const color = user.color;
+
+    // Create a cursor element
+    const cursorElem = document.createElement('div');
+    cursorElem.className = 'remote-cursor';
+    cursorElem.style.backgroundColor = color;
+    cursorElem.style.borderLeft = `2px solid ${color}`;
+
+    // Add username above cursor
+    const usernameElem = document.createElement('div');
+    usernameElem.className = 'remote-cursor-name';
+    usernameElem.style.backgroundColor = color;
+    usernameElem.textContent = user.username;
+    cursorElem.appendChild(usernameElem);
+
+    // Create and store the cursor marker
+    userCursors[data.sid] = editor.setBookmark(
+        { line: data.position.line, ch: data.position.ch },
+        { widget: cursorElem }
+    );
+}
+
+function onNewChatMessage(data) {
+    if (renderedMessageIds.has(data.id)) return;
+    renderedMessageIds.add(data.id);
+
+    const chatMessages = document.getElementById('chat-messages');
+    const isOwnMessage = String(data.user_id) === currentUserId;
+
+    chatMessages.appendChild(createChatMessageElement(data));
+
+    // Scroll to bottom
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    // Show notification if tab is not active
+    if (document.hidden && !isOwnMessage) {
+        const notification = new Notification('New message', {
+            body: `${data.username}: ${data.message}`,
+            icon: '/static/favicon.ico'
+        });
+    }
+}
+
+function createChatMessageElement(data) {
+    const isOwnMessage = String(data.user_id) === currentUserId;
+
+    const messageElement = document.createElement('div');
+    messageElement.className = `chat-message ${isOwnMessage ? 'own-message' : ''}`;
+
+    // Message header with username and time
+    const messageHeader = document.createElement('div');
+    messageHeader.className = 'message-header';
+
+    const usernameSpan = document.createElement('span');
+    usernameSpan.className = 'message-username';
+    usernameSpan.textContent = data.username;
+    usernameSpan.style.color = userColors[data.user_id] || '#666';
+
+    const timeSpan = document.createElement('span');
+    timeSpan.className = 'message-time';
+    const messageTime = new Date(data.timestamp);
+    timeSpan.textContent = messageTime.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+
+    messageHeader.appendChild(usernameSpan);
+    messageHeader.appendChild(timeSpan);
+
+    // Message content
+    const messageContent = document.createElement('div');
+    messageContent.className = 'message-content';
+    messageContent.textContent = data.message;
+
+    messageElement.appendChild(messageHeader);
+    messageElement.appendChild(messageContent);
+
+    return messageElement;
+}
+
+// UI Functions
+function updateUsersList() {
+    const usersList = document.getElementById('users-list');
+    usersList.innerHTML = '';
+
+    activeUsers.forEach((user, sid) => {
+        const li = document.createElement('li');
+        li.textContent = user.username + (user.isYou ? ' (you)' : '');
+        li.className = user.isYou ? 'current-user' : '';
+
+        // Add colored dot indicator
+        const statusDot = document.createElement('span');
+        statusDot.className = 'status-dot';
+        statusDot.style.backgroundColor = user.color;
+        li.prepend(statusDot);
+
+        usersList.appendChild(li);
+    });
+}
+
+function switchTab(tabId) {
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelector(`[data-tab="${tabId}"]`).classList.add('active');
+
+    document.querySelectorAll('.output-content').forEach(content => {
+        content.style.display = 'none';
+    });
+    document.getElementById(tabId).style.display = 'block';
+}
+
+function toggleResults() {
+    const resultsContainer = document.querySelector('.results-container');
+    const editorContainer = document.querySelector('.editor-container');
+    const toggleButton = document.getElementById('toggle-results');
+
+    if (resultsContainer.style.display === 'none') {
+        resultsContainer.style.display = 'flex';
+        editorContainer.style.width = '60%';
+        toggleButton.innerHTML = '<i class="fas fa-columns"></i> Hide Results';
+    } else {
+        resultsContainer.style.display = 'none';
+        editorContainer.style.width = '100%';
+        toggleButton.innerHTML = '<i class="fas fa-columns"></i> Show Results';
+    }
+}
+
+function sendChatMessage() {
+    const chatInput = document.getElementById('chat-input');
+    const message = chatInput.value.trim();
+
+    if (message) {
+        socket.emit('chat_message', {
+            project_id: projectId,
+            message: message
+        });
+
+        chatInput.value = '';
+    }
+}
+
+// Code execution functions
+function runCode() {
+    if (executionInProgress) return;
+    executionInProgress = true;
+
+    const code = editor.getValue();
+    const runButton = document.getElementById('run-button');
+    const compileButton = document.getElementById('compile-button');
+
+    // Show results if hidden
+    if (document.querySelector('.results-container').style.display === 'none') {
+        toggleResults();
+    }
+
+    // Clear output areas
+    document.getElementById('compile-output').textContent = '';
+    document.getElementById('stdout-output').textContent = '';
+    document.getElementById('stderr-output').textContent = '';
+
+    // Hide input container initially
+    document.getElementById('input-container').style.display = 'none';
+
+    // Update UI
+    runButton.disabled = true;
+    compileButton.disabled = true;
+    runButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Running...';
+    document.getElementById('loading-spinner').style.display = 'block';
+
+    // Send to server
+    fetch('/execute_code', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            code: code,
+            project_id: projectId
+        }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        document.getElementById('loading-spinner').style.display = 'none';
+
+        if (data.success) {
+            if (data.stage === 'needs_input') {
+                // Program needs input - show the prompt and input area
+                document.getElementById('stdout-output').textContent = data.stdout || 'Program is waiting for input.';
+                document.getElementById('input-container').style.display = 'block';
+
+                switchTab('stdout-output');
+                showNotification('Program requires input. Please provide input and run again.', 'info');
+            } else {
+                // Normal execution results
+                document.getElementById('stdout-output').textContent = data.stdout || 'Program executed with no output.';
+                document.getElementById('stderr-output').textContent = data.stderr || '';
+                showCompileDiagnostics({ diagnostics: data.diagnostics }, 'Compilation successful.');
+
+                // Check if program might need input for future runs
+                if (data.needs_input) {
+                    document.getElementById('input-container').style.display = 'block';
+                } else {
+                    document.getElementById('input-container').style.display = 'none';
+                }
+
+                switchTab('stdout-output');
+                showNotification('Code executed successfully' + formatProfile(data.profile), 'success');
+            }
+        } else {
+            if (data.stage === 'compilation') {
+                showCompileDiagnostics(data, 'Compilation failed with no output.');
+                switchTab('compile-output');
+                showNotification('Compilation failed', 'error');
+            } else {
+                document.getElementById('stderr-output').textContent = data.output || 'Execution failed with no output.';
+                switchTab('stderr-output');
+                showNotification('Execution failed', 'error');
+            }
+        }
+    })
+    .catch(error => {
+        document.getElementById('loading-spinner').style.display = 'none';
+        document.getElementById('stderr-output').textContent = 'Error: ' + error.message;
+        switchTab('stderr-output');
+        showNotification('Request failed', 'error');
+    })
+    .finally(() => {
+        runButton.disabled = false;
+        compileButton.disabled = false;
+        runButton.innerHTML = '<i class="fas fa-play"></i> Run';
+        executionInProgress = false;
+    });
+}
+
+function runWithInput() {
+    if (executionInProgress) return;
+    executionInProgress = true;
+
+    const code = editor.getValue();
+    const userInput = document.getElementById('program-input').value;
+    const runButton = document.getElementById('run-with-input-btn');
+
+    // Update UI
+    runButton.disabled = true;
+    runButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Running...';
+    document.getElementById('loading-spinner').style.display = 'block';
+
+    // Send to server
+    fetch('/execute_code', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            code: code,
+            project_id: projectId,
+            input: userInput
+        }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        document.getElementById('loading-spinner').style.display = 'none';
+
+        if (data.success) {
+            document.getElementById('stdout-output').textContent = data.stdout || 'Program executed with no output.';
+            document.getElementById('stderr-output').textContent = data.stderr || '';
+            showCompileDiagnostics({ diagnostics: data.diagnostics }, 'Compilation successful.');
+
+            switchTab('stdout-output');
+            showNotification('Code executed successfully' + formatProfile(data.profile), 'success');
+        } else {
+            if (data.stage === 'compilation') {
+                showCompileDiagnostics(data, 'Compilation failed with no output.');
+                switchTab('compile-output');
+                showNotification('Compilation failed', 'error');
+            } else {
+                document.getElementById('stderr-output').textContent = data.output || 'Execution failed with no output.';
+                switchTab('stderr-output');
+                showNotification('Execution failed', 'error');
+            }
+        }
+    })
+    .catch(error => {
+        document.getElementById('loading-spinner').style.display = 'none';
+        document.getElementById('stderr-output').textContent = 'Error: ' + error.message;
+        switchTab('stderr-output');
+        showNotification('Request failed', 'error');
+    })
+    .finally(() => {
+        runButton.disabled = false;
+        runButton.innerHTML = '<i class="fas fa-play"></i> Run with Input';
+        executionInProgress = false;
+    });
+}
+
+function compileCode() {
+    if (executionInProgress) return;
+    executionInProgress = true;
+
+    const code = editor.getValue();
+    const compileButton = document.getElementById('compile-button');
+    const runButton = document.getElementById('run-button');
+
+    // Show results if hidden
+    if (document.querySelector('.results-container').style.display === 'none') {
+        toggleResults();
+    }
+
+    // Clear output areas
+    document.getElementById('compile-output').textContent = '';
+
+    // Update UI
+    compileButton.disabled = true;
+    runButton.disabled = true;
+    compileButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Compiling...';
+    document.getElementById('loading-spinner').style.display = 'block';
+
+    // Send to server
+    fetch('/execute_code', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            code: code,
+            project_id: projectId,
+            compile_only: true
+        }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        document.getElementById('loading-spinner').style.display = 'none';
+
+        if (data.success || data.stage === 'execution') {
+            showCompileDiagnostics({ diagnostics: data.diagnostics }, 'Compilation successful.');
+            switchTab('compile-output');
+            showNotification('Compilation successful', 'success');
+        } else {
+            showCompileDiagnostics(data, 'Compilation failed with no output.');
+            switchTab('compile-output');
+            showNotification('Compilation failed', 'error');
+        }
+    })
+    .catch(error => {
+        document.getElementById('loading-spinner').style.display = 'none';
+        document.getElementById('compile-output').textContent = 'Error: ' + error.message;
+        switchTab('compile-output');
+        showNotification('Request failed', 'error');
+    })
+    .finally(() => {
+        compileButton.disabled = false;
+        runButton.disabled = false;
+        compileButton.innerHTML = '<i class="fas fa-cogs"></i> Compile';
+        executionInProgress = false;
+    });
+}
+
+function saveCode() {
+    const code = editor.getValue();
+    const saveButton = document.getElementById('save-button');
+
+    // Update UI
+    saveButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
+    saveButton.disabled = true;
+
+    // Send to server
+    fetch(`/api/projects/${projectId}`, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            content: code,
+            save: true
+        }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        document.getElementById('last-updated').textContent = new Date(data.updated_at).toLocaleString();
+        showNotification('Project saved successfully', 'success');
+    })
+    .catch(error => {
+        showNotification('Error saving project: ' + error.message, 'error');
+    })
+    .finally(() => {
+        saveButton.innerHTML = '<i class="fas fa-save"></i> Save';
+        saveButton.disabled = false;
+    });
+}
+
+// Lists the structured compiler diagnostics; clicking one moves the cursor to it
+function showCompileDiagnostics(data, fallback) {
+    const output = document.getElementById('compile-output');
+    const diagnostics = data.diagnostics || [];
+    output.textContent = '';
+    if (!diagnostics.length) {
+        output.textContent = data.output || fallback;
+        return;
+    }
+
+    diagnostics.forEach(diagnostic => {
+        const row = document.createElement('div');
+        row.className = `compile-diagnostic ${diagnostic.severity}`;
+        const location = diagnostic.line === null ? '' : `${diagnostic.file}:${diagnostic.line}:${diagnostic.column}: `;
+        const severity = document.createElement('span');
+        severity.className = 'severity';
+        severity.textContent = diagnostic.severity;
+        row.append(location, severity, ': ' + diagnostic.message);
+
+        (diagnostic.fixits || []).forEach(fixit => {
+            const hint = document.createElement('div');
+            hint.className = 'fixit';
+            hint.textContent = fixit.line === fixit.end_line && fixit.column === fixit.end_column
+                ? `fix: insert "${fixit.text}" at ${fixit.line}:${fixit.column}`
+                : `fix: replace ${fixit.line}:${fixit.column}-${fixit.end_line}:${fixit.end_column} with "${fixit.text}"`;
+            row.appendChild(hint);
+        });
+
+        if (diagnostic.file === 'source.c') {
+            row.addEventListener('click', () => {
+                editor.setCursor({ line: diagnostic.line - 1, ch: diagnostic.column - 1 });
+                editor.focus();
+            });
+        }
+        output.appendChild(row);
+    });
+}
+
+function formatProfile(profile) {
+    if (!profile) return '';
+    if (profile.user_time_ms === null) return ` (${profile.wall_time_ms.toFixed(0)} ms)`;
+    const cpuMs = profile.user_time_ms + profile.sys_time_ms;
+    return ` (${profile.wall_time_ms.toFixed(0)} ms wall, ${cpuMs.toFixed(0)} ms CPU, ${(profile.peak_rss_kb / 1024).toFixed(1)} MB)`;
+}
+
+function showNotification(message, type) {
+    const notification = document.createElement('div');
+    notification.className = `notification ${type}`;
+    notification.textContent = message;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.classList.add('show');
+    }, 10);
+
+    setTimeout(() => {
+        notification.classList.remove('show');
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+// Request notification permission
+if ('Notification' in window && Notification.permission !== 'granted' && Notification.permission !== 'denied') {
+    Notification.requestPermission();
+}
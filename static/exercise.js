@@ -0,0 +1,259 @@
+// static/exercise.js
+let editor;
+let exerciseId = document.body.dataset.exerciseId;
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialize CodeMirror editor
+    editor = CodeMirror.fromTextArea(document.getElementById('code-editor'), {
+        lineNumbers: true,
+        mode: 'text/x-csrc',
+        theme: 'default',
+        indentUnit: 4,
+        indentWithTabs: true,
+        lineWrapping: true,
+        autoCloseBrackets: true,
+        matchBrackets: true
+    });
+
+    editor.setSize(null, "400px");
+
+    // Tabs functionality
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.addEventListener('click', function() {
+            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
+            this.classList.add('active');
+
+            const tabId = this.getAttribute('data-tab');
+            document.querySelectorAll('.output-content').forEach(content => {
+                content.style.display = 'none';
+            });
+            document.getElementById(tabId).style.display = 'block';
+        });
+    });
+
+    // Run button click handler
+    document.getElementById('run-button').addEventListener('click', submitSolution);
+
+    document.getElementById('reveal-solution').addEventListener('click', toggleSolution);
+});
+
+let solutionEditor;
+
+function toggleSolution() {
+    const solutionContainer = document.getElementById('solution-code-container');
+    if (solutionContainer.style.display === 'none') {
+        solutionContainer.style.display = 'block';
+
+        // Initialize solution editor if it hasn't been already
+        if (!solutionEditor) {
+            const solutionElement = document.getElementById('solution-editor');
+            solutionEditor = CodeMirror(solutionElement, {
+                value: solutionElement.dataset.solutionCode,
+                lineNumbers: true,
+                mode: 'text/x-csrc',
+                theme: 'default',
+                indentUnit: 4,
+                readOnly: true
+            });
+            solutionEditor.setSize(null, "300px");
+        }
+
+        this.textContent = 'Hide Solution';
+    } else {
+        solutionContainer.style.display = 'none';
+        this.textContent = 'Reveal Solution';
+    }
+}
+
+function submitSolution() {
+    const code = editor.getValue();
+    const runButton = document.getElementById('run-button');
+    const loadingSpinner = document.getElementById('loading-spinner');
+
+    // Disable button and show loading spinner
+    runButton.disabled = true;
+    runButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Running...';
+    loadingSpinner.style.display = 'block';
+
+    // Clear output areas
+    document.getElementById('compile-output').textContent = '';
+    document.getElementById('results-output').textContent = '';
+
+    // Submit to server
+    fetch(`/exercise/${exerciseId}/submit`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ code: code }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        loadingSpinner.style.display = 'none';
+
+        if (data.stage === 'compilation') {
+            document.getElementById('compile-output').textContent = data.output || 'Compilation error with no output.';
+            document.querySelector('[data-tab="compile-output"]').click();
+            showNotification('Compilation failed', 'error');
+        } else if (data.stage === 'execution') {
+            // Show test results
+            const resultsOutput = document.getElementById('results-output');
+            resultsOutput.innerHTML = ''; // Clear previous results
+
+            // Create results table
+            const table = document.createElement('table');
+            table.className = 'test-results-table';
+
+            // Add header row
+            const headerRow = document.createElement('tr');
+            ['Test Case', 'Status', 'Input', 'Expected Output', 'Actual Output', 'Time / Memory'].forEach(header => {
+                const th = document.createElement('th');
+                th.textContent = header;
+                headerRow.appendChild(th);
+            });
+            table.appendChild(headerRow);
+
+            // Add result rows
+            let allPassed = true;
+            data.results.forEach(result => {
+                const row = document.createElement('tr');
+                row.className = result.status;
+
+                // Test case number
+                const cellNum = document.createElement('td');
+                cellNum.textContent = result.test_case;
+                row.appendChild(cellNum);
+
+                // Status
+                const cellStatus = document.createElement('td');
+                cellStatus.className = 'status';
+                if (result.status === 'passed') {
+                    cellStatus.innerHTML = '<i class="fas fa-check-circle"></i> Passed';
+                } else if (result.status === 'timeout') {
+                    cellStatus.innerHTML = '<i class="fas fa-clock"></i> Timeout';
+                    allPassed = false;
+                } else if (result.status === 'time_limit_exceeded') {
+                    cellStatus.innerHTML = '<i class="fas fa-clock"></i> Time Limit Exceeded';
+                    allPassed = false;
+                } else if (result.status === 'memory_limit_exceeded') {
+                    cellStatus.innerHTML = '<i class="fas fa-memory"></i> Memory Limit Exceeded';
+                    allPassed = false;
+                } else if (result.status === 'output_limit_exceeded') {
+                    cellStatus.innerHTML = '<i class="fas fa-align-left"></i> Output Limit Exceeded';
+                    allPassed = false;
+                } else {
+                    cellStatus.innerHTML = '<i class="fas fa-times-circle"></i> Failed';
+                    allPassed = false;
+                }
+                row.appendChild(cellStatus);
+
+                // Input
+                const cellInput = document.createElement('td');
+                cellInput.textContent = result.input || 'No input';
+                row.appendChild(cellInput);
+
+                // Expected output
+                const cellExpected = document.createElement('td');
+                cellExpected.textContent = result.expected || 'No expected output';
+                row.appendChild(cellExpected);
+
+                // Actual output
+                const cellActual = document.createElement('td');
+                cellActual.textContent = result.actual || 'No output';
+                row.appendChild(cellActual);
+
+                // CPU time and peak memory of the run
+                const cellProfile = document.createElement('td');
+                if (result.profile && result.profile.user_time_ms !== null) {
+                    const cpuMs = result.profile.user_time_ms + result.profile.sys_time_ms;
+                    cellProfile.textContent = `${cpuMs.toFixed(1)} ms / ${(result.profile.peak_rss_kb / 1024).toFixed(1)} MB`;
+                }
+                row.appendChild(cellProfile);
+
+                table.appendChild(row);
+            });
+
+            resultsOutput.appendChild(table);
+
+            // Update UI based on results
+            if (allPassed) {
+                showNotification('All tests passed! Exercise completed.', 'success');
+
+                // Update progress status UI
+                document.querySelector('.status').className = 'status completed';
+                document.querySelector('.status').innerHTML = '<i class="fas fa-check-circle"></i> Completed';
+
+                // Add completion time
+                const now = new Date();
+                const formattedDate = now.toLocaleString();
+
+                const progressDetails = document.querySelector('.progress-details');
+                const completedElem = progressDetails.querySelector('p:last-child');
+                if (completedElem && completedElem.textContent.startsWith('Completed:')) {
+                    completedElem.textContent = `Completed: ${formattedDate}`;
+                } else {
+                    const newElem = document.createElement('p');
+                    newElem.textContent = `Completed: ${formattedDate}`;
+                    progressDetails.appendChild(newElem);
+                }
+            } else {
+                showNotification('Some tests failed. Try again!', 'error');
+            }
+
+            document.querySelector('[data-tab="results-output"]').click();
+        } else {
+            // Error case
+            document.getElementById('compile-output').textContent = data.output || 'An error occurred.';
+            document.querySelector('[data-tab="compile-output"]').click();
+            showNotification('An error occurred', 'error');
+        }
+    })
+    .catch(error => {
+        loadingSpinner.style.display = 'none';
+        document.getElementById('compile-output').textContent = 'Error: ' + error.message;
+        document.querySelector('[data-tab="compile-output"]').click();
+        showNotification('Request failed', 'error');
+    })
+    .finally(() => {
+        // Re-enable button
+        runButton.disabled = false;
+        runButton.innerHTML = '<i class="fas fa-play"></i> Run & Check';
+
+        // Update attempts count
+        const attemptsElem = document.querySelector('.progress-details p:first-child');
+        const currentAttempts = parseInt(attemptsElem.textContent.split(': ')[1]) + 1;
+        attemptsElem.textContent = `Attempts: ${currentAttempts}`;
+
+        // Update last attempt time
+        const now = new Date();
+        const formattedDate = now.toLocaleString();
+
+        const lastAttemptElem = document.querySelector('.progress-details p:nth-child(2)');
+        if (lastAttemptElem && lastAttemptElem.textContent.startsWith('Last Attempt:')) {
+            lastAttemptElem.textContent = `Last Attempt: ${formattedDate}`;
+        } else {
+            const newElem = document.createElement('p');
+            newElem.textContent = `Last Attempt: ${formattedDate}`;
+            document.querySelector('.progress-details').appendChild(newElem);
+        }
+    });
+}
+
+function showNotification(message, type) {
+    const notification = document.createElement('div');
+    notification.className = `notification ${type}`;
+    notification.textContent = message;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.classList.add('show');
+    }, 10);
+
+    setTimeout(() => {
+        notification.classList.remove('show');
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
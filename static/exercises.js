@@ -0,0 +1,47 @@
+// static/exercises.js
+// Filter functionality
+document.querySelectorAll('.filter-btn[data-filter]').forEach(button => {
+    button.addEventListener('click', function() {
+        // Update active state
+        document.querySelectorAll('.filter-btn[data-filter]').forEach(btn => {
+            btn.classList.remove('active');
+        });
+        this.classList.add('active');
+
+        const filter = this.getAttribute('data-filter');
+        const statusFilter = document.querySelector('.filter-btn[data-status].active').getAttribute('data-status');
+
+        filterExercises(filter, statusFilter);
+    });
+});
+
+document.querySelectorAll('.filter-btn[data-status]').forEach(button => {
+    button.addEventListener('click', function() {
+        // Update active state
+        document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
+            btn.classList.remove('active');
+        });
+        this.classList.add('active');
+
+        const status = this.getAttribute('data-status');
+        const difficultyFilter = document.querySelector('.filter-btn[data-filter].active').getAttribute('data-filter');
+
+        filterExercises(difficultyFilter, status);
+    });
+});
+
+function filterExercises(difficulty, status) {
+    document.querySelectorAll('.exercise-card').forEach(card => {
+        const cardDifficulty = card.getAttribute('data-difficulty');
+        const cardStatus = card.getAttribute('data-status');
+
+        const matchesDifficulty = difficulty === 'all' || cardDifficulty === difficulty;
+        const matchesStatus = status === 'all' || cardStatus === status;
+
+        if (matchesDifficulty && matchesStatus) {
+            card.style.display = 'block';
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
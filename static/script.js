@@ -3,6 +3,7 @@ const socket = io();
 let editor;
 let activeUsers = new Map();
 let executionInProgress = false;
+let documentRevision = null;  // Server revision of the text in the editor, null if unknown
 
 document.addEventListener('DOMContentLoaded', function() {
     const editorElement = document.getElementById('editor');
@@ -70,7 +71,10 @@ document.addEventListener('DOMContentLoaded', function() {
             }
 
             if (operation) {
-                socket.emit('edit', operation);
+                socket.emit('edit', operation, (ack) => {
+                    // Only follow the server's revision if nobody else's edit landed first
+                    documentRevision = ack && ack.base === documentRevision ? ack.rev : null;
+                });
             }
         }
     });
@@ -600,7 +604,7 @@ document.addEventListener('DOMContentLoaded', function() {
 socket.on('connect', () => {
     console.log('Connected to server');
     setTimeout(() => {
-        socket.emit('request_sync');
+        socket.emit('request_sync', { rev: documentRevision });
     }, 500);
 });
 
@@ -616,7 +620,24 @@ socket.on('document', (data) => {
 
         editor.setCursor(cursor);
         editor.scrollTo(scrollInfo.left, scrollInfo.top);
+        documentRevision = data.rev || null;
+    }
+});
+
+socket.on('document_patch', (patch) => {
+    if (!editor) {
+        return;
     }
+    if (patch.base !== documentRevision) {
+        socket.emit('request_sync', { rev: documentRevision });
+        return;
+    }
+    editor.replaceRange(patch.text, editor.posFromIndex(patch.start), editor.posFromIndex(patch.end), 'socket');
+    documentRevision = patch.rev;
+});
+
+socket.on('document_synced', (data) => {
+    documentRevision = data.rev;
 });
 
 socket.on('user_connected', (data) => {
@@ -638,6 +659,7 @@ socket.on('edit_error', (data) => {
 
 socket.on('force_sync', (data) => {
     editor.setValue(data.text);
+    documentRevision = data.rev || null;
 });
 
 socket.on('all_users', (data) => {